@@ -41,4 +41,5 @@ from .clustering import L1, L2, kmeans
 from .resampling import BandResampler
 from .transforms import LinearTransform
 from .detectors import *
+from .endmembers import *
 from .spatial import *
@@ -106,10 +106,100 @@ class ImageMaskIterator(Iterator):
         return self.image.shape[2]
 
     def __iter__(self):
+        for (coords, pixels) in self.iter_batches():
+            for ((i, j), x) in zip(coords, pixels):
+                (self.row, self.col) = (i, j)
+                yield x.squeeze()
+
+    def iter_batches(self, batch_size=None):
+        '''Iterates over the pixels in batches read by a single call.
+
+        Arguments:
+
+            `batch_size` (int, default None):
+
+                Maximum number of pixels in each batch. If not specified, the
+                number is chosen so that each batch requires approximately
+                `spectral.settings.stream_block_bytes` of memory.
+
+        Returns:
+
+            An iterator yielding 2-tuples of the form (`coords`, `pixels`),
+            where `coords` is an `Nx2` array of (row, col) indices and
+            `pixels` is the corresponding `NxB` array of pixel values.
+
+        For images that provide a `read_pixels` method (e.g.,
+        :class:`~spectral.SpyFile` and :class:`~spectral.ImageArray`), each
+        batch is read with one call to that method.
+        '''
+        import spectral
         coords = np.argwhere(self.mask)
-        for (i, j) in coords:
-            (self.row, self.col) = (i, j)
-            yield self.image[i, j].astype(self.image.dtype).squeeze()
+        if batch_size is None:
+            pixel_bytes = self.get_num_bands() * 8
+            batch_size = max(1, spectral.settings.stream_block_bytes
+                             // pixel_bytes)
+        for start in range(0, len(coords), batch_size):
+            batch = coords[start: start + batch_size]
+            pixels = _read_pixels(self.image, batch[:, 0], batch[:, 1])
+            yield (batch, pixels.astype(self.image.dtype))
+
+
+def _read_pixels(image, rows, cols):
+    '''Returns an `NxB` array of the image pixels at the given indices.'''
+    if hasattr(image, 'read_pixels'):
+        return image.read_pixels(rows, cols)
+    elif isinstance(image, np.ndarray):
+        return np.asarray(image)[rows, cols].reshape((len(rows), -1))
+    pixels = [image[i, j] for (i, j) in zip(rows, cols)]
+    return np.array(pixels).reshape((len(rows), -1))
+
+def _iter_row_blocks(image):
+    '''Yields (`row_slice`, `data`) blocks of consecutive image rows.
+
+    Blocks contain approximately `spectral.settings.stream_block_bytes` of
+    data. File images are read with their `iter_blocks` method.
+    '''
+    import spectral
+    from spectral.io.spyfile import SpyFile, TransformedImage
+    if isinstance(image, SpyFile):
+        for block in image.iter_blocks(prefetch=1):
+            yield block
+        return
+    elif isinstance(image, TransformedImage):
+        for block in image.iter_blocks(prefetch=1):
+            yield block
+        return
+    (M, N, B) = image.shape
+    rows_per_block = max(1, spectral.settings.stream_block_bytes
+                         // (N * B * 8))
+    for start in range(0, M, rows_per_block):
+        rows = slice(start, min(start + rows_per_block, M))
+        if isinstance(image, np.ndarray):
+            yield (rows, image[rows])
+        else:
+            yield (rows, image.read_subregion((rows.start, rows.stop),
+                                              (0, N)))
+
+
+def _map_pixels(image, func, nout, dtype, out=None):
+    '''Returns an `MxNxC` array of `func` applied to blocks of pixels.
+
+    `func` is called with an `NxB` float array of pixels and must return an
+    `NxC` array, where `C` is `nout`. Image data are read in blocks of rows
+    (see `_iter_row_blocks`). If `out` is given (e.g., a writable memmap of
+    an output image), results are written to it instead of a new array.
+    '''
+    (M, N, B) = image.shape
+    if out is None:
+        out = np.empty((M, N, nout), dtype=dtype)
+    elif out.shape != (M, N, nout):
+        raise ValueError('Output array must have shape %s.'
+                         % str((M, N, nout)))
+    for (rows, data) in _iter_row_blocks(image):
+        X = np.asarray(data, dtype=np.float64).reshape((-1, B))
+        out[rows] = func(X).reshape((-1, N, nout))
+    return out
+
 
 def iterator(image, mask=None, index=None):
     '''
@@ -232,13 +322,27 @@ def mean_cov(image, mask=None, index=None):
 
     Calculate the mean and covariance of of the given vectors. The argument
     can be an Iterator, a SpyFile object, or an `MxNxB` array.
+    If no mask is given, the data of a SpyFile are read and accumulated in
+    blocks of rows (see :meth:`~spectral.SpyFile.iter_blocks`).
+
+    For a :class:`~spectral.TransformedImage`, the mean and covariance are
+    computed from the statistics of the source image (:math:`A\mu + b` and
+    :math:`A \Sigma A^T`), so the transformed data are never computed.
+    Source statistics for the entire image are cached and shared by all
+    transformed images of the same source (see
+    :meth:`~spectral.TransformedImage.source_stats`).
     '''
     import spectral
     import numpy as np
     from numpy import zeros, transpose, dot, newaxis
+    from spectral.io.spyfile import TransformedImage
 
     status = spectral._status
 
+    if isinstance(image, TransformedImage):
+        stats = image.source_stats(mask, index).transform(image.transform)
+        return (stats.mean, stats.cov, stats.nsamples)
+
     if isinstance(image, np.ndarray):
         X = image.astype(np.float64)
         if X.ndim == 3:
@@ -254,6 +358,9 @@ def mean_cov(image, mask=None, index=None):
         C = np.cov(X)
         return (m, C, X.shape[1])
 
+    if mask is None and not isinstance(image, Iterator):
+        return _blocked_mean_cov(image)
+
     if not isinstance(image, Iterator):
         it = iterator(image, mask, index)
     else:
@@ -268,13 +375,22 @@ def mean_cov(image, mask=None, index=None):
 
     statusInterval = max(1, nSamples / 100)
     status.display_percentage('Covariance.....')
-    for x in it:
-        if not count % statusInterval:
+    if isinstance(it, ImageMaskIterator):
+        # Accumulate sums over batches of pixels, rather than pixel by pixel.
+        for (coords, X) in it.iter_batches():
+            X = X.astype(np.float64)
+            count += X.shape[0]
             status.update_percentage(float(count) / nSamples * 100.)
-        count += 1
-        sumX += x
-        x = x.astype(np.float64)[:, newaxis]
-        sumX2 += x.dot(x.T)
+            sumX += X.sum(axis=0)
+            sumX2 += X.T.dot(X)
+    else:
+        for x in it:
+            if not count % statusInterval:
+                status.update_percentage(float(count) / nSamples * 100.)
+            count += 1
+            sumX += x
+            x = x.astype(np.float64)[:, newaxis]
+            sumX2 += x.dot(x.T)
     mean = (sumX / count)
     sumX = sumX[:, newaxis]
     cov = (sumX2 - sumX.dot(sumX.T) / count) / (count - 1)
@@ -282,6 +398,39 @@ def mean_cov(image, mask=None, index=None):
     return (mean, cov, count)
 
 
+def _blocked_mean_cov(image):
+    '''Returns (mean, cov, nsamples) of an image, accumulated by row block.
+
+    Sums are accumulated about the mean of the first block, which avoids
+    most of the loss of precision of the "sum of squares" formula when the
+    mean is large relative to the spread of the data.
+    '''
+    import spectral
+    status = spectral._status
+    (M, N, B) = image.shape
+    if M * N < 2:
+        raise ValueError('At least 2 pixels are required to compute a '
+                         'covariance (image has %d).' % (M * N))
+    shift = None
+    sumX = np.zeros(B)
+    sumX2 = np.zeros((B, B))
+    count = 0
+    status.display_percentage('Covariance.....')
+    for (rows, data) in _iter_row_blocks(image):
+        X = np.asarray(data, dtype=np.float64).reshape((-1, B))
+        if shift is None:
+            shift = X.mean(axis=0)
+        X = X - shift
+        count += X.shape[0]
+        sumX += X.sum(axis=0)
+        sumX2 += X.T.dot(X)
+        status.update_percentage(100. * rows.stop / M)
+    mean = sumX / count
+    cov = (sumX2 - np.outer(sumX, sumX) / count) / (count - 1)
+    status.end_percentage()
+    return (mean + shift, cov, count)
+
+
 def cov_avg(image, mask, weighted=True):
     '''Calculates the covariance averaged over a set of classes.
 
@@ -500,23 +649,29 @@ def principal_components(image):
         `reduce`:
 
             A method to reduce the number of eigenvalues.
+
+    Statistics of an image are computed with :func:`calc_stats`, so they are
+    read from the image's statistics sidecar when one is available (see
+    :mod:`spectral.io.stats`) and are otherwise accumulated over blocks of
+    image rows. Eigenvectors are computed with a symmetric eigensolver.
+
+    The image can be projected onto the principal components without
+    loading it into memory. For example, the first 10 components of an image
+    file are written to a new ENVI file in one pass over the data with::
+
+        pc = principal_components(image).reduce(num=10)
+        envi.save_image('pc.hdr', pc.transform(image), dtype=np.float32)
     '''
-    from numpy import sqrt, sum
 
     if isinstance(image, GaussianStats):
         stats = image
     else:
         stats = calc_stats(image)
 
-    (L, V) = numpy.linalg.eig(stats.cov)
-
-    # numpy says eigenvalues may not be sorted so we'll sort them, if needed.
-    if not np.alltrue(np.diff(L) <= 0):
-        ii = list(reversed(np.argsort(L)))
-        L = L[ii]
-        V = V[:, ii]
-
-    return PrincipalComponents(L, V, stats)
+    # The covariance is symmetric, so its eigenvalues are real and are
+    # returned in ascending order.
+    (L, V) = np.linalg.eigh(stats.cov)
+    return PrincipalComponents(L[::-1], V[:, ::-1], stats)
 
 
 class FisherLinearDiscriminant:
@@ -752,7 +907,9 @@ class GaussianStats(object):
         from spectral.algorithms.transforms import LinearTransform
         if not isinstance(xform, LinearTransform):
             raise TypeError('Expected a LinearTransform object.')
-        m = xform(self.mean)
+        m = np.dot(xform._A, self.mean)
+        if xform._bias is not None:
+            m = m + xform._bias
         C = xform._A.dot(self.cov).dot(xform._A.T)
         return GaussianStats(mean=m, cov=C, nsamples=self.nsamples)
 
@@ -801,9 +958,21 @@ def calc_stats(image, mask=None, index=None, allow_nan=False):
         `GaussianStats` object:
 
             This object will have members `mean`, `cov`, and `nsamples`.
+
+    If `mask` is not specified and `image` is read from an image file, the
+    statistics stored in the file's statistics sidecar are used, subject to
+    `spectral.settings.stats_sidecar` (see :mod:`spectral.io.stats`). For a
+    :class:`~spectral.TransformedImage`, statistics are derived from those of
+    the source image (see :func:`mean_cov`).
     '''
     from spectral.algorithms.spymath import has_nan, NaNValueError
-    (mean, cov, N) = mean_cov(image, mask, index)
+    from spectral.io.stats import get_stats
+
+    stats = get_stats(image, cov=True) if mask is None else None
+    if stats is not None:
+        (mean, cov, N) = (stats.mean, stats.cov, stats.nsamples)
+    else:
+        (mean, cov, N) = mean_cov(image, mask, index)
     if has_nan(mean) and not allow_nan:
         raise NaNValueError('NaN values present in data.')
     return GaussianStats(mean=mean, cov=cov, nsamples=N)
@@ -1186,7 +1355,7 @@ def bdist_terms(a, b):
     return (lin_term, float(quad_term))
 
 
-def transform_image(matrix, image):
+def transform_image(matrix, image, dtype=np.float64):
     '''
     Performs linear transformation on all pixels in an image.
 
@@ -1200,27 +1369,32 @@ def transform_image(matrix, image):
 
             Image data to transform
 
+        dtype (numpy dtype, default `numpy.float64`):
+
+            Data type of the returned array (for an ndarray `image`). For
+            `numpy.float32`, the transform is also computed in single
+            precision.
+
     Returns:
 
         If `image` is an `MxNxB` :class:`numpy.ndarray`, the return will be a
         transformed :class:`numpy.ndarray` with shape `MxNxC`.  If `image` is
-        :class:`spectral.Image`, the returned object will be a
-        :class:`spectral.TransformedImage` object and no transformation of data
-        will occur until elements of the object are accessed.
+        :class:`spectral.SpyFile` or :class:`spectral.TransformedImage`, the
+        returned object will be a :class:`spectral.TransformedImage` object
+        and no transformation of data will occur until elements of the object
+        are accessed.
     '''
     from spectral.io.spyfile import TransformedImage
     from spectral.io.spyfile import SpyFile
 
-    if isinstance(image, SpyFile):
+    from spectral.algorithms.transforms import LinearTransform
+
+    if isinstance(image, (SpyFile, TransformedImage)):
         return TransformedImage(matrix, image)
     elif isinstance(image, np.ndarray):
         (M, N, B) = image.shape
-        ximage = numpy.zeros((M, N, matrix.shape[0]), float)
-
-        for i in range(M):
-            for j in range(N):
-                ximage[i, j] = numpy.dot(matrix, image[i, j].astype(float))
-        return ximage
+        ximage = np.empty((M, N, matrix.shape[0]), dtype)
+        return LinearTransform(matrix, dtype=dtype)(image, out=ximage)
     else:
         raise 'Unrecognized image type passed to transform_image.'
 
@@ -1244,38 +1418,143 @@ def orthogonalize(vecs, start=0):
     Returns:
 
         A new `CxB` containing an orthonormal basis for the given vectors.
-    '''
 
-    from numpy import transpose, dot, identity
-    from numpy.linalg import inv
-    from math import sqrt
-
-    (M, N) = vecs.shape
-    basis = numpy.array(transpose(vecs))
-    eye = identity(N).astype(float)
+    The basis is computed with a QR decomposition (the result is the same as
+    classical Gram-Schmidt but no matrix inverses are required).
+    '''
+    vecs = np.asarray(vecs, dtype=np.float64)
+    basis = np.array(vecs)
     if start == 0:
-        basis[:, 0] /= sqrt(dot(basis[:, 0], basis[:, 0]))
-        start = 1
-
-    for i in range(start, M):
-        v = basis[:, i] / sqrt(dot(basis[:, i], basis[:, i]))
-        U = basis[:, :i]
-        P = eye - dot(U, dot(inv(dot(transpose(U), U)), transpose(U)))
-        basis[:, i] = dot(P, v)
-        basis[:, i] /= sqrt(dot(basis[:, i], basis[:, i]))
-
-    return transpose(basis)
-
-
-def unmix(data, members):
+        (Q, R) = np.linalg.qr(vecs.T)
+        # Use the signs that Gram-Schmidt would give (positive diagonal of R)
+        basis[:] = (Q * np.where(np.diag(R) < 0, -1., 1.)).T
+        return basis
+
+    # Remove components along the given orthonormal vectors, then
+    # orthonormalize the remainder.
+    U = vecs[:start]
+    V = vecs[start:]
+    V = V - V.dot(U.T).dot(U)
+    V = V - V.dot(U.T).dot(U)
+    (Q, R) = np.linalg.qr(V.T)
+    basis[start:] = (Q * np.where(np.diag(R) < 0, -1., 1.)).T
+    return basis
+
+
+def _gram_inverse(G, cols, cache):
+    '''Returns the inverse of a Gram submatrix with its row & total sums.
+
+    Results are kept in the `cache` dict, keyed by the endmember indices
+    `cols`.
+    '''
+    key = cols.tobytes()
+    if key not in cache:
+        Ginv = np.linalg.inv(G[np.ix_(cols, cols)])
+        cache[key] = (Ginv, Ginv.sum(axis=0), Ginv.sum())
+    return cache[key]
+
+
+def _passive_solve(G, Bx, P, sum_to_one, cache):
+    '''Solves the normal equations of each pixel restricted to its passive set.
+
+    Rows of `Bx` (`NxC`) are the endmember correlations of `N` pixels and
+    rows of the boolean array `P` select the endmembers each pixel may use.
+    Pixels sharing a passive set are solved together and inverses of the
+    corresponding Gram submatrices are kept in the `cache` dict, so they are
+    computed only once per call to `unmix`. If `sum_to_one` is True, the
+    solutions are constrained to sum to one.
+    '''
+    S = np.zeros_like(Bx)
+    (patterns, groups) = np.unique(P, axis=0, return_inverse=True)
+    for (k, p) in enumerate(patterns):
+        if not p.any():
+            continue
+        rows = np.argwhere(groups.ravel() == k).ravel()
+        cols = np.argwhere(p).ravel()
+        (Ginv, g1, s1) = _gram_inverse(G, cols, cache)
+        X = Bx[np.ix_(rows, cols)].dot(Ginv)
+        if sum_to_one:
+            X += np.outer((1. - X.sum(axis=1)) / s1, g1)
+        S[np.ix_(rows, cols)] = X
+    return S
+
+
+def _active_set_solve(G, Bx, sum_to_one, cache):
+    '''Batched active-set solver for non-negative abundances.
+
+    Solves min(0.5 * a'Ga - b'a) subject to `a >= 0` (and `sum(a) == 1` if
+    `sum_to_one` is True) for every row `b` of `Bx`. This is the method of
+    Lawson & Hanson, applied to all pixels at once: each pixel keeps its own
+    passive set and pixels that have converged drop out of the iteration.
+    '''
+    (N, C) = Bx.shape
+    tol = 1.e-10 * np.abs(G).max()
+    A = np.zeros((N, C))
+    P = np.zeros((N, C), dtype=bool)
+    if sum_to_one:
+        # Start from the best single-endmember (feasible) solution.
+        j = np.argmin(0.5 * np.diag(G) - Bx, axis=1)
+        A[np.arange(N), j] = 1.
+        P[np.arange(N), j] = True
+    active = np.arange(N)
+    for i in range(3 * C):
+        # Negative gradient (less the sum-to-one multiplier) of each pixel
+        W = Bx[active] - A[active].dot(G)
+        Pa = P[active]
+        if sum_to_one:
+            W -= ((W * Pa).sum(axis=1) / Pa.sum(axis=1))[:, np.newaxis]
+        W[Pa] = -np.inf
+        j = np.argmax(W, axis=1)
+        improve = W[np.arange(len(active)), j] > tol
+        active = active[improve]
+        if len(active) == 0:
+            break
+        P[active, j[improve]] = True
+
+        # Move toward the passive-set solution, dropping endmembers whose
+        # abundances would become negative.
+        inner = active
+        for k in range(C):
+            S = _passive_solve(G, Bx[inner], P[inner], sum_to_one, cache)
+            neg = P[inner] & (S <= 0)
+            ok = ~np.any(neg, axis=1)
+            A[inner[ok]] = S[ok]
+            inner = inner[~ok]
+            if len(inner) == 0:
+                break
+            (S, neg, Ai) = (S[~ok], neg[~ok], A[inner])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratio = np.where(neg, Ai / (Ai - S), np.inf)
+            jmin = np.argmin(ratio, axis=1)
+            alpha = ratio[np.arange(len(inner)), jmin][:, np.newaxis]
+            Ai += alpha * (S - Ai)
+            Pi = P[inner] & (Ai > 0)
+            Pi[np.arange(len(inner)), jmin] = False
+            Ai[~Pi] = 0
+            A[inner] = Ai
+            P[inner] = Pi
+    return A
+
+
+def unmix(data, members, dtype=np.float64, constraint=None, out=None):
     '''
     Perform linear unmixing on image data.
 
-    USAGE: mix = unmix(data, members)
+    USAGE: mix = unmix(data, members [, constraint] [, out])
 
     ARGUMENTS:
-        data                The MxNxB image data to be unmixed
+        data                The MxNxB image data to be unmixed (an ndarray
+                            or :class:`spectral.Image`)
         members             An CxB array of C endmembers
+        dtype               Data type of the returned array (default
+                            numpy.float64)
+        constraint          Constraint on the abundances. One of None
+                            (unconstrained least squares), "nnls"
+                            (non-negative), "scls" (sum-to-one), or "fcls"
+                            (fully constrained: non-negative and sum-to-one).
+        out                 An optional MxNxC array (e.g., a writable memmap
+                            of an output image) into which abundances are
+                            written.
     RETURN VALUE:
         mix                 An MxNxC array of endmember fractions.
 
@@ -1285,30 +1564,44 @@ def unmix(data, members):
     then an array of indices of greatest fractional endmembers is obtained
     by argmax(mix).
 
-    Note that depending on endmembers given, fractional abundances for
-    endmembers may be negative.
-    '''
-
-    from numpy import transpose, dot, zeros
-    from numpy.linalg import inv
+    Note that for unconstrained or sum-to-one unmixing, fractional
+    abundances for endmembers may be negative.
 
+    Pixels are unmixed in blocks of image rows, so images read from files
+    are never loaded entirely into memory. The Gram matrix of the endmembers
+    is inverted once and shared by all pixels; the non-negative solvers use
+    a batched active-set method that solves all pixels sharing a set of
+    active endmembers together.
+    '''
+    constraints = (None, 'nnls', 'scls', 'fcls')
+    if constraint not in constraints:
+        raise ValueError('constraint must be one of %s.' % str(constraints))
     assert members.shape[1] == data.shape[2], \
         'Matrix dimensions are not aligned.'
 
-    members = members.astype(float)
-    # Calculate the pseudo inverse
-    pi = dot(members, transpose(members))
-    pi = dot(inv(pi), members)
-
-    (M, N, B) = data.shape
-    unmixed = zeros((M, N, members.shape[0]), float)
-    for i in range(M):
-        for j in range(N):
-            unmixed[i, j] = dot(pi, data[i, j].astype(float))
-    return unmixed
+    members = np.asarray(members, dtype=np.float64)
+    C = members.shape[0]
+    G = members.dot(members.T)
+    cache = {}
+    sum_to_one = constraint in ('scls', 'fcls')
+
+    if constraint in (None, 'scls'):
+        (Ginv, g1, s1) = _gram_inverse(G, np.arange(C), cache)
+        # Pseudo-inverse of the endmembers
+        pi = Ginv.dot(members)
+        def func(X):
+            A = X.dot(pi.T)
+            if sum_to_one:
+                A += np.outer((1. - A.sum(axis=1)) / s1, g1)
+            return A
+    else:
+        def func(X):
+            return _active_set_solve(G, X.dot(members.T), sum_to_one, cache)
+    return _map_pixels(data, func, C, dtype, out)
 
 
-def spectral_angles(data, members):
+def spectral_angles(data, members, k=None, threshold=None,
+                    dtype=np.float64):
     '''Calculates spectral angles with respect to given set of spectra.
 
     Arguments:
@@ -1321,27 +1614,97 @@ def spectral_angles(data, members):
 
             `CxB` array of spectral endmembers.
 
+    Keyword Arguments:
+
+        `k` (int, default None):
+
+            If given, only the `k` smallest angles of each pixel (and the
+            indices of the corresponding members) are returned.
+
+        `threshold` (float, default None):
+
+            If given, a class map is returned instead of angles. Each pixel is
+            assigned the (1-based) index of the member with the smallest
+            angle, or 0 if no member is within `threshold` radians.
+
+        `dtype` (numpy dtype, default numpy.float64):
+
+            Data type of returned angles.
+
     Returns:
 
-        `MxNxC` array of spectral angles.
+        `MxNxC` array of spectral angles. If `k` is given, a 2-tuple of
+        `MxNxk` arrays (`indices`, `angles`), sorted by increasing angle, is
+        returned. If `threshold` is given, an `MxN` class map is returned.
 
 
     Calculates the spectral angles between each vector in data and each of the
     endmembers.  The output of this function (angles) can be used to classify
     the data by minimum spectral angle by calling argmin(angles).
+
+    Pixels are processed in blocks of image rows (with one matrix product
+    per block), so file images are never loaded entirely into memory. When
+    `k` or `threshold` is given, the dense array of angles is never formed,
+    which allows large spectral libraries to be used.
     '''
+    import spectral
     assert members.shape[1] == data.shape[2], \
         'Matrix dimensions are not aligned.'
+    if k is not None and threshold is not None:
+        raise ValueError('Only one of `k` and `threshold` may be given.')
 
     m = np.array(members, np.float64)
     m /= np.sqrt(np.einsum('ij,ij->i', m, m))[:, np.newaxis]
+    C = m.shape[0]
+
+    def cosines(X):
+        norms = np.sqrt(np.einsum('ij,ij->i', X, X))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.clip(X.dot(m.T) / norms[:, np.newaxis], -1, 1)
 
-    norms = np.sqrt(np.einsum('ijk,ijk->ij', data, data))
-    dots = np.einsum('ijk,mk->ijm', data, m)
-    dots = np.clip(dots / norms[:, :, np.newaxis], -1, 1)
-    return np.arccos(dots)
+    if k is None and threshold is None:
+        return _map_pixels(data, lambda X: np.arccos(cosines(X)), C, dtype)
 
-def msam(data, members):
+    # Limit the number of pixels whose cosines are held at once.
+    chunk = max(1, spectral.settings.stream_block_bytes // (8 * C))
+    (M, N, B) = data.shape
+    if threshold is not None:
+        def classify(X):
+            cos = cosines(X)
+            best = np.argmax(cos, axis=1)
+            angles = np.arccos(cos[np.arange(len(X)), best])
+            return np.where(angles <= threshold, best + 1, 0)
+        classes = np.empty((M, N), dtype=int)
+        for (rows, block) in _iter_row_blocks(data):
+            X = np.asarray(block, dtype=np.float64).reshape((-1, B))
+            c = np.concatenate([classify(X[i: i + chunk])
+                                for i in range(0, len(X), chunk)])
+            classes[rows] = c.reshape((-1, N))
+        return classes
+
+    k = int(k)
+    if not 0 < k <= C:
+        raise ValueError('`k` must be between 1 and the number of members.')
+    indices = np.empty((M, N, k), dtype=int)
+    angles = np.empty((M, N, k), dtype=dtype)
+    for (rows, block) in _iter_row_blocks(data):
+        X = np.asarray(block, dtype=np.float64).reshape((-1, B))
+        (I, A) = (np.empty((len(X), k), dtype=int), np.empty((len(X), k)))
+        for i in range(0, len(X), chunk):
+            cos = cosines(X[i: i + chunk])
+            r = np.arange(len(cos))[:, np.newaxis]
+            if k < C:
+                best = np.argpartition(-cos, k - 1, axis=1)[:, :k]
+            else:
+                best = np.tile(np.arange(C), (len(cos), 1))
+            best = best[r, np.argsort(-cos[r, best], axis=1)]
+            I[i: i + chunk] = best
+            A[i: i + chunk] = np.arccos(cos[r, best])
+        indices[rows] = I.reshape((-1, N, k))
+        angles[rows] = A.reshape((-1, N, k))
+    return (indices, angles)
+
+def msam(data, members, dtype=np.float64):
     '''Modified SAM scores according to Oshigami, et al [1]. Endmembers are
     mean-subtracted prior to spectral angle calculation. Results are
     normalized such that the maximum value of 1 corresponds to a perfect match
@@ -1357,6 +1720,10 @@ def msam(data, members):
 
             `CxB` array of spectral endmembers.
 
+        `dtype` (numpy dtype, default `numpy.float64`):
+
+            Data type of the returned array.
+
     Returns:
 
         `MxNxC` array of MSAM scores with maximum value of 1 corresponding
@@ -1382,30 +1749,22 @@ def msam(data, members):
     assert members.shape[1] == data.shape[2], \
         'Matrix dimensions are not aligned.'
 
-    (M, N, B) = data.shape
     m = np.array(members, np.float64)
-    C = m.shape[0]
 
-    # Normalize endmembers
-    for i in range(C):
+    # Normalize endmembers (Fisher z trafo type operation)
+    m -= m.mean(axis=1)[:, np.newaxis]
+    m /= np.sqrt(np.einsum('ij,ij->i', m, m))[:, np.newaxis]
+
+    def scores(X):
         # Fisher z trafo type operation
-        m[i] -= np.mean(m[i])
-        m[i] /= np.sqrt(m[i].dot(m[i]))
-
-    angles = np.zeros((M, N, C), np.float64)
-
-    for i in range(M):
-        for j in range(N):
-            #Fisher z trafo type operation
-            v = data[i, j] - np.mean(data[i, j])
-            v /= np.sqrt(v.dot(v))
-            v = np.clip(v, -1, 1)
-            for k in range(C):
-                # Calculate Mineral Index according to Oshigami et al.
-                # (Intnl. J. of Remote Sens. 2013)
-                a = np.clip(v.dot(m[k]), -1, 1)
-                angles[i,j,k]= 1.0 - np.arccos(a) / (math.pi / 2)
-    return angles
+        X = X - X.mean(axis=1)[:, np.newaxis]
+        X /= np.sqrt(np.einsum('ij,ij->i', X, X))[:, np.newaxis]
+        # Calculate Mineral Index according to Oshigami et al.
+        # (Intnl. J. of Remote Sens. 2013)
+        a = np.clip(X.dot(m.T), -1, 1)
+        return 1.0 - np.arccos(a) / (math.pi / 2)
+
+    return _map_pixels(data, scores, m.shape[0], dtype)
 
 def noise_from_diffs(X, direction='lowerright'):
     '''Estimates noise statistcs by taking differences of adjacent pixels.
@@ -1659,18 +2018,52 @@ def mnf(signal, noise):
     from spectral.algorithms.transforms import LinearTransform
     from spectral.algorithms.algorithms import PrincipalComponents, GaussianStats
     C = noise.sqrt_inv_cov.dot(signal.cov).dot(noise.sqrt_inv_cov)
-    (L, V) = np.linalg.eig(C)
-    # numpy says eigenvalues may not be sorted so we'll sort them, if needed.
-    if not np.alltrue(np.diff(L) <= 0):
-        ii = list(reversed(np.argsort(L)))
-        L = L[ii]
-        V = V[:, ii]
+    (L, V) = np.linalg.eigh(C)
+    (L, V) = (L[::-1], V[:, ::-1])
     wstats = GaussianStats(mean=np.zeros_like(L), cov=C)
     napc = PrincipalComponents(L, V, wstats)
     return MNFResult(signal, noise, napc)
  
+def _random_generator(random_state):
+    '''Returns a random number generator for a seed or `RandomState`.
+
+    If `random_state` is None, the global numpy generator is returned.
+    '''
+    if random_state is None:
+        return np.random
+    elif isinstance(random_state, np.random.RandomState):
+        return random_state
+    return np.random.RandomState(random_state)
+
+
+def _ppi_extremes(X, R, chunk_size, pool=None):
+    '''Returns min/max projections of rows of `X` onto columns of `R`.
+
+    Returns a 4-tuple (`smin`, `imin`, `smax`, `imax`) of length-`K` arrays
+    (one entry per projection). Projections are computed with one matrix
+    product per chunk of `chunk_size` pixels. If `pool` is given, chunks are
+    processed by its threads.
+    '''
+    def extremes(start):
+        S = X[start: start + chunk_size].dot(R)
+        (imin, imax) = (np.argmin(S, axis=0), np.argmax(S, axis=0))
+        k = np.arange(S.shape[1])
+        return (S[imin, k], imin + start, S[imax, k], imax + start)
+
+    starts = range(0, X.shape[0], chunk_size)
+    if pool is not None:
+        results = pool.map(extremes, starts)
+    else:
+        results = [extremes(start) for start in starts]
+    (smin, imin, smax, imax) = [np.array(a) for a in zip(*results)]
+    # Chunks are in pixel order, so ties resolve to the first pixel.
+    (jmin, jmax) = (np.argmin(smin, axis=0), np.argmax(smax, axis=0))
+    k = np.arange(R.shape[1])
+    return (smin[jmin, k], imin[jmin, k], smax[jmax, k], imax[jmax, k])
+
+
 def ppi(X, niters, threshold=0, centered=False, start=None, display=0,
-        **imshow_kwargs):
+        batch_size=None, random_state=None, n_jobs=1, **imshow_kwargs):
     '''Returns pixel purity indices for an image.
 
     Arguments:
@@ -1716,6 +2109,26 @@ def ppi(X, niters, threshold=0, centered=False, start=None, display=0,
             for meaning) is not provided, a default stretch of (0.99, 0.999)
             is used.
 
+        `batch_size` (int):
+
+            Number of random unit vectors drawn and projected at once. The
+            projections of each batch are computed with one matrix product
+            per chunk of pixels. By default, 100 vectors are used (or
+            `display`, if it is nonzero).
+
+        `random_state` (int or :class:`numpy.random.RandomState`):
+
+            Seed or random number generator used to draw the random vectors.
+            If not given, the global numpy random number generator is used.
+            To reproducibly continue a run with `start`, pass the same
+            `RandomState` object to each call. For a given sequence of random
+            vectors, results do not depend on `batch_size` or `n_jobs`.
+
+        `n_jobs` (int):
+
+            Number of threads used to compute projections of pixel chunks. If
+            -1, the number of CPUs is used.
+
     Return value:
 
         An ndarray of integers that represent the pixel purity indices of the
@@ -1755,9 +2168,20 @@ def ppi(X, niters, threshold=0, centered=False, start=None, display=0,
         stats = calc_stats(X)
         X = X - stats.mean
 
+    if n_jobs == -1:
+        from multiprocessing import cpu_count
+        n_jobs = cpu_count()
+    if not isinstance(n_jobs, Integral) or n_jobs < 1:
+        raise ValueError('`n_jobs` must be a positive integer or -1.')
+    rand = _random_generator(random_state).rand
+    if batch_size is None:
+        batch_size = display if display else 100
+
     shape = X.shape
     X = X.reshape(-1, X.shape[-1])
-    nbands = X.shape[-1]
+    (npixels, nbands) = X.shape
+    chunk_size = max(1, spy.settings.stream_block_bytes
+                     // (8 * min(batch_size, niters)))
     
     fig = None
     updating = False
@@ -1773,34 +2197,45 @@ def ppi(X, niters, threshold=0, centered=False, start=None, display=0,
     msg = 'Running {0} pixel purity iterations...'.format(niters)
     spy._status.display_percentage(msg)
 
+    pool = None
+    if n_jobs > 1 and npixels > chunk_size:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(n_jobs)
+
+    i = 0
     try:
-        for i in range(niters):
-            r = np.random.rand(nbands) - 0.5
-            r /= np.sqrt(np.sum(r * r))
-            s = X.dot(r)
-            imin = np.argmin(s)
-            imax = np.argmax(s)
+        while i < niters:
+            K = min(batch_size, niters - i)
+            R = rand(K, nbands) - 0.5
+            R /= np.sqrt(np.sum(R * R, axis=1))[:, np.newaxis]
+            R = R.T
+            (smin, imin, smax, imax) = _ppi_extremes(X, R, chunk_size, pool)
 
-            updating = True
             if threshold == 0:
                 # Only the two extreme pixels are incremented
-                counts[imin] += 1
-                counts[imax] += 1
+                hits = np.bincount(np.concatenate([imin, imax]),
+                                   minlength=npixels)
             else:
                 # All pixels within threshold distance from the two extremes
-                counts[s >= (s[imax] - threshold)] += 1
-                counts[s <= (s[imin] + threshold)] += 1
+                hits = np.zeros(npixels, dtype=counts.dtype)
+                for j in range(0, npixels, chunk_size):
+                    S = X[j: j + chunk_size].dot(R)
+                    hits[j: j + chunk_size] = \
+                        np.sum(S >= (smax - threshold), axis=1) + \
+                        np.sum(S <= (smin + threshold), axis=1)
+            updating = True
+            counts += hits.astype(counts.dtype)
             updating = False
+            i += K
 
-            if display > 0 and (i + 1) % display == 0:
+            if display > 0 and (i % display == 0 or i == niters):
                 if fig is not None:
                     fig.set_data(counts.reshape(shape[:2]), **imshow_kwargs)
                 else:
                     fig = spy.imshow(counts.reshape(shape[:2]), **imshow_kwargs)
-                fig.set_title('PPI ({} iterations)'.format(i + 1))
+                fig.set_title('PPI ({} iterations)'.format(i))
 
-            if not (i + 1) % 10:
-                spy._status.update_percentage(100 * (i + 1) / niters)
+            spy._status.update_percentage(100 * i / niters)
 
     except KeyboardInterrupt:
         spy._status.end_percentage('interrupted')
@@ -1814,6 +2249,10 @@ def ppi(X, niters, threshold=0, centered=False, start=None, display=0,
               'values may be corrupt. Returning None'
             spy._status.write(msg)
             return None
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
         
     spy._status.end_percentage()
 
@@ -0,0 +1,354 @@
+#########################################################################
+#
+#   endmembers.py - This file is part of the Spectral Python (SPy)
+#   package.
+#
+#   Copyright (C) 2013 Thomas Boggs
+#
+#   Spectral Python is free software; you can redistribute it and/
+#   or modify it under the terms of the GNU General Public License
+#   as published by the Free Software Foundation; either version 2
+#   of the License, or (at your option) any later version.
+#
+#   Spectral Python is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this software; if not, write to
+#
+#               Free Software Foundation, Inc.
+#               59 Temple Place, Suite 330
+#               Boston, MA 02111-1307
+#               USA
+#
+#########################################################################
+#
+# Send comments to:
+# Thomas Boggs, tboggs@users.sourceforge.net
+#
+'''
+Endmember extraction algorithms
+
+Each function returns a 2-tuple (`spectra`, `coords`), where `spectra` is a
+`CxB` array of endmember spectra and `coords` is a `Cx2` integer array of the
+(row, column) image coordinates of the endmembers. Image data are read in
+blocks of rows, so the functions can be applied to :class:`~spectral.SpyFile`
+objects without loading them into memory. Since each algorithm makes several
+passes over the image, it is usually much faster to extract endmembers from
+dimensionality-reduced data (e.g., a :class:`~spectral.TransformedImage`
+returned by the `transform` method of a PCA or MNF result) and then read the
+full spectra from the original image at the returned coordinates.
+'''
+
+from __future__ import division, print_function, unicode_literals
+
+__all__ = ['atgp', 'vca', 'nfindr']
+
+import numpy as np
+
+
+def _iter_pixel_blocks(image):
+    '''Yields (`start`, `X`) for consecutive blocks of image rows.
+
+    `start` is the flat index of the first pixel in the block and `X` is an
+    `NxB` float64 array of the block's pixels.
+    '''
+    from .algorithms import _iter_row_blocks
+    (M, N, B) = image.shape
+    for (rows, data) in _iter_row_blocks(image):
+        X = np.asarray(data, dtype=np.float64).reshape((-1, B))
+        yield (rows.start * N, X)
+
+
+def _find_max(image, score):
+    '''Returns the flat index and spectrum of the pixel maximizing `score`.
+
+    `score` is called with an `NxB` array of pixels and must return a
+    length-`N` array.
+    '''
+    (best, index, pixel) = (-np.inf, None, None)
+    for (start, X) in _iter_pixel_blocks(image):
+        s = score(X)
+        j = np.argmax(s)
+        if s[j] > best:
+            (best, index, pixel) = (s[j], start + j, X[j].copy())
+    return (index, pixel)
+
+
+def _coords(image, indices):
+    '''Returns a `Cx2` array of (row, col) coordinates of flat indices.'''
+    return np.array(np.unravel_index(np.asarray(indices, dtype=int),
+                                     image.shape[:2])).T
+
+
+def _check_num_endmembers(k, nbands):
+    if not 1 < k <= nbands:
+        raise ValueError('Number of endmembers must be between 2 and %d.'
+                         % nbands)
+
+
+def _atgp(image, k, reduce=None):
+    '''Returns (`indices`, `pixels`) of endmembers found by ATGP.
+
+    If `reduce` is given, it is applied to blocks of pixels before
+    computing projections.
+    '''
+    from .algorithms import orthogonalize
+    if reduce is None:
+        reduce = lambda X: X
+    (indices, pixels, vecs) = ([], [], None)
+    for i in range(k):
+        def score(X):
+            X = reduce(X)
+            if vecs is not None:
+                X = X - X.dot(vecs.T).dot(vecs)
+            return np.einsum('ij,ij->i', X, X)
+        (index, pixel) = _find_max(image, score)
+        indices.append(index)
+        pixels.append(pixel)
+        v = reduce(pixel[np.newaxis, :])
+        if vecs is None:
+            vecs = orthogonalize(v)
+        else:
+            vecs = orthogonalize(np.vstack([vecs, v]), start=i)
+    return (indices, np.array(pixels))
+
+
+def _principal_subspace(image, num):
+    '''Returns mean and `num` leading eigenvectors of the image covariance.'''
+    from .algorithms import calc_stats
+    stats = calc_stats(image)
+    (evals, evecs) = np.linalg.eigh(stats.cov)
+    return (stats, evals[::-1][:num], evecs[:, ::-1][:, :num])
+
+
+def atgp(image, k):
+    '''Finds endmembers with the Automatic Target Generation Process.
+
+    Arguments:
+
+        `image` (ndarray or :class:`spectral.Image`):
+
+            The `MxNxB` image from which endmembers are extracted.
+
+        `k` (int):
+
+            Number of endmembers to find.
+
+    Returns:
+
+        A 2-tuple (`spectra`, `coords`) of the `kxB` endmember spectra and
+        the `kx2` array of their (row, column) image coordinates.
+
+    The first endmember is the pixel with greatest norm. Each subsequent
+    endmember is the pixel with greatest norm after projection onto the
+    orthogonal complement of the previous endmembers. One pass is made over
+    the image data for each endmember.
+
+    References:
+
+    Ren, H. and Chang, C.-I., "Automatic spectral target recognition in
+    hyperspectral imagery," IEEE Transactions on Aerospace and Electronic
+    Systems, vol. 39, no. 4, pp. 1232-1249, 2003.
+    '''
+    _check_num_endmembers(k, image.shape[2])
+    (indices, pixels) = _atgp(image, k)
+    return (pixels, _coords(image, indices))
+
+
+def vca(image, k, snr=None, random_state=None):
+    '''Finds endmembers with Vertex Component Analysis.
+
+    Arguments:
+
+        `image` (ndarray or :class:`spectral.Image`):
+
+            The `MxNxB` image from which endmembers are extracted.
+
+        `k` (int):
+
+            Number of endmembers to find.
+
+    Keyword Arguments:
+
+        `snr` (float):
+
+            Signal-to-noise ratio (in dB) of the image. If not given, it is
+            estimated from the image statistics.
+
+        `random_state` (int or :class:`numpy.random.RandomState`):
+
+            Seed or random number generator used to draw the random
+            directions. If not given, the global numpy random number
+            generator is used.
+
+    Returns:
+
+        A 2-tuple (`spectra`, `coords`) of the `kxB` endmember spectra and
+        the `kx2` array of their (row, column) image coordinates.
+
+    Data are projected onto a `k`-dimensional subspace (estimated from the
+    image statistics) and each endmember is the pixel with the most extreme
+    projection onto a random direction orthogonal to the previous
+    endmembers. One pass is made over the image data to compute statistics
+    and one pass for each endmember.
+
+    References:
+
+    Nascimento, J.M.P. and Bioucas-Dias, J.M., "Vertex component analysis: a
+    fast algorithm to unmix hyperspectral data," IEEE Transactions on
+    Geoscience and Remote Sensing, vol. 43, no. 4, pp. 898-910, 2005.
+    '''
+    from .algorithms import _random_generator
+    B = image.shape[2]
+    _check_num_endmembers(k, B)
+    rand = _random_generator(random_state).rand
+
+    (stats, evals, evecs) = _principal_subspace(image, k)
+    n = stats.nsamples
+    mean = stats.mean
+    # Mean power of the data & of its projection onto the signal subspace
+    power = np.trace(stats.cov) * (n - 1) / n + mean.dot(mean)
+    if snr is None:
+        power_p = np.sum(evals) * (n - 1) / n + mean.dot(mean)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            snr = 10 * np.log10((power_p - (k / B) * power) /
+                                (power - power_p))
+    snr_threshold = 15 + 10 * np.log10(k)
+
+    if snr > snr_threshold:
+        # Projective projection onto the leading eigenvectors of the
+        # correlation matrix
+        corr = stats.cov * (n - 1) / n + np.outer(mean, mean)
+        U = np.linalg.eigh(corr)[1][:, ::-1][:, :k]
+        u = mean.dot(U)
+        def project(X):
+            Y = X.dot(U)
+            return Y / Y.dot(u)[:, np.newaxis]
+    else:
+        U = evecs[:, :k - 1]
+        def reduce(X):
+            return (X - mean).dot(U)
+        def norms(X):
+            Y = reduce(X)
+            return np.einsum('ij,ij->i', Y, Y)
+        pixel = _find_max(image, norms)[1]
+        c = np.sqrt(norms(pixel[np.newaxis, :])[0])
+        def project(X):
+            Y = reduce(X)
+            return np.hstack([Y, np.full((len(Y), 1), c)])
+
+    A = np.zeros((k, k))
+    A[-1, 0] = 1
+    (indices, pixels) = ([], [])
+    for i in range(k):
+        w = rand(k)
+        f = w - A.dot(np.linalg.pinv(A).dot(w))
+        f /= np.sqrt(f.dot(f))
+        (index, pixel) = _find_max(image, lambda X: np.abs(project(X).dot(f)))
+        indices.append(index)
+        pixels.append(pixel)
+        A[:, i] = project(pixel[np.newaxis, :])[0]
+    return (np.array(pixels), _coords(image, indices))
+
+
+def nfindr(image, k, init=None, max_iter=10):
+    '''Finds endmembers with the N-FINDR algorithm.
+
+    Arguments:
+
+        `image` (ndarray or :class:`spectral.Image`):
+
+            The `MxNxB` image from which endmembers are extracted.
+
+        `k` (int):
+
+            Number of endmembers to find.
+
+    Keyword Arguments:
+
+        `init` (sequence of 2-tuples):
+
+            (row, column) coordinates of `k` initial endmembers. If not
+            given, endmembers found by ATGP (applied to the reduced pixels,
+            augmented with a constant 1) are used.
+
+        `max_iter` (int, default 10):
+
+            Maximum number of passes over the image data.
+
+    Returns:
+
+        A 2-tuple (`spectra`, `coords`) of the `kxB` endmember spectra and
+        the `kx2` array of their (row, column) image coordinates.
+
+    N-FINDR finds the `k` pixels that span the simplex of greatest volume.
+    If the image does not have `k - 1` bands, pixels are projected onto
+    the first `k - 1` principal components of the image. Endmembers are
+    replaced whenever a pixel would increase the simplex volume. Volume
+    ratios for all pixels of a block and all endmember positions are
+    computed with a single matrix product (by Cramer's rule, the ratio for
+    replacing endmember `j` by pixel `x` is the `j`'th element of
+    `[1, x]` times the inverse of the endmember matrix), so no
+    determinants are computed. Iteration stops when a pass over the image
+    replaces no endmembers.
+
+    References:
+
+    Winter, M.E., "N-FINDR: an algorithm for fast autonomous spectral
+    end-member determination in hyperspectral data," Proc. SPIE 3753,
+    Imaging Spectrometry V, 1999.
+    '''
+    from .algorithms import _read_pixels
+    (M, N, B) = image.shape
+    _check_num_endmembers(k, B + 1)
+
+    if B == k - 1:
+        reduce = lambda X: X
+    else:
+        (stats, evals, evecs) = _principal_subspace(image, k - 1)
+        U = evecs
+        mean = stats.mean
+        reduce = lambda X: (X - mean).dot(U)
+
+    def augment(X):
+        return np.hstack([np.ones((len(X), 1)), reduce(X)])
+
+    if init is None:
+        # ATGP on the augmented (k-dimensional) pixels yields k linearly
+        # independent vectors, i.e., k affinely independent pixels.
+        (indices, pixels) = _atgp(image, k, augment)
+    else:
+        coords = np.asarray(init, dtype=int).reshape((-1, 2))
+        if len(coords) != k:
+            raise ValueError('`init` must contain %d coordinates.' % k)
+        indices = list(np.ravel_multi_index(coords.T, (M, N)))
+        pixels = np.asarray(_read_pixels(image, coords[:, 0], coords[:, 1]),
+                            dtype=np.float64).reshape((k, B))
+    pixels = list(pixels)
+
+    E = augment(np.array(pixels))
+    if np.linalg.matrix_rank(E) < k:
+        raise ValueError('Initial endmembers do not span a simplex.')
+    Einv = np.linalg.inv(E)
+    tol = 1.e-9
+
+    for i in range(max_iter):
+        replaced = False
+        for (start, X) in _iter_pixel_blocks(image):
+            Xa = augment(X)
+            while True:
+                ratios = np.abs(Xa.dot(Einv))
+                (p, j) = np.unravel_index(np.argmax(ratios), ratios.shape)
+                if not ratios[p, j] > 1 + tol:
+                    break
+                E[j] = Xa[p]
+                Einv = np.linalg.inv(E)
+                indices[j] = start + p
+                pixels[j] = X[p].copy()
+                replaced = True
+        if not replaced:
+            break
+    return (np.array(pixels), _coords(image, indices))
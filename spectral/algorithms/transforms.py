@@ -59,6 +59,9 @@ class LinearTransform:
         `dtype` (numpy dtype):
 
             The numpy dtype for the output ndarray data.
+
+    Internally, the offsets are folded into a single bias term, so the
+    transform is evaluated as :math:`Y = AX + (A b_{pre} + b_{post})`.
     '''
     def __init__(self, A, **kwargs):
         '''Arguments:
@@ -79,7 +82,9 @@ class LinearTransform:
 
             `dtype` (numpy dtype):
 
-                Explicit type for transformed data.
+                Explicit type for transformed data. If this is a single
+                precision type (e.g., `numpy.float32`), the transform is also
+                computed in single precision.
         '''
 
         self._pre = kwargs.get('pre', None)
@@ -97,7 +102,36 @@ class LinearTransform:
             (self.dim_out, self.dim_in) = self._A.shape
         self.dtype = kwargs.get('dtype', self._A.dtype)
 
-    def __call__(self, X):
+        bias = None
+        if self._pre is not None:
+            pre = np.asarray(self._pre, dtype=np.result_type(self._A, float))
+            if self._A.ndim == 0:
+                bias = self._A * pre
+            else:
+                bias = self._A.dot(np.ones(self.dim_in) * pre)
+        if self._post is not None:
+            bias = self._post if bias is None else bias + self._post
+        self._bias = None if bias is None else np.asarray(bias)
+        self._compute_cache = {}
+
+    def _compute_args(self):
+        '''Returns the compute dtype and the matrix & bias in that dtype.'''
+        dtype = np.dtype(self.dtype)
+        if dtype.kind in 'fc':
+            dtype = np.result_type(dtype, np.float32)
+        else:
+            dtype = np.result_type(self._A, np.float64)
+        if dtype not in self._compute_cache:
+            A = np.asarray(self._A, dtype=dtype)
+            if self._A.ndim > 0:
+                A = np.ascontiguousarray(A.T)
+            bias = self._bias
+            if bias is not None:
+                bias = np.asarray(bias, dtype=dtype)
+            self._compute_cache[dtype] = (A, bias)
+        return (dtype,) + self._compute_cache[dtype]
+
+    def __call__(self, X, out=None, chunk_size=None):
         '''Applies the linear transformation to the given data.
 
         Arguments:
@@ -111,10 +145,26 @@ class LinearTransform:
                 `LinearTransform` object to the `transform` method will be
                 returned.
 
+        Keyword Arguments:
+
+            `out` (:class:`~numpy.ndarray`, default None):
+
+                An optional (M,N,J) or (R,J) array into which the result is
+                written. If given, `out` is returned.
+
+            `chunk_size` (int, default None):
+
+                Number of vectors transformed at a time. Only arrays of this
+                many vectors are created for type conversion and the matrix
+                product. If not specified, chunks of about
+                `spectral.settings.stream_block_bytes` are used.
+
         Returns an (M,N,J) or (R,J) array, depending on shape of `X`, where J
         is the length of the first dimension of the array `A` passed to
-        __init__.
+        __init__. If `out` is not given, the result for an (M,N,K) array is
+        squeezed (e.g., an (M,N) array is returned when J is 1).
         '''
+        import spectral
         if not isinstance(X, np.ndarray):
             if hasattr(X, 'transform') and isinstance(X.transform, collections.Callable):
                 return X.transform(self)
@@ -122,21 +172,48 @@ class LinearTransform:
                 raise TypeError('Unable to apply transform to object.')
 
         shape = X.shape
-        if len(shape) == 3:
-            X = X.reshape((-1, shape[-1]))
-            if self._pre is not None:
-                X = X + self._pre
-            Y = np.dot(self._A, X.T).T
-            if self._post is not None:
-                Y += self._post
-            return Y.reshape((shape[:2] + (-1,))).squeeze().astype(self.dtype)
+        X = X.reshape((-1, shape[-1]))
+        (N, K) = X.shape
+        J = K if self.dim_out is None else self.dim_out
+        out_shape = shape[:-1] + (J,)
+        if out is None:
+            Y = np.empty((N, J), dtype=self.dtype)
         else:
-            if self._pre is not None:
-                X = X + self._pre
-            Y = np.dot(self._A, X.T).T
-            if self._post is not None:
-                Y += self._post
-            return Y.astype(self.dtype)
+            if out.shape != out_shape:
+                raise ValueError('`out` has shape %s but the transformed data '
+                                 'have shape %s.' % (out.shape, out_shape))
+            Y = out.reshape((N, J))
+            if N * J > 0 and not np.may_share_memory(Y, out):
+                raise ValueError('`out` must be reshapable to (%d, %d) '
+                                 'without copying.' % (N, J))
+
+        (dtype, A, bias) = self._compute_args()
+        if chunk_size is None:
+            itemsize = np.dtype(dtype).itemsize
+            chunk_size = spectral.settings.stream_block_bytes \
+              // (max(J, K) * itemsize)
+        chunk_size = max(1, int(chunk_size))
+        # Results are computed directly in `Y` when it has the compute type.
+        in_place = Y.dtype == dtype and Y.flags.c_contiguous
+        for start in range(0, N, chunk_size):
+            rows = slice(start, start + chunk_size)
+            x = np.asarray(X[rows], dtype=dtype)
+            y = Y[rows] if in_place else None
+            if A.ndim == 0:
+                y = np.multiply(x, A, out=y)
+            else:
+                y = np.dot(x, A, out=y)
+            if bias is not None:
+                y += bias
+            if not in_place:
+                Y[rows] = y
+
+        if out is not None:
+            return out
+        Y = Y.reshape(out_shape)
+        if len(shape) == 3:
+            Y = Y.squeeze()
+        return Y
 
     def chain(self, transform):
         '''Chains together two linear transforms.
@@ -157,7 +234,7 @@ class LinearTransform:
 
         .. math::
 
-            F_3(X) = F_2(F_1(X))
+            F_3(X) = F_1(F_2(X))
         '''
 
         if isinstance(transform, np.ndarray):
@@ -167,27 +244,12 @@ class LinearTransform:
             raise Exception('Input/Output dimensions of chained transforms'
                             'do not match.')
 
-        # Internally, the new transform is computed as:
-        # Y = f2._A.dot(f1._A).(X + f1._pre) + f2._A.(f1._post + f2._pre) + f2._post
-        # However, any of the _pre/_post members could be `None` so that needs
-        # to be checked.
-
-        if transform._pre is not None:
-            pre = np.array(transform._pre)
-        else:
-            pre = None
-        post = None
-        if transform._post is not None:
-            post = np.array(transform._post)
-            if self._pre is not None:
-                post += self._pre
-        elif self._pre is not None:
-            post = np.array(self._pre)
-        if post is not None:
-            post = self._A.dot(post)
-        if self._post:
-            post += self._post
-        if post is not None:
-            post = np.array(post)
+        # The new transform is computed as:
+        # Y = f2._A.dot(f1._A).X + f2._A.dot(f1._bias) + f2._bias
+        bias = None
+        if transform._bias is not None:
+            bias = np.dot(self._A, transform._bias)
+        if self._bias is not None:
+            bias = self._bias if bias is None else bias + self._bias
         A = np.dot(self._A, transform._A)
-        return LinearTransform(A, pre=pre, post=post)
+        return LinearTransform(A, post=bias, dtype=self.dtype)
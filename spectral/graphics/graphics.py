@@ -540,6 +540,17 @@ def get_rgb(source, bands=None, **kwargs):
             keyword is provided, then elements of `source` are assumed to be
             color index values that specify RGB values in `colors`.
 
+        `use_stats` (bool, default False):
+
+            If True and `source` is read from a file with a band statistics
+            sidecar (see :mod:`spectral.io.stats` and
+            `spectral.settings.stats_sidecar`), `stretch` limits are
+            interpolated from the sidecar's band histograms instead of being
+            computed from the exact values of the displayed bands. This
+            avoids sorting the band data but the limits are only accurate to
+            the histogram bin width. The sidecar is not used if `ignore` is
+            given.
+
     Examples:
 
     Select color limits corresponding to 2% tails in the data histogram:
@@ -696,35 +707,39 @@ def get_rgb_meta(source, bands=None, **kwargs):
             raise ValueError("`stretch` keyword must be numeric or a " \
                              "sequence with shape (2,) or (3, 2).")
         nondata = kwargs.get('ignore', None)
+        band_stats = None
+        if kwargs.get('use_stats', False) and nondata is None and \
+          isinstance(source, Image):
+            # Use band histograms from a statistics sidecar, if available.
+            from spectral.io.stats import get_stats
+            band_stats = get_stats(source)
+
+        def cdf_points(i, cdf_vals):
+            if band_stats is not None:
+                return band_stats.cdf_points(meta['bands'][i], cdf_vals)
+            return get_histogram_cdf_points(rgb[:, :, i], cdf_vals,
+                                            ignore=nondata)
+
         if stretch.ndim == 1:
             if monochrome:
-                s = get_histogram_cdf_points(rgb[:, :, 0], stretch,
-                                             ignore=nondata)
+                s = cdf_points(0, stretch)
                 rgb_lims = [s, s, s]
             elif stretch_all:
                 # Stretch each color component independently
-                rgb_lims = [get_histogram_cdf_points(rgb[:, :, i], stretch,
-                                                     ignore=nondata) \
-                            for i in range(3)]
+                rgb_lims = [cdf_points(i, stretch) for i in range(3)]
             else:
                 # Use a common lower/upper limit for each band by taking
                 # the lowest lower limit and greatest upper limit.
-                lims = np.array([get_histogram_cdf_points(rgb[:,:,i], stretch,
-                                                          ignore=nondata) \
-                        for i in range(3)])
+                lims = np.array([cdf_points(i, stretch) for i in range(3)])
                 minmax = np.array([lims[:,0].min(), lims[:,1].max()])
                 rgb_lims = minmax[np.newaxis, :].repeat(3, axis=0)
         else:
             if monochrome:
                 # Not sure why anyone would want separate RGB stretches for
                 # a gray-scale image but we'll let them.
-                rgb_lims = [get_histogram_cdf_points(rgb[:,:,0], stretch[i],
-                                                     ignore=nondata) \
-                            for i in range(3)]
+                rgb_lims = [cdf_points(0, stretch[i]) for i in range(3)]
             elif stretch_all:
-                rgb_lims = [get_histogram_cdf_points(rgb[:,:,i], stretch[i],
-                                                     ignore=nondata) \
-                            for i in range(3)]
+                rgb_lims = [cdf_points(i, stretch[i]) for i in range(3)]
             else:
                 msg = 'Can not use common stretch if different stretch ' \
                   ' parameters are given for each color channel.'
@@ -744,7 +759,7 @@ def get_rgb_meta(source, bands=None, **kwargs):
 
 # For checking if valid keywords were supplied
 _get_rgb_kwargs = ('stretch', 'stretch_all', 'bounds', 'colors', 'color_scale',
-                   'auto_scale', 'ignore', 'mask', 'bg')
+                   'auto_scale', 'ignore', 'mask', 'bg', 'use_stats')
 
 def running_ipython():
     '''Returns True if ipython is running.'''
@@ -31,6 +31,9 @@
 from __future__ import division, print_function, unicode_literals
 
 from .spyfile import SpyFile
+from .virtual import VirtualMosaic, BandStack
 from ..io import aviris
 from ..io import erdas
 from ..io import envi
+from ..io import tiled
+from ..io import pcimage
@@ -35,10 +35,7 @@ Tools for handling files that are band interleaved by line (BIL).
 from __future__ import division, print_function, unicode_literals
 
 import numpy as np
-from .spyfile import SpyFile, MemmapFile
-from spectral.utilities.python23 import typecode
-
-byte_typecode = typecode('b')
+from .spyfile import SpyFile, MemmapFile, _write_output
 
 
 class BilFile(SpyFile, MemmapFile):
@@ -70,7 +67,7 @@ class BilFile(SpyFile, MemmapFile):
         else:
             return None
 
-    def read_band(self, band, use_memmap=True):
+    def read_band(self, band, use_memmap=True, out=None, dtype=None):
         '''Reads a single band from the image.
 
         Arguments:
@@ -84,6 +81,16 @@ class BilFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxN` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -96,30 +103,24 @@ class BilFile(SpyFile, MemmapFile):
         import numpy
 
         if self._memmap is not None and use_memmap is True:
-            data = np.array(self._memmap[:, band, :])
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
+            return _write_output(self._memmap[:, band, :], out, dtype,
+                                 self.scale_factor)
 
-        vals = array(byte_typecode)
+        vals = bytearray()
         offset = self.offset + band * self.sample_size * self.ncols
 
-        f = self.fid
-
         # Pixel format is BIL, so read an entire line at  time.
         for i in range(self.nrows):
-            f.seek(offset + i * self.sample_size * self.nbands *
-                   self.ncols, 0)
-            vals.fromfile(f, self.ncols * self.sample_size)
+            vals += self._read_bytes(offset + i * self.sample_size
+                                     * self.nbands * self.ncols,
+                                     self.ncols * self.sample_size)
 
-        arr = numpy.fromstring(vals.tostring(), dtype=self.dtype)
+        arr = numpy.frombuffer(vals, dtype=self.dtype)
         arr = arr.reshape((self.nrows, self.ncols))
 
-        if self.scale_factor != 1:
-            return arr / float(self.scale_factor)
-        return arr
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
 
-    def read_bands(self, bands, use_memmap=True):
+    def read_bands(self, bands, use_memmap=True, out=None, dtype=None):
         '''Reads multiple bands from the image.
 
         Arguments:
@@ -133,6 +134,16 @@ class BilFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -147,34 +158,29 @@ class BilFile(SpyFile, MemmapFile):
         import numpy
 
         if self._memmap is not None and use_memmap is True:
-            data = np.array(self._memmap[:, bands, :]).transpose((0, 2, 1))
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
-
-        f = self.fid
+            data = self._memmap[:, bands, :].transpose((0, 2, 1))
+            return _write_output(data, out, dtype, self.scale_factor,
+                                 copy=False)
 
         arr = numpy.empty((self.nrows, self.ncols, len(bands)), self.dtype)
 
         for i in range(self.nrows):
-            vals = array(byte_typecode)
+            vals = bytearray()
             row_offset = self.offset + i * (self.sample_size * self.nbands *
                                             self.ncols)
 
             # Pixel format is BIL, so read an entire line at a time.
             for j in range(len(bands)):
-                f.seek(row_offset + bands[j] * self.sample_size * self.ncols, 0)
-                vals.fromfile(f, self.ncols * self.sample_size)
+                vals += self._read_bytes(row_offset + bands[j]
+                                         * self.sample_size * self.ncols,
+                                         self.ncols * self.sample_size)
 
-            frame = numpy.fromstring(vals.tostring(), dtype=self.dtype)
+            frame = numpy.frombuffer(vals, dtype=self.dtype)
             arr[i, :, :] = frame.reshape((len(bands), self.ncols)).transpose()
 
-        if self.scale_factor != 1:
-            return arr / float(self.scale_factor)
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
 
-        return arr
-
-    def read_pixel(self, row, col, use_memmap=True):
+    def read_pixel(self, row, col, use_memmap=True, out=None, dtype=None):
         '''Reads the pixel at position (row,col) from the file.
 
         Arguments:
@@ -188,6 +194,16 @@ class BilFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional length-`B` array into which the data are written.
+                If given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -200,32 +216,89 @@ class BilFile(SpyFile, MemmapFile):
         import numpy
 
         if self._memmap is not None and use_memmap is True:
-            data = np.array(self._memmap[row, :, col])
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
+            return _write_output(self._memmap[row, :, col], out, dtype,
+                                 self.scale_factor)
 
-        vals = array(byte_typecode)
+        vals = bytearray()
         delta = self.sample_size * (self.nbands - 1)
         offset = self.offset + row * self.nbands * self.ncols \
             * self.sample_size + col * self.sample_size
-        f = self.fid
 
         ncols = self.ncols
         sample_size = self.sample_size
 
         for i in range(self.nbands):
-            f.seek(offset + i * sample_size * ncols, 0)
-            vals.fromfile(f, sample_size)
+            vals += self._read_bytes(offset + i * sample_size * ncols,
+                                     sample_size)
+
+        pixel = numpy.frombuffer(vals, dtype=self.dtype)
+
+        return _write_output(pixel, out, dtype, self.scale_factor, copy=False)
+
+    def read_pixels(self, rows, cols, bands=None, use_memmap=True, out=None,
+                    dtype=None):
+        '''Reads the pixels at multiple (row, col) positions from the file.
+
+        Arguments:
+
+            `rows`, `cols` (sequences of ints):
+
+                Row & column indices of the `N` pixels to read. Both must have
+                the same length.
+
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `use_memmap` (bool, default True):
 
-        pixel = numpy.fromstring(vals.tostring(), dtype=self.dtype)
+                Specifies whether the file's memmap interface should be used
+                to read the data. Setting this arg to True only has an effect
+                if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `NxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
+                
+        Returns:
 
-        if self.scale_factor != 1:
-            return pixel / float(self.scale_factor)
-        return pixel
+           :class:`numpy.ndarray`
+
+                An `NxL` array, where `L` = len(`bands`) (or # of image bands
+                if `bands` == None).
+
+        All pixels are read with a single fancy-indexing operation on the
+        memmap or, without a memmap, with reads of the file sorted by offset.
+        '''
+        (rows, cols, bands) = self._pixel_indices(rows, cols, bands)
+
+        if self._memmap is not None and use_memmap is True:
+            if bands is None:
+                data = self._memmap[rows, :, cols]
+            else:
+                data = self._memmap[rows[:, np.newaxis], bands,
+                                    cols[:, np.newaxis]]
+            return _write_output(data, out, dtype, self.scale_factor,
+                                 copy=False)
+
+        if bands is None:
+            bands = np.arange(self.nbands)
+        # Pixel format is BIL
+        offsets = self.offset + self.sample_size * \
+            ((rows[:, np.newaxis] * self.nbands + bands[np.newaxis, :])
+             * self.ncols + cols[:, np.newaxis])
+        return _write_output(self._read_samples(offsets), out, dtype,
+                             self.scale_factor, copy=False)
 
     def read_subregion(self, row_bounds, col_bounds, bands=None,
-                       use_memmap=True):
+                       use_memmap=True, out=None, dtype=None):
         '''
         Reads a contiguous rectangular sub-region from the image.
 
@@ -249,6 +322,16 @@ class BilFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -262,25 +345,19 @@ class BilFile(SpyFile, MemmapFile):
 
         if self._memmap is not None and use_memmap is True:
             if bands is None:
-                data = np.array(self._memmap[row_bounds[0]: row_bounds[1], :,
-                                             col_bounds[0]: col_bounds[1]])
+                data = self._memmap[row_bounds[0]: row_bounds[1], :,
+                                    col_bounds[0]: col_bounds[1]]
             else:
-                data = np.array(
-                    self._memmap[row_bounds[0]: row_bounds[1], bands,
-                                 col_bounds[0]: col_bounds[1]])
+                data = self._memmap[row_bounds[0]: row_bounds[1], bands,
+                                    col_bounds[0]: col_bounds[1]]
             data = data.transpose((0, 2, 1))
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
+            return _write_output(data, out, dtype, self.scale_factor)
 
         nSubRows = row_bounds[1] - row_bounds[0]  # Rows in sub-image
         nSubCols = col_bounds[1] - col_bounds[0]  # Cols in sub-image
         d_row = self.sample_size * self.ncols * self.nbands
         colStartPos = col_bounds[0] * self.sample_size
 
-        f = self.fid
-        f.seek(self.offset, 0)
-
         # Increments between bands
         if bands is None:
             # Read all bands.
@@ -295,21 +372,19 @@ class BilFile(SpyFile, MemmapFile):
 
         # Pixel format is BIL
         for i in range(row_bounds[0], row_bounds[1]):
-            f.seek(offset + i * d_row + colStartPos, 0)
-            rowPos = f.tell()
-            vals = array(byte_typecode)
+            rowPos = offset + i * d_row + colStartPos
+            vals = bytearray()
             for j in bands:
-                f.seek(rowPos + j * ncols * sampleSize, 0)
-                vals.fromfile(f, nSubCols * sampleSize)
-            subArray = numpy.fromstring(vals.tostring(), dtype=self.dtype)
+                vals += self._read_bytes(rowPos + j * ncols * sampleSize,
+                                         nSubCols * sampleSize)
+            subArray = numpy.frombuffer(vals, dtype=self.dtype)
             subArray = subArray.reshape((nSubBands, nSubCols))
             arr[i - row_bounds[0], :, :] = numpy.transpose(subArray)
 
-        if self.scale_factor != 1:
-            return arr / float(self.scale_factor)
-        return arr
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
 
-    def read_subimage(self, rows, cols, bands=None, use_memmap=False):
+    def read_subimage(self, rows, cols, bands=None, use_memmap=False,
+                      out=None, dtype=None):
         '''
         Reads arbitrary rows, columns, and bands from the image.
 
@@ -333,6 +408,16 @@ class BilFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -347,14 +432,12 @@ class BilFile(SpyFile, MemmapFile):
 
         if self._memmap is not None and use_memmap is True:
             if bands is None:
-                data = np.array(self._memmap.take(rows, 0).take(cols, 2))
+                data = self._memmap.take(rows, 0).take(cols, 2)
             else:
-                data = np.array(
-                    self._memmap.take(rows, 0).take(bands, 1).take(cols, 2))
+                data = self._memmap.take(rows, 0).take(bands, 1).take(cols, 2)
             data = data.transpose((0, 2, 1))
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
+            return _write_output(data, out, dtype, self.scale_factor,
+                                 copy=False)
 
         nSubRows = len(rows)                        # Rows in sub-image
         nSubCols = len(cols)                        # Cols in sub-image
@@ -362,9 +445,6 @@ class BilFile(SpyFile, MemmapFile):
         d_band = d_col * self.ncols
         d_row = d_band * self.nbands
 
-        f = self.fid
-        f.seek(self.offset, 0)
-
         # Increments between bands
         if bands is None:
             # Read all bands.
@@ -374,24 +454,20 @@ class BilFile(SpyFile, MemmapFile):
         arr = numpy.empty((nSubRows, nSubCols, nSubBands), self.dtype)
 
         offset = self.offset
-        vals = array(byte_typecode)
+        vals = bytearray()
         sample_size = self.sample_size
 
         # Pixel format is BIL
         for i in rows:
             for j in cols:
                 for k in bands:
-                    f.seek(offset +
-                           i * d_row +
-                           j * d_col +
-                           k * d_band, 0)
-                    vals.fromfile(f, sample_size)
-        subArray = numpy.fromstring(vals.tostring(), dtype=self.dtype)
+                    vals += self._read_bytes(offset + i * d_row + j * d_col
+                                             + k * d_band, sample_size)
+        subArray = numpy.frombuffer(vals, dtype=self.dtype)
         subArray = subArray.reshape((nSubRows, nSubCols, nSubBands))
 
-        if self.scale_factor != 1:
-            return subArray / float(self.scale_factor)
-        return subArray
+        return _write_output(subArray, out, dtype, self.scale_factor,
+                             copy=False)
 
     def read_datum(self, i, j, k, use_memmap=True):
         '''Reads the band `k` value for pixel at row `i` and column `j`.
@@ -411,8 +487,6 @@ class BilFile(SpyFile, MemmapFile):
         Using this function is not an efficient way to iterate over bands or
         pixels. For such cases, use readBands or readPixel instead.
         '''
-        import array
-
         if self._memmap is not None and use_memmap is True:
             datum = self._memmap[i, k, j]
             if self.scale_factor != 1:
@@ -423,8 +497,7 @@ class BilFile(SpyFile, MemmapFile):
         d_band = d_col * self.ncols
         d_row = d_band * self.nbands
 
-        self.fid.seek(self.offset + i * d_row + j * d_col + k * d_band, 0)
-        vals = array.array(byte_typecode)
-        vals.fromfile(self.fid, self.sample_size)
-        arr = np.fromstring(vals.tostring(), dtype=self.dtype)
+        vals = self._read_bytes(self.offset + i * d_row + j * d_col
+                                + k * d_band, self.sample_size)
+        arr = np.frombuffer(vals, dtype=self.dtype)
         return arr.tolist()[0] / float(self.scale_factor)
@@ -35,10 +35,7 @@ Tools for handling files that are band interleaved by pixel (BIP).
 from __future__ import division, print_function, unicode_literals
 
 import numpy as np
-from .spyfile import SpyFile, MemmapFile
-from spectral.utilities.python23 import typecode
-
-byte_typecode = typecode('b')
+from .spyfile import SpyFile, MemmapFile, _write_output
 
 class BipFile(SpyFile, MemmapFile):
     '''
@@ -67,7 +64,35 @@ class BipFile(SpyFile, MemmapFile):
         else:
             return None
 
-    def read_band(self, band, use_memmap=True):
+    def _read_rows(self, first, last, col_bounds=None):
+        '''Returns an array of all bands of a range of rows & columns.
+
+        If `col_bounds` spans all columns, the rows are contiguous in the
+        file and are read with a single call. Otherwise, one read is made
+        per row.
+        '''
+        pixel_bytes = self.sample_size * self.nbands
+        row_bytes = pixel_bytes * self.ncols
+        (c0, c1) = col_bounds if col_bounds is not None else (0, self.ncols)
+        if (c0, c1) == (0, self.ncols):
+            data = self._read_bytes(self.offset + first * row_bytes,
+                                    (last - first) * row_bytes)
+        else:
+            data = bytearray()
+            for i in range(first, last):
+                data += self._read_bytes(self.offset + i * row_bytes
+                                         + c0 * pixel_bytes,
+                                         (c1 - c0) * pixel_bytes)
+        arr = np.frombuffer(data, dtype=self.dtype)
+        return arr.reshape(last - first, c1 - c0, self.nbands)
+
+    def _row_chunks(self, first, last):
+        '''Yields (start, stop) bounds of blocks of rows to read at once.'''
+        rows_per_chunk = self._rows_per_block()
+        for start in range(first, last, rows_per_chunk):
+            yield (start, min(start + rows_per_chunk, last))
+
+    def read_band(self, band, use_memmap=True, out=None, dtype=None):
         '''Reads a single band from the image.
 
         Arguments:
@@ -81,6 +106,16 @@ class BipFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxN` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -89,37 +124,19 @@ class BipFile(SpyFile, MemmapFile):
                 An `MxN` array of values for the specified band.
         '''
 
-        from array import array
-
         if self._memmap is not None and use_memmap is True:
-            data = np.array(self._memmap[:, :, band])
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
-
-        vals = array(byte_typecode)
-        delta = self.sample_size * (self.nbands - 1)
-        nVals = self.nrows * self.ncols
-        sample_size = self.sample_size
+            return _write_output(self._memmap[:, :, band], out, dtype,
+                                 self.scale_factor)
 
-        f = self.fid
+        # Pixel format is BIP, so complete rows are read and the band is
+        # extracted from them.
+        arr = np.empty((self.nrows, self.ncols), dtype=self.dtype)
+        for (start, stop) in self._row_chunks(0, self.nrows):
+            arr[start: stop] = self._read_rows(start, stop)[:, :, band]
 
-        f.seek(self.offset + self.sample_size * band, 0)
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
 
-        # Pixel format is BIP
-        for i in range(nVals - 1):
-            vals.fromfile(f, sample_size)
-            f.seek(delta, 1)
-        vals.fromfile(f, sample_size)
-
-        arr = np.fromstring(vals.tostring(), dtype=self.dtype)
-        arr = arr.reshape(self.nrows, self.ncols)
-
-        if self.scale_factor != 1:
-            return arr / float(self.scale_factor)
-        return arr
-
-    def read_bands(self, bands, use_memmap=True):
+    def read_bands(self, bands, use_memmap=True, out=None, dtype=None):
         '''Reads multiple bands from the image.
 
         Arguments:
@@ -133,6 +150,16 @@ class BipFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -142,41 +169,20 @@ class BipFile(SpyFile, MemmapFile):
                 are the number of rows & columns in the image and `L` equals
                 len(`bands`).
         '''
-        from array import array
-
         if self._memmap is not None and use_memmap is True:
-            data = np.array(self._memmap[:, :, bands])
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
-
-        vals = array(byte_typecode)
-        offset = self.offset
-        delta = self.sample_size * self.nbands
-        nVals = self.nrows * self.ncols
-        sample_size = self.sample_size
+            return _write_output(self._memmap[:, :, bands], out, dtype,
+                                 self.scale_factor, copy=False)
 
-        # Increments between bands
-        delta_b = list(bands[:])
-        for i in range(len(delta_b)):
-            delta_b[i] *= self.sample_size
+        # Pixel format is BIP, so complete rows are read and the bands are
+        # extracted from them.
+        bands = list(bands)
+        arr = np.empty((self.nrows, self.ncols, len(bands)), dtype=self.dtype)
+        for (start, stop) in self._row_chunks(0, self.nrows):
+            arr[start: stop] = self._read_rows(start, stop)[:, :, bands]
 
-        f = self.fid
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
 
-        # Pixel format is BIP
-        for i in range(nVals):
-            pixelOffset = offset + i * delta
-            for j in range(len(bands)):
-                f.seek(pixelOffset + delta_b[j], 0)        # Next band
-                vals.fromfile(f, sample_size)
-        arr = np.fromstring(vals.tostring(), dtype=self.dtype)
-        arr = arr.reshape(self.nrows, self.ncols, len(bands))
-
-        if self.scale_factor != 1:
-            return arr / float(self.scale_factor)
-        return arr
-
-    def read_pixel(self, row, col, use_memmap=True):
+    def read_pixel(self, row, col, use_memmap=True, out=None, dtype=None):
         '''Reads the pixel at position (row,col) from the file.
 
         Arguments:
@@ -190,6 +196,16 @@ class BipFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional length-`B` array into which the data are written.
+                If given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -197,30 +213,85 @@ class BipFile(SpyFile, MemmapFile):
 
                 A length-`B` array, where `B` is the number of image bands.
         '''
-        from array import array
-
         if self._memmap is not None and use_memmap is True:
-            data = np.array(self._memmap[row, col, :])
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
+            return _write_output(self._memmap[row, col, :], out, dtype,
+                                 self.scale_factor)
 
-        vals = array(byte_typecode)
+        vals = bytearray()
 
-        f = self.fid
-        f.seek(self.offset + self.sample_size
-               * self.nbands * (row * self.ncols + col), 0)
         # Pixel format is BIP so read entire pixel.
-        vals.fromfile(f, self.nbands * self.sample_size)
+        vals += self._read_bytes(self.offset + self.sample_size
+                                 * self.nbands * (row * self.ncols + col),
+                                 self.nbands * self.sample_size)
+
+        pixel = np.frombuffer(vals, dtype=self.dtype)
+
+        return _write_output(pixel, out, dtype, self.scale_factor, copy=False)
 
-        pixel = np.fromstring(vals.tostring(), dtype=self.dtype)
+    def read_pixels(self, rows, cols, bands=None, use_memmap=True, out=None,
+                    dtype=None):
+        '''Reads the pixels at multiple (row, col) positions from the file.
+
+        Arguments:
 
-        if self.scale_factor != 1:
-            return pixel / float(self.scale_factor)
-        return pixel
+            `rows`, `cols` (sequences of ints):
+
+                Row & column indices of the `N` pixels to read. Both must have
+                the same length.
+
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `use_memmap` (bool, default True):
+
+                Specifies whether the file's memmap interface should be used
+                to read the data. Setting this arg to True only has an effect
+                if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `NxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
+                
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `NxL` array, where `L` = len(`bands`) (or # of image bands
+                if `bands` == None).
+
+        All pixels are read with a single fancy-indexing operation on the
+        memmap or, without a memmap, with reads of the file sorted by offset.
+        '''
+        (rows, cols, bands) = self._pixel_indices(rows, cols, bands)
+
+        if self._memmap is not None and use_memmap is True:
+            if bands is None:
+                data = self._memmap[rows, cols]
+            else:
+                data = self._memmap[rows[:, np.newaxis], cols[:, np.newaxis],
+                                    bands]
+            return _write_output(data, out, dtype, self.scale_factor,
+                                 copy=False)
+
+        if bands is None:
+            bands = np.arange(self.nbands)
+        # Pixel format is BIP
+        offsets = self.offset + self.sample_size * \
+            ((rows[:, np.newaxis] * self.ncols + cols[:, np.newaxis])
+             * self.nbands + bands[np.newaxis, :])
+        return _write_output(self._read_samples(offsets), out, dtype,
+                             self.scale_factor, copy=False)
 
     def read_subregion(self, row_bounds, col_bounds, bands=None,
-                       use_memmap=True):
+                       use_memmap=True, out=None, dtype=None):
         '''
         Reads a contiguous rectangular sub-region from the image.
 
@@ -244,6 +315,16 @@ class BipFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -251,67 +332,36 @@ class BipFile(SpyFile, MemmapFile):
 
                 An `MxNxL` array.
         '''
-        import array
-
         if self._memmap is not None and use_memmap is True:
             if bands is None:
-                data = np.array(self._memmap[row_bounds[0]: row_bounds[1],
-                                             col_bounds[0]: col_bounds[1], :])
+                data = self._memmap[row_bounds[0]: row_bounds[1],
+                                    col_bounds[0]: col_bounds[1], :]
             else:
-                data = np.array(self._memmap[row_bounds[0]: row_bounds[1],
-                                             col_bounds[0]: col_bounds[1],
-                                             bands])
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
+                data = self._memmap[row_bounds[0]: row_bounds[1],
+                                    col_bounds[0]: col_bounds[1],
+                                    bands]
+            return _write_output(data, out, dtype, self.scale_factor)
 
-        offset = self.offset
-        nbands = self.nbands
         nSubRows = row_bounds[1] - row_bounds[0]  # Rows in sub-image
         nSubCols = col_bounds[1] - col_bounds[0]  # Cols in sub-image
-        d_row = self.sample_size * self.ncols * self.nbands
-        colStartPos = col_bounds[0] * self.sample_size * self.nbands
-        vals = array.array(byte_typecode)
-        nVals = self.nrows * self.ncols
-        sample_size = self.sample_size
-
-        # Increments between bands
-        if bands is not None:
-            allBands = 0
-            nSubBands = len(bands)
-            delta_b = bands[:]
-            for i in range(len(delta_b)):
-                delta_b[i] *= self.sample_size
-        else:
-            allBands = 1
-            nSubBands = self.nbands
-
-        f = self.fid
 
-        # Pixel format is BIP
-        for i in range(row_bounds[0], row_bounds[1]):
-            f.seek(offset + i * d_row + colStartPos, 0)
-            rowPos = f.tell()
-
-            if allBands:
-                # This is the simple one
-                vals.fromfile(f, nSubCols * nbands * sample_size)
-            else:
-                # Need to pull out specific bands for each column.
-                for j in range(nSubCols):
-                    f.seek(rowPos + j * self.sample_size * self.nbands, 0)
-                    pixelPos = f.tell()
-                    for k in range(len(bands)):
-                        f.seek(pixelPos + delta_b[k], 0)    # Next band
-                        vals.fromfile(f, sample_size)
-        arr = np.fromstring(vals.tostring(), dtype=self.dtype)
-        arr = arr.reshape(nSubRows, nSubCols, nSubBands)
-
-        if self.scale_factor != 1:
-            return arr / float(self.scale_factor)
-        return arr
-
-    def read_subimage(self, rows, cols, bands=None, use_memmap=False):
+        # Pixel format is BIP, so all bands of the sub-image rows are read and
+        # any requested bands are extracted from them.
+        if bands is None:
+            # The data read are immutable, so they are copied.
+            return _write_output(self._read_rows(row_bounds[0], row_bounds[1],
+                                                 col_bounds),
+                                 out, dtype, self.scale_factor)
+        bands = list(bands)
+        arr = np.empty((nSubRows, nSubCols, len(bands)), dtype=self.dtype)
+        for (start, stop) in self._row_chunks(row_bounds[0], row_bounds[1]):
+            arr[start - row_bounds[0]: stop - row_bounds[0]] = \
+                self._read_rows(start, stop, col_bounds)[:, :, bands]
+
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
+
+    def read_subimage(self, rows, cols, bands=None, use_memmap=False,
+                      out=None, dtype=None):
         '''
         Reads arbitrary rows, columns, and bands from the image.
 
@@ -335,6 +385,16 @@ class BipFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -343,60 +403,26 @@ class BipFile(SpyFile, MemmapFile):
                 An `MxNxL` array, where `M` = len(`rows`), `N` = len(`cols`),
                 and `L` = len(bands) (or # of image bands if `bands` == None).
         '''
-        import array
-
         if self._memmap is not None and use_memmap is True:
             if bands is None:
-                data = np.array(self._memmap.take(rows, 0).take(cols, 1))
+                data = self._memmap.take(rows, 0).take(cols, 1)
             else:
-                data = np.array(
-                    self._memmap.take(rows, 0).take(cols, 1).take(bands, 2))
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
-
-        offset = self.offset
-        nbands = self.nbands
-        nSubRows = len(rows)                        # Rows in sub-image
-        nSubCols = len(cols)                        # Cols in sub-image
-        d_band = self.sample_size
-        d_col = d_band * self.nbands
-        d_row = d_col * self.ncols
-        vals = array.array(byte_typecode)
-        nVals = self.nrows * self.ncols
-        sample_size = self.sample_size
-
-        # Increments between bands
-        if bands is not None:
-            allBands = 0
-            nSubBands = len(bands)
-        else:
-            allBands = 1
-            bands = list(range(self.nbands))
-            nSubBands = self.nbands
-
-        f = self.fid
-
-        # Pixel format is BIP
-        for i in rows:
-            for j in cols:
-                if allBands:
-                    f.seek(offset + i * d_row + j * d_col, 0)
-                    vals.fromfile(f, nSubBands * sample_size)
-                else:
-                    for k in bands:
-                        f.seek(offset +
-                               i * d_row +
-                               j * d_col +
-                               k * d_band, 0)
-                        vals.fromfile(f, sample_size)
-
-        arr = np.fromstring(vals.tostring(), dtype=self.dtype)
-        arr = arr.reshape(nSubRows, nSubCols, nSubBands)
-
-        if self.scale_factor != 1:
-            return arr / float(self.scale_factor)
-        return arr
+                data = self._memmap.take(rows, 0).take(cols, 1).take(bands, 2)
+            return _write_output(data, out, dtype, self.scale_factor,
+                                 copy=False)
+
+        # Pixel format is BIP, so the span of requested columns is read for
+        # each row (with one call) and the columns and bands are extracted.
+        cols = np.asarray(cols, dtype=int)
+        nbands = self.nbands if bands is None else len(bands)
+        arr = np.empty((len(rows), len(cols), nbands), dtype=self.dtype)
+        if len(cols) > 0:
+            (c0, c1) = (cols.min(), cols.max() + 1)
+            for (n, i) in enumerate(rows):
+                data = self._read_rows(i, i + 1, (c0, c1))[0, cols - c0]
+                arr[n] = data if bands is None else data[:, bands]
+
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
 
     def read_datum(self, i, j, k, use_memmap=True):
         '''Reads the band `k` value for pixel at row `i` and column `j`.
@@ -416,19 +442,14 @@ class BipFile(SpyFile, MemmapFile):
         Using this function is not an efficient way to iterate over bands or
         pixels. For such cases, use readBands or readPixel instead.
         '''
-        from array import array
-
         if self._memmap is not None and use_memmap is True:
             datum = self._memmap[i, j, k]
             if self.scale_factor != 1:
                 datum /= float(self.scale_factor)
             return datum
 
-        vals = array(byte_typecode)
-        f = self.fid
-        f.seek(self.offset + self.sample_size
-               * (self.nbands * (i * self.ncols + j) + k), 0)
-        # Pixel format is BIP so read entire pixel.
-        vals.fromfile(f, self.sample_size)
-        arr = np.fromstring(vals.tostring(), dtype=self.dtype)
+        vals = self._read_bytes(self.offset + self.sample_size
+                                * (self.nbands * (i * self.ncols + j) + k),
+                                self.sample_size)
+        arr = np.frombuffer(vals, dtype=self.dtype)
         return arr.tolist()[0] / float(self.scale_factor)
@@ -35,10 +35,7 @@ Tools for handling files that are band sequential (BSQ).
 from __future__ import division, print_function, unicode_literals
 
 import numpy as np
-from .spyfile import SpyFile, MemmapFile
-from spectral.utilities.python23 import typecode
-
-byte_typecode = typecode('b')
+from .spyfile import SpyFile, MemmapFile, _write_output
 
 
 class BsqFile(SpyFile, MemmapFile):
@@ -70,7 +67,7 @@ class BsqFile(SpyFile, MemmapFile):
             return None
 
 
-    def read_band(self, band, use_memmap=True):
+    def read_band(self, band, use_memmap=True, out=None, dtype=None):
         '''Reads a single band from the image.
 
         Arguments:
@@ -84,6 +81,16 @@ class BsqFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxN` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -91,32 +98,24 @@ class BsqFile(SpyFile, MemmapFile):
 
                 An `MxN` array of values for the specified band.
         '''
-        from array import array
-
         if self._memmap is not None and use_memmap is True:
-            data = np.array(self._memmap[band, :, :])
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
+            return _write_output(self._memmap[band, :, :], out, dtype,
+                                 self.scale_factor)
 
-        vals = array(byte_typecode)
+        vals = bytearray()
         offset = self.offset + band * self.sample_size * \
             self.nrows * self.ncols
 
-        f = self.fid
-
         # Pixel format is BSQ, so read the whole band at once.
-        f.seek(offset, 0)
-        vals.fromfile(f, self.nrows * self.ncols * self.sample_size)
+        vals += self._read_bytes(offset,
+                                 self.nrows * self.ncols * self.sample_size)
 
-        arr = np.fromstring(vals.tostring(), dtype=self.dtype)
+        arr = np.frombuffer(vals, dtype=self.dtype)
         arr = arr.reshape(self.nrows, self.ncols)
 
-        if self.scale_factor != 1:
-            return arr / float(self.scale_factor)
-        return arr
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
 
-    def read_bands(self, bands, use_memmap=False):
+    def read_bands(self, bands, use_memmap=False, out=None, dtype=None):
         '''Reads multiple bands from the image.
 
         Arguments:
@@ -130,6 +129,16 @@ class BsqFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -140,36 +149,29 @@ class BsqFile(SpyFile, MemmapFile):
                 len(`bands`).
         '''
 
-        from array import array
-
         if self._memmap is not None and use_memmap is True:
-            data = np.array(self._memmap[bands, :, :]).transpose((1, 2, 0))
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
-
-        f = self.fid
+            data = self._memmap[bands, :, :].transpose((1, 2, 0))
+            return _write_output(data, out, dtype, self.scale_factor,
+                                 copy=False)
 
         arr = np.zeros((self.nrows, self.ncols, len(bands)), dtype=self.dtype)
 
         for j in range(len(bands)):
 
-            vals = array(byte_typecode)
+            vals = bytearray()
             offset = self.offset + (bands[j]) * self.sample_size \
                 * self.nrows * self.ncols
 
             # Pixel format is BSQ, so read an entire band at time.
-            f.seek(offset, 0)
-            vals.fromfile(f, self.nrows * self.ncols * self.sample_size)
+            vals += self._read_bytes(offset, self.nrows * self.ncols
+                                     * self.sample_size)
 
-            band = np.fromstring(vals.tostring(), dtype=self.dtype)
+            band = np.frombuffer(vals, dtype=self.dtype)
             arr[:, :, j] = band.reshape(self.nrows, self.ncols)
 
-        if self.scale_factor != 1:
-            return arr / float(self.scale_factor)
-        return arr
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
 
-    def read_pixel(self, row, col, use_memmap=True):
+    def read_pixel(self, row, col, use_memmap=True, out=None, dtype=None):
         '''Reads the pixel at position (row,col) from the file.
 
         Arguments:
@@ -183,6 +185,16 @@ class BsqFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional length-`B` array into which the data are written.
+                If given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -191,20 +203,15 @@ class BsqFile(SpyFile, MemmapFile):
                 A length-`B` array, where `B` is the number of image bands.
         '''
 
-        from array import array
-
         if self._memmap is not None and use_memmap is True:
-            data = np.array(self._memmap[:, row, col])
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
+            return _write_output(self._memmap[:, row, col], out, dtype,
+                                 self.scale_factor)
 
-        vals = array(byte_typecode)
+        vals = bytearray()
         delta = self.sample_size * (self.nbands - 1)
         offset = self.offset + row * self.nbands * self.ncols \
             * self.sample_size + col * self.sample_size
 
-        f = self.fid
         nPixels = self.nrows * self.ncols
 
         ncols = self.ncols
@@ -213,20 +220,78 @@ class BsqFile(SpyFile, MemmapFile):
         rowSize = sampleSize * self.ncols
 
         for i in range(self.nbands):
-            f.seek(self.offset
-                   + i * bandSize
-                   + row * rowSize
-                   + col * sampleSize, 0)
-            vals.fromfile(f, sampleSize)
+            vals += self._read_bytes(self.offset
+                                     + i * bandSize
+                                     + row * rowSize
+                                     + col * sampleSize, sampleSize)
+
+        pixel = np.frombuffer(vals, dtype=self.dtype)
+
+        return _write_output(pixel, out, dtype, self.scale_factor, copy=False)
+
+    def read_pixels(self, rows, cols, bands=None, use_memmap=True, out=None,
+                    dtype=None):
+        '''Reads the pixels at multiple (row, col) positions from the file.
+
+        Arguments:
+
+            `rows`, `cols` (sequences of ints):
 
-        pixel = np.fromstring(vals.tostring(), dtype=self.dtype)
+                Row & column indices of the `N` pixels to read. Both must have
+                the same length.
 
-        if self.scale_factor != 1:
-            return pixel / float(self.scale_factor)
-        return pixel
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `use_memmap` (bool, default True):
+
+                Specifies whether the file's memmap interface should be used
+                to read the data. Setting this arg to True only has an effect
+                if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `NxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
+                
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `NxL` array, where `L` = len(`bands`) (or # of image bands
+                if `bands` == None).
+
+        All pixels are read with a single fancy-indexing operation on the
+        memmap or, without a memmap, with reads of the file sorted by offset.
+        '''
+        (rows, cols, bands) = self._pixel_indices(rows, cols, bands)
+
+        if self._memmap is not None and use_memmap is True:
+            if bands is None:
+                data = self._memmap[:, rows, cols].T
+            else:
+                data = self._memmap[bands[:, np.newaxis], rows, cols].T
+            return _write_output(data, out, dtype, self.scale_factor,
+                                 copy=False)
+
+        if bands is None:
+            bands = np.arange(self.nbands)
+        # Pixel format is BSQ
+        offsets = self.offset + self.sample_size * \
+            ((bands[np.newaxis, :] * self.nrows + rows[:, np.newaxis])
+             * self.ncols + cols[:, np.newaxis])
+        return _write_output(self._read_samples(offsets), out, dtype,
+                             self.scale_factor, copy=False)
 
     def read_subregion(self, row_bounds, col_bounds, bands=None,
-                       use_memmap=True):
+                       use_memmap=True, out=None, dtype=None):
         '''
         Reads a contiguous rectangular sub-region from the image.
 
@@ -250,6 +315,16 @@ class BsqFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -258,27 +333,19 @@ class BsqFile(SpyFile, MemmapFile):
                 An `MxNxL` array.
         '''
 
-        from array import array
-
         if self._memmap is not None and use_memmap is True:
             if bands is None:
-                data = np.array(self._memmap[:, row_bounds[0]: row_bounds[1],
-                                             col_bounds[0]: col_bounds[1]])
+                data = self._memmap[:, row_bounds[0]: row_bounds[1],
+                                    col_bounds[0]: col_bounds[1]]
             else:
-                data = np.array(
-                    self._memmap[bands, row_bounds[0]: row_bounds[1],
-                                 col_bounds[0]: col_bounds[1]])
+                data = self._memmap[bands, row_bounds[0]: row_bounds[1],
+                                    col_bounds[0]: col_bounds[1]]
             data = data.transpose((1, 2, 0))
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
+            return _write_output(data, out, dtype, self.scale_factor)
 
         nSubRows = row_bounds[1] - row_bounds[0]  # Rows in sub-image
         nSubCols = col_bounds[1] - col_bounds[0]  # Cols in sub-image
 
-        f = self.fid
-        f.seek(self.offset, 0)
-
         # Increments between bands
         if bands is None:
             # Read all bands.
@@ -296,25 +363,24 @@ class BsqFile(SpyFile, MemmapFile):
         nSubBands = len(bands)
 
         # Pixel format is BSQ
-        for i in bands:
-            vals = array(byte_typecode)
+        for (k, i) in enumerate(bands):
+            vals = bytearray()
             bandOffset = i * bandSize
             for j in range(row_bounds[0], row_bounds[1]):
-                f.seek(self.offset
-                       + bandOffset
-                       + j * rowSize
-                       + colStartOffset, 0)
-                vals.fromfile(f, nSubCols * sampleSize)
-            subArray = np.fromstring(vals.tostring(),
+                vals += self._read_bytes(self.offset
+                                         + bandOffset
+                                         + j * rowSize
+                                         + colStartOffset,
+                                         nSubCols * sampleSize)
+            subArray = np.frombuffer(vals,
                                      dtype=self.dtype).reshape((nSubRows,
                                                                 nSubCols))
-            arr[:, :, i] = subArray
+            arr[:, :, k] = subArray
 
-        if self.scale_factor != 1:
-            return arr / float(self.scale_factor)
-        return arr
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
 
-    def read_subimage(self, rows, cols, bands=None, use_memmap=False):
+    def read_subimage(self, rows, cols, bands=None, use_memmap=False,
+                      out=None, dtype=None):
         '''
         Reads arbitrary rows, columns, and bands from the image.
 
@@ -338,6 +404,16 @@ class BsqFile(SpyFile, MemmapFile):
                 Specifies whether the file's memmap interface should be used
                 to read the data. Setting this arg to True only has an effect
                 if a memmap is being used (i.e., if `img.using_memmap` is True).
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
                 
         Returns:
 
@@ -347,18 +423,14 @@ class BsqFile(SpyFile, MemmapFile):
                 and `L` = len(bands) (or # of image bands if `bands` == None).
         '''
 
-        from array import array
-
         if self._memmap is not None and use_memmap is True:
             if bands is None:
-                data = np.array(self._memmap[:].take(rows, 1).take(cols, 2))
+                data = self._memmap[:].take(rows, 1).take(cols, 2)
             else:
-                data = np.array(
-                    self._memmap.take(bands, 0).take(rows, 1).take(cols, 2))
+                data = self._memmap.take(bands, 0).take(rows, 1).take(cols, 2)
             data = data.transpose((1, 2, 0))
-            if self.scale_factor != 1:
-                data = data / float(self.scale_factor)
-            return data
+            return _write_output(data, out, dtype, self.scale_factor,
+                                 copy=False)
 
         nSubRows = len(rows)                        # Rows in sub-image
         nSubCols = len(cols)                        # Cols in sub-image
@@ -366,9 +438,6 @@ class BsqFile(SpyFile, MemmapFile):
         d_band = d_col * self.ncols
         d_row = d_band * self.nbands
 
-        f = self.fid
-        f.seek(self.offset, 0)
-
         # Increments between bands
         if bands is None:
             # Read all bands.
@@ -378,7 +447,7 @@ class BsqFile(SpyFile, MemmapFile):
         arr = np.zeros((nSubRows, nSubCols, nSubBands), dtype=self.dtype)
 
         offset = self.offset
-        vals = array(byte_typecode)
+        vals = bytearray()
 
         nrows = self.nrows
         ncols = self.ncols
@@ -393,17 +462,14 @@ class BsqFile(SpyFile, MemmapFile):
             for j in rows:
                 rowOffset = j * rowSize
                 for k in cols:
-                    f.seek(bandOffset
-                           + rowOffset
-                           + k * sampleSize, 0)
-                    vals.fromfile(f, sampleSize)
-        arr = np.fromstring(vals.tostring(), dtype=self.dtype)
+                    vals += self._read_bytes(bandOffset
+                                             + rowOffset
+                                             + k * sampleSize, sampleSize)
+        arr = np.frombuffer(vals, dtype=self.dtype)
         arr = arr.reshape(nSubBands, nSubRows, nSubCols)
         arr = np.transpose(arr, (1, 2, 0))
 
-        if self.scale_factor != 1:
-            return arr / float(self.scale_factor)
-        return arr
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
 
     def read_datum(self, i, j, k, use_memmap=True):
         '''Reads the band `k` value for pixel at row `i` and column `j`.
@@ -423,8 +489,6 @@ class BsqFile(SpyFile, MemmapFile):
         Using this function is not an efficient way to iterate over bands or
         pixels. For such cases, use readBands or readPixel instead.
         '''
-        import array
-
         if self._memmap is not None and use_memmap is True:
             datum = self._memmap[k, i, j]
             if self.scale_factor != 1:
@@ -435,11 +499,9 @@ class BsqFile(SpyFile, MemmapFile):
         ncols = self.ncols
         sampleSize = self.sample_size
 
-        self.fid.seek(self.offset
-                      + (k * nrows * ncols
-                         + i * ncols
-                         + j) * sampleSize, 0)
-        vals = array.array(byte_typecode)
-        vals.fromfile(self.fid, sampleSize)
-        arr = np.fromstring(vals.tostring(), dtype=self.dtype)
+        vals = self._read_bytes(self.offset
+                                + (k * nrows * ncols
+                                   + i * ncols
+                                   + j) * sampleSize, sampleSize)
+        arr = np.frombuffer(vals, dtype=self.dtype)
         return arr.tolist()[0] / float(self.scale_factor)
@@ -0,0 +1,469 @@
+#########################################################################
+#
+#   catalog.py - This file is part of the Spectral Python (SPy) package.
+#
+#   Copyright (C) 2001-2010 Thomas Boggs
+#
+#   Spectral Python is free software; you can redistribute it and/
+#   or modify it under the terms of the GNU General Public License
+#   as published by the Free Software Foundation; either version 2
+#   of the License, or (at your option) any later version.
+#
+#   Spectral Python is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this software; if not, write to
+#
+#               Free Software Foundation, Inc.
+#               59 Temple Place, Suite 330
+#               Boston, MA 02111-1307
+#               USA
+#
+#########################################################################
+#
+# Send comments to:
+# Thomas Boggs, tboggs@users.sourceforge.net
+#
+
+'''
+A catalog of ENVI images indexed in a local SQLite database.
+
+Opening an ENVI image by name requires locating the header (possibly searching
+the directories in `SPECTRAL_DATA`), parsing it, and probing for the
+associated data file. When working with large collections of images, that cost
+can be paid once by indexing the headers into a catalog:
+
+    >>> from spectral.io.catalog import Catalog
+    >>> cat = Catalog('images.sqlite')
+    >>> cat.scan('/data/campaign')
+    {'added': 1250, 'updated': 0, 'removed': 0, 'unchanged': 0}
+    >>> [e.id for e in cat.query(interleave='bil', nbands=220)]
+    [3, 17, 18]
+    >>> img = cat.open(17)
+
+Subsequent scans only parse headers that are new or whose modification time or
+size has changed. Catalog IDs and queries can also be passed directly to
+:func:`spectral.open_image` and :func:`spectral.io.envi.open` after setting
+`spectral.settings.catalog_file` to the catalog's file name.
+'''
+
+from __future__ import division, print_function, unicode_literals
+
+import json
+import os
+import sqlite3
+import threading
+
+from spectral import SpyException
+
+_SCHEMA_VERSION = 1
+
+_COLUMNS = ('id', 'header_path', 'mtime', 'size', 'data_path', 'nrows',
+            'ncols', 'nbands', 'dtype', 'interleave', 'byte_order', 'offset',
+            'file_type', 'min_wavelength', 'max_wavelength', 'wavelengths',
+            'header')
+
+_CREATE_TABLE = '''
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    header_path TEXT UNIQUE NOT NULL,
+    data_path TEXT NOT NULL,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    nrows INTEGER NOT NULL,
+    ncols INTEGER NOT NULL,
+    nbands INTEGER NOT NULL,
+    dtype TEXT NOT NULL,
+    interleave TEXT NOT NULL,
+    byte_order INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    file_type TEXT,
+    min_wavelength REAL,
+    max_wavelength REAL,
+    wavelengths TEXT,
+    header TEXT NOT NULL
+)
+'''
+
+
+class CatalogError(SpyException):
+    '''Raised when a catalog lookup fails or is ambiguous.'''
+    pass
+
+
+class CatalogEntry(object):
+    '''An indexed ENVI image in a :class:`Catalog`.
+
+    Attributes are named after the catalog columns (`id`, `header_path`,
+    `data_path`, `nrows`, `ncols`, `nbands`, `dtype`, `interleave`,
+    `byte_order`, `offset`, `file_type`, `min_wavelength`, `max_wavelength`)
+    plus `wavelengths` (a list of floats or None) and `header` (the parsed
+    header dict).
+    '''
+    def __init__(self, row):
+        for (name, value) in zip(_COLUMNS, row):
+            setattr(self, name, value)
+        if self.wavelengths is not None:
+            self.wavelengths = json.loads(self.wavelengths)
+        self.header = json.loads(self.header)
+
+    @property
+    def shape(self):
+        return (self.nrows, self.ncols, self.nbands)
+
+    def open(self, image=None):
+        '''Opens the image without searching for or parsing any files.
+
+        Arguments:
+
+            `image` (str):
+
+                Optional name of the data file to use instead of the indexed
+                data file.
+
+        Returns:
+
+            :class:`spectral.SpyFile` or
+            :class:`spectral.io.envi.SpectralLibrary` object.
+        '''
+        from .envi import _open_from_header
+        from .spyfile import find_file_path
+        header = dict((k, list(v) if isinstance(v, list) else v)
+                      for (k, v) in self.header.items())
+        if image:
+            image = find_file_path(image)
+        else:
+            image = self.data_path
+        return _open_from_header(header, image)
+
+    def __repr__(self):
+        return 'CatalogEntry(id=%d, header_path=%r, shape=%r)' % \
+            (self.id, self.header_path, self.shape)
+
+
+class Catalog(object):
+    '''An index of ENVI image headers stored in a SQLite database.
+
+    For each header, the catalog records the image shape, data type,
+    interleave, byte order, header offset, wavelengths, the path of the
+    associated data file, and the full parsed header, so images can be opened
+    without file discovery or header parsing.
+    '''
+    def __init__(self, filename=None):
+        '''Opens (creating if necessary) a catalog database.
+
+        Arguments:
+
+            `filename` (str):
+
+                Name of the SQLite database file. If not given,
+                `spectral.settings.catalog_file` is used. Use ":memory:" for
+                a catalog that is not saved to disk.
+        '''
+        if filename is None:
+            from spectral import settings
+            filename = settings.catalog_file
+            if filename is None:
+                raise CatalogError('No catalog file name was given and '
+                                   'spectral.settings.catalog_file is not '
+                                   'set.')
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        with self._db:
+            self._db.execute(_CREATE_TABLE)
+            self._db.execute('CREATE INDEX IF NOT EXISTS images_shape ON '
+                             'images (nrows, ncols, nbands)')
+            self._db.execute('PRAGMA user_version = %d' % _SCHEMA_VERSION)
+
+    def close(self):
+        '''Closes the database connection.'''
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._execute('SELECT COUNT(*) FROM images')[0][0]
+
+    def __iter__(self):
+        return iter(self.query())
+
+    def __getitem__(self, id):
+        rows = self._execute(self._select() + ' WHERE id = ?', (int(id),))
+        if len(rows) == 0:
+            raise KeyError(id)
+        return CatalogEntry(rows[0])
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _select():
+        return 'SELECT %s FROM images' % ', '.join(_COLUMNS)
+
+    def scan(self, paths, recursive=True, ext='.hdr'):
+        '''Indexes the ENVI headers found in one or more directories.
+
+        Arguments:
+
+            `paths` (str or list of str):
+
+                Directories to search for header files (individual header
+                file names are also accepted).
+
+            `recursive` (bool, default True):
+
+                Whether subdirectories are searched.
+
+            `ext` (str, default ".hdr"):
+
+                Extension (case insensitive) of the header files to index.
+
+        Returns:
+
+            A dict with the numbers of headers "added", "updated",
+            "removed", and "unchanged".
+
+        Headers already in the catalog are only parsed again if their
+        modification time or size has changed (or their data file has
+        disappeared). Catalog entries for headers that no longer exist where
+        the scan searched (i.e., with extension `ext` in the scanned
+        directories, and their subdirectories if `recursive` is True) are
+        removed. Files that are not ENVI headers,
+        or whose data file can not be found, are skipped.
+        '''
+        from spectral.utilities.python23 import is_string
+        if is_string(paths):
+            paths = [paths]
+        counts = dict(added=0, updated=0, removed=0, unchanged=0)
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isdir(path):
+                headers = self._find_headers(path, recursive, ext.lower())
+                self._scan_headers(headers, counts)
+                self._remove_missing(path, headers, recursive, ext.lower(),
+                                     counts)
+            else:
+                self._scan_headers([path], counts)
+        return counts
+
+    @staticmethod
+    def _find_headers(path, recursive, ext):
+        headers = []
+        for (dirpath, dirnames, filenames) in os.walk(path):
+            headers += [os.path.join(dirpath, f) for f in filenames
+                        if f.lower().endswith(ext)]
+            if not recursive:
+                break
+        return headers
+
+    def _scan_headers(self, headers, counts):
+        indexed = dict((row[0], row[1:]) for row in self._execute(
+            'SELECT header_path, id, mtime, size, data_path FROM images'))
+        for header_path in headers:
+            st = os.stat(header_path)
+            mtime = getattr(st, 'st_mtime_ns', None)
+            if mtime is None:
+                mtime = int(st.st_mtime * 1e9)
+            current = indexed.get(header_path)
+            if current is not None and current[1:3] == (mtime, st.st_size) \
+              and os.path.isfile(current[3]):
+                counts['unchanged'] += 1
+                continue
+            record = self._read_record(header_path)
+            if record is None:
+                if current is not None:
+                    self._delete(current[0])
+                    counts['removed'] += 1
+                continue
+            values = (header_path, mtime, st.st_size) + record
+            with self._lock, self._db:
+                if current is None:
+                    self._db.execute(
+                        'INSERT INTO images (%s) VALUES (%s)' %
+                        (', '.join(_COLUMNS[1:]),
+                         ', '.join('?' * len(values))), values)
+                    counts['added'] += 1
+                else:
+                    self._db.execute(
+                        'UPDATE images SET %s WHERE id = ?' %
+                        ', '.join(c + ' = ?' for c in _COLUMNS[1:]),
+                        values + (current[0],))
+                    counts['updated'] += 1
+
+    @staticmethod
+    def _read_record(header_path):
+        '''Returns the catalog columns following `size` for a header file.'''
+        import numpy as np
+        from .envi import _parse_envi_header, check_compatibility, \
+            gen_params, _find_image_file, EnviException
+        try:
+            (h, _) = _parse_envi_header(header_path)
+            check_compatibility(h)
+            p = gen_params(h)
+        except (EnviException, KeyError, ValueError, TypeError):
+            return None
+        data_path = _find_image_file(header_path, h['interleave'])
+        if data_path is None:
+            return None
+        wavelengths = None
+        try:
+            wavelengths = [float(w) for w in h.get('wavelength', [])] or None
+        except ValueError:
+            pass
+        if wavelengths:
+            (wmin, wmax) = (min(wavelengths), max(wavelengths))
+            wavelengths = json.dumps(wavelengths)
+        else:
+            (wmin, wmax) = (None, None)
+        return (data_path, p.nrows, p.ncols, p.nbands,
+                np.dtype(p.dtype).str, h['interleave'].lower(), p.byte_order,
+                p.offset, h.get('file type'), wmin, wmax, wavelengths,
+                json.dumps(h))
+
+    def _remove_missing(self, path, headers, recursive, ext, counts):
+        '''Removes entries for headers the scan of `path` should have found.
+
+        Only headers with extension `ext` in `path` (or, if `recursive` is
+        True, in its subdirectories) are considered, so entries indexed by
+        other scans are kept.
+        '''
+        found = set(headers)
+        prefix = os.path.join(path, '')
+        for (id, header_path) in self._execute(
+                'SELECT id, header_path FROM images'):
+            if header_path in found or \
+              not header_path.lower().endswith(ext):
+                continue
+            if recursive:
+                searched = header_path.startswith(prefix)
+            else:
+                searched = os.path.dirname(header_path) == path
+            if searched:
+                self._delete(id)
+                counts['removed'] += 1
+
+    def _delete(self, id):
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM images WHERE id = ?', (id,))
+
+    def query(self, where=None, params=(), **filters):
+        '''Returns the catalog entries matching a query.
+
+        Arguments:
+
+            `where` (str):
+
+                Optional SQL expression on the catalog columns, with "?"
+                placeholders for `params` (e.g.,
+                "min_wavelength <= ? AND max_wavelength >= ?").
+
+            `params` (sequence):
+
+                Values for the placeholders in `where`.
+
+        Keyword Arguments:
+
+            Equality tests on catalog columns (e.g., `interleave='bil'`,
+            `nbands=220`). Column names are those of :class:`CatalogEntry`,
+            excluding `wavelengths` and `header`.
+
+        Returns:
+
+            A list of :class:`CatalogEntry` objects, ordered by ID.
+        '''
+        clauses = []
+        values = list(params)
+        if where:
+            clauses.append('(%s)' % where)
+        for (name, value) in sorted(filters.items()):
+            if name not in _COLUMNS or name in ('wavelengths', 'header'):
+                raise ValueError('Invalid catalog query column: %s' % name)
+            if name == 'dtype':
+                import numpy as np
+                value = np.dtype(value).str
+            elif name == 'header_path':
+                value = os.path.abspath(value)
+            clauses.append('%s = ?' % name)
+            values.append(value)
+        sql = self._select()
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY id'
+        return [CatalogEntry(row) for row in self._execute(sql, values)]
+
+    def get(self, key):
+        '''Returns the single catalog entry matching `key`.
+
+        Arguments:
+
+            `key` (int, dict, or str):
+
+                A catalog ID, a dict of keyword arguments for :meth:`query`,
+                or the name of an indexed header file.
+
+        Returns:
+
+            :class:`CatalogEntry`
+
+        Raises:
+
+            CatalogError if no entry or more than one entry matches.
+        '''
+        from spectral.utilities.python23 import is_string
+        if isinstance(key, dict):
+            matches = self.query(**key)
+        elif is_string(key):
+            matches = self.query(header_path=key)
+        else:
+            try:
+                matches = [self[key]]
+            except KeyError:
+                matches = []
+        if len(matches) == 0:
+            raise CatalogError('No catalog entry matches %r.' % (key,))
+        elif len(matches) > 1:
+            raise CatalogError('%d catalog entries match %r.'
+                               % (len(matches), key))
+        return matches[0]
+
+    def open(self, key, image=None):
+        '''Opens the image for the catalog entry matching `key`.
+
+        `key` is interpreted as by :meth:`get` and `image` is an optional
+        data file name to use in place of the indexed one.
+        '''
+        return self.get(key).open(image)
+
+
+_default_catalog = None
+_default_catalog_lock = threading.Lock()
+
+def get_catalog():
+    '''Returns the catalog for `spectral.settings.catalog_file`.
+
+    The catalog is opened on first use and reopened if the setting changes
+    (in which case the previously opened catalog is closed).
+    '''
+    global _default_catalog
+    from spectral import settings
+    if settings.catalog_file is None:
+        raise CatalogError('Catalog IDs and queries can only be opened after '
+                           'setting spectral.settings.catalog_file.')
+    with _default_catalog_lock:
+        if _default_catalog is None or \
+          _default_catalog.filename != settings.catalog_file:
+            if _default_catalog is not None:
+                _default_catalog.close()
+                _default_catalog = None
+            _default_catalog = Catalog(settings.catalog_file)
+        return _default_catalog
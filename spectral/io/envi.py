@@ -54,10 +54,19 @@ else:
     import __builtin__ as builtins
 
 import numpy as np
+import threading
+from collections import OrderedDict
 
 # Known ENVI data file extensions. Upper and lower case versions will be
 # recognized, as well as interleaves ('bil', 'bip', 'bsq'), and no extension.
-KNOWN_EXTS = ['img', 'dat', 'sli', 'hyspex', 'raw']
+KNOWN_EXTS = ['img', 'dat', 'sli', 'hyspex', 'raw', 'spt', 'pcs']
+
+# "file type" of ENVI headers for tiled image files (see spectral.io.tiled).
+TILED_FILE_TYPE = 'SPy Tiled Image'
+
+# "file type" of ENVI headers for principal component scores images (see
+# spectral.io.pcimage).
+PC_FILE_TYPE = 'SPy PC Compressed'
 
 dtype_map = [('1', np.uint8),                   # unsigned byte
              ('2', np.int16),                   # 16-bit int
@@ -124,6 +133,11 @@ def get_supported_dtypes():
     '''Returns list of names of image data types supported by ENVI format.'''
     return [np.dtype(t).name for t in list(dtype_to_envi.keys())]
 
+# Parsed headers, keyed by header file path. Each value is a tuple of the
+# form ((mtime, size, support_nonlowercase_params), header_dict, renamed).
+_header_cache = OrderedDict()
+_header_cache_lock = threading.Lock()
+
 def read_envi_header(file):
     '''
     USAGE: hdr = read_envi_header(file)
@@ -131,9 +145,55 @@ def read_envi_header(file):
     Reads an ENVI ".hdr" file header and returns the parameters in a
     dictionary as strings.  Header field names are treated as case
     insensitive and all keys in the dictionary are lowercase.
+
+    Parsed headers are cached (see `spectral.settings.envi_header_cache_size`)
+    so a header is only parsed again if the modification time or size of
+    the file has changed. A new dictionary is returned by each call.
     '''
+    import os
     import warnings
     from spectral import settings
+
+    support_nonlowercase_params = settings.envi_support_nonlowercase_params
+    path = os.path.abspath(file)
+    st = os.stat(path)
+    key = (getattr(st, 'st_mtime_ns', st.st_mtime), st.st_size,
+           support_nonlowercase_params)
+    with _header_cache_lock:
+        cached = _header_cache.get(path)
+        if cached is not None and cached[0] == key:
+            _header_cache.pop(path)
+            _header_cache[path] = cached
+    if cached is None or cached[0] != key:
+        (h, have_nonlowercase_param) = _parse_envi_header(file)
+        cached = (key, h, have_nonlowercase_param)
+        with _header_cache_lock:
+            _header_cache.pop(path, None)
+            if settings.envi_header_cache_size > 0:
+                _header_cache[path] = cached
+            while len(_header_cache) > max(0, settings.envi_header_cache_size):
+                _header_cache.popitem(last=False)
+    (h, have_nonlowercase_param) = cached[1:]
+
+    if have_nonlowercase_param and not support_nonlowercase_params:
+        msg = 'Parameters with non-lowercase names encountered ' \
+              'and converted to lowercase. To retain source file ' \
+              'parameter name capitalization, set ' \
+              'spectral.setttings.envi_support_nonlowercase_params to ' \
+              'True.'
+        warnings.warn(msg)
+        print('Header parameter names converted to lower case.')
+    # Values are strings or lists of strings, so copying lists suffices to
+    # keep the cached header from being modified.
+    return dict((k, list(v) if isinstance(v, list) else v)
+                for (k, v) in h.items())
+
+def _parse_envi_header(file):
+    '''Returns a 2-tuple (header_dict, have_nonlowercase_param) for `file`.
+
+    The file is parsed in a single pass over its lines.
+    '''
+    from spectral import settings
     f = builtins.open(file, 'r')
 
     try:
@@ -157,8 +217,8 @@ def read_envi_header(file):
     have_nonlowercase_param = False
     support_nonlowercase_params = settings.envi_support_nonlowercase_params
     try:
-        while lines:
-            line = lines.pop(0)
+        lines = iter(lines)
+        for line in lines:
             if line.find('=') == -1: continue
             if line[0] == ';': continue
 
@@ -170,31 +230,20 @@ def read_envi_header(file):
                     key = key.lower()
             val = val.strip()
             if val and val[0] == '{':
-                str = val.strip()
-                while str[-1] != '}':
-                    line = lines.pop(0)
+                # Collect lines until the closing brace, then join them once.
+                parts = [val]
+                while parts[-1][-1:] != '}':
+                    line = next(lines)
                     if line[0] == ';': continue
-
-                    str += '\n' + line.strip()
+                    parts.append(line.strip())
+                str = '\n'.join(parts)
                 if key == 'description':
                     dict[key] = str.strip('{}').strip()
                 else:
-                    vals = str[1:-1].split(',')
-                    for j in range(len(vals)):
-                        vals[j] = vals[j].strip()
-                    dict[key] = vals
+                    dict[key] = [v.strip() for v in str[1:-1].split(',')]
             else:
                 dict[key] = val
-
-        if have_nonlowercase_param and not support_nonlowercase_params:
-            msg = 'Parameters with non-lowercase names encountered ' \
-                  'and converted to lowercase. To retain source file ' \
-                  'parameter name capitalization, set ' \
-                  'spectral.setttings.envi_support_nonlowercase_params to ' \
-                  'True.'
-            warnings.warn(msg)
-            print('Header parameter names converted to lower case.')
-        return dict
+        return (dict, have_nonlowercase_param)
     except:
         raise EnviHeaderParsingError()
 
@@ -285,9 +334,14 @@ def open(file, image=None):
 
     Arguments:
 
-        `file` (str):
+        `file` (str, int, dict, or :class:`~spectral.io.catalog.CatalogEntry`):
 
-            Name of the header file for the image.
+            Name of the header file for the image. A catalog entry, an integer
+            catalog ID, or a dict query (see
+            :meth:`spectral.io.catalog.Catalog.query`) can also be given, in
+            which case the image is opened from the indexed header without
+            searching for or parsing any files. IDs and queries are resolved
+            against the catalog given by `spectral.settings.catalog_file`.
 
         `image` (str):
 
@@ -300,7 +354,7 @@ def open(file, image=None):
 
     Raises:
 
-        TypeError, EnviDataFileNotFoundError
+        TypeError, EnviDataFileNotFoundError, CatalogError
 
     If the specified file is not found in the current directory, all
     directories listed in the SPECTRAL_DATA environment variable will be
@@ -311,33 +365,23 @@ def open(file, image=None):
     Capitalized versions of the file extensions are also searched.
     '''
 
-    import os
     from .spyfile import find_file_path
-    import numpy
-    import spectral
+    from .catalog import CatalogEntry, get_catalog
+
+    if isinstance(file, CatalogEntry):
+        return file.open(image)
+    if isinstance(file, (int, dict)) and not isinstance(file, bool):
+        # A catalog ID or a query against the default catalog.
+        return get_catalog().open(file, image)
 
     header_path = find_file_path(file)
     h = read_envi_header(header_path)
     check_compatibility(h)
-    p = gen_params(h)
-
-    inter = h["interleave"]
 
     #  Validate image file name
     if not image:
         #  Try to determine the name of the image file
-        (header_path_title, header_ext) = os.path.splitext(header_path)
-        if header_ext.lower() == '.hdr':
-            exts = [ext.lower() for ext in KNOWN_EXTS] + [inter.lower()]
-            exts = [''] + exts + [ext.upper() for ext in exts]
-            for ext in exts:
-                if len(ext) == 0:
-                    testname = header_path_title
-                else:
-                    testname = header_path_title + '.' + ext
-                if os.path.isfile(testname):
-                    image = testname
-                    break
+        image = _find_image_file(header_path, h["interleave"])
         if not image:
             msg = 'Unable to determine the ENVI data file name for the ' \
               'given header file. You can specify the data file by passing ' \
@@ -346,6 +390,36 @@ def open(file, image=None):
     else:
         image = find_file_path(image)
 
+    return _open_from_header(h, image)
+
+def _find_image_file(header_path, interleave):
+    '''Returns the data file associated with an ENVI header (or None).
+
+    Looks for a file in the header's directory with the same name as the
+    header and one of the `KNOWN_EXTS` extensions (or the interleave name or
+    no extension), in lower or upper case.
+    '''
+    import os
+
+    (header_path_title, header_ext) = os.path.splitext(header_path)
+    if header_ext.lower() != '.hdr':
+        return None
+    exts = [ext.lower() for ext in KNOWN_EXTS] + [interleave.lower()]
+    exts = [''] + exts + [ext.upper() for ext in exts]
+    for ext in exts:
+        if len(ext) == 0:
+            testname = header_path_title
+        else:
+            testname = header_path_title + '.' + ext
+        if os.path.isfile(testname):
+            return testname
+    return None
+
+def _open_from_header(h, image):
+    '''Creates the image object for a parsed header and its data file.'''
+    import numpy
+
+    p = gen_params(h)
     p.filename = image
 
     if h.get('file type') == 'ENVI Spectral Library':
@@ -354,6 +428,14 @@ def open(file, image=None):
         data.shape = (p.nrows, p.ncols)
         return SpectralLibrary(data, h, p)
 
+    if h.get('file type') == TILED_FILE_TYPE:
+        from . import tiled
+        return tiled.open(image, metadata=h)
+
+    if h.get('file type') == PC_FILE_TYPE:
+        from . import pcimage
+        return pcimage._open_from_header(h, image)
+
     #  Create the appropriate object type for the interleave format.
     inter = h["interleave"]
     if inter == 'bil' or inter == 'BIL':
@@ -467,6 +549,16 @@ def save_image(hdr_file, image, **kwargs):
             A dict containing ENVI header parameters (e.g., parameters
             extracted from a source image).
 
+        `compression` (str):
+
+            If given, the image file is written as a tiled image file (see
+            :mod:`spectral.io.tiled`) with tiles compressed by the named
+            codec ("zlib", "bz2", or "lzma"). The header then has file type
+            "SPy Tiled Image" and the default image file extension is ".spt".
+            The `tile_shape`, `level`, and `shuffle` keywords of
+            :func:`spectral.io.tiled.save_image` are also accepted and
+            `interleave` is ignored.
+
     Example::
 
         >>> # Save the first 10 principal components of an image
@@ -483,9 +575,15 @@ def save_image(hdr_file, image, **kwargs):
     being saved are from a principal components transformation).
 
     '''
-    data, metadata = _prepared_data_and_metadata(hdr_file, image, **kwargs)
+    if kwargs.get('compression') is not None:
+        kwargs = dict(kwargs, interleave='bip')
+    read_rows, metadata = _prepared_data_and_metadata(hdr_file, image,
+                                                      **kwargs)
+    if kwargs.get('compression') is not None:
+        _write_tiled_image(hdr_file, read_rows, metadata, **kwargs)
+        return
     metadata['file type'] = "ENVI Standard"
-    _write_image(hdr_file, data, metadata, **kwargs)
+    _write_image(hdr_file, read_rows, metadata, **kwargs)
 
 
 def save_classification(hdr_file, image, **kwargs):
@@ -562,20 +660,24 @@ def save_classification(hdr_file, image, **kwargs):
     '''
     from spectral import spy_colors
     
-    data, metadata = _prepared_data_and_metadata(hdr_file, image, **kwargs)
+    read_rows, metadata = _prepared_data_and_metadata(hdr_file, image,
+                                                      **kwargs)
     metadata['file type'] = "ENVI Classification"
+    dtype = envi_to_dtype[str(metadata['data type'])]
+    max_class = max(np.max(read_rows(start, stop).astype(dtype))
+                    for (start, stop) in _row_blocks(metadata))
 
     class_names = kwargs.get('class_names', metadata.get('class_names', None))
     class_colors = kwargs.get('class_colors', metadata.get('class_colors', None))
     if class_names is None:
         # guess the number of classes and create default class names
-        n_classes = int(np.max(data) + 1)
+        n_classes = int(max_class + 1)
         metadata['classes'] = str(n_classes)
         metadata['class names'] = (['Unclassified'] + 
                                    ['Class ' + str(i) for i in range(1, n_classes)])
         # if keyword is given, override whatever is in the metadata dict
     else:
-        n_classes = int(max(np.max(data) + 1, len(class_names)))
+        n_classes = int(max(max_class + 1, len(class_names)))
         metadata['class names'] = class_names
         metadata['classes'] = str(n_classes)
         
@@ -595,47 +697,59 @@ def save_classification(hdr_file, image, **kwargs):
             colors += list(spy_colors[i % len(spy_colors)])
     metadata['class lookup'] = colors
 
-    _write_image(hdr_file, data, metadata, **kwargs)
+    _write_image(hdr_file, read_rows, metadata, **kwargs)
+
+def _parse_byteorder(byteorder):
+    '''Returns "little" or "big" for a `byteorder` keyword argument value.'''
+    endian = str(byteorder).lower()
+    if endian in ('0', 'little'):
+        return 'little'
+    elif endian in ('1', 'big'):
+        return 'big'
+    else:
+        raise ValueError('Invalid byte order: "%s".' % endian)
+
 
 def _prepared_data_and_metadata(hdr_file, image, **kwargs):
     '''
-    Return data array and metadata dict representing `image`.
+    Return a row block reader and metadata dict representing `image`.
+
+    The reader is a function `read_rows(start, stop)` that returns an array
+    of shape `(stop - start, C, B)` with the values of image rows `start`
+    through `stop - 1`, as stored in the source (i.e., prior to any data
+    type or byte order conversion). Data type, byte order, and interleave of
+    the output file are specified by the returned metadata.
     '''
-    import os
     import sys
-    import spectral
-    from spectral.io.spyfile import SpyFile, interleave_transpose
+    from spectral.io.spyfile import SpyFile, MemmapFile
 
-    endian_out = str(kwargs.get('byteorder', sys.byteorder)).lower()
-    if endian_out in ('0', 'little'):
-        endian_out = 'little'
-    elif endian_out in ('1', 'big'):
-        endian_out = 'big'
-    else:
-        raise ValueError('Invalid byte order: "%s".' % endian_out)
+    endian_out = _parse_byteorder(kwargs.get('byteorder', sys.byteorder))
 
     if isinstance(image, np.ndarray):
         data = image
-        src_interleave = 'bip'
         if len(data.shape) == 2:
             data = data[:, :, np.newaxis]
-        swap = False
-        metadata = {}    
+        read_rows = lambda start, stop: data[start:stop]
+        src_dtype = data.dtype
+        metadata = {}
     elif isinstance(image, SpyFile):
-        if image.using_memmap is True:
-            data = image._memmap
-            src_interleave = {spectral.BSQ: 'bsq', spectral.BIL: 'bil',
-                              spectral.BIP: 'bip'}[image.interleave]
-            swap = image.swap
+        if isinstance(image, MemmapFile) and image.using_memmap is True:
+            data = image.open_memmap(interleave='bip')
+            read_rows = lambda start, stop: data[start:stop]
+        elif image.scale_factor == 1:
+            cols = (0, image.ncols)
+            read_rows = lambda start, stop: \
+                image.read_subregion((start, stop), cols)
         else:
             data = image.load(dtype=image.dtype, scale=False)
-            src_interleave = 'bip'
-            swap = False
+            read_rows = lambda start, stop: data[start:stop]
+        src_dtype = np.dtype(image.dtype)
         metadata = image.metadata.copy()
     else:
-        data = image.load()
-        src_interleave = 'bip'
-        swap = False
+        cols = (0, image.shape[1])
+        read_rows = lambda start, stop: \
+            np.asarray(image.read_subregion((start, stop), cols))
+        src_dtype = None
         if hasattr(image, 'metadata'):
             metadata = image.metadata.copy()
         else:
@@ -646,25 +760,24 @@ def _prepared_data_and_metadata(hdr_file, image, **kwargs):
     if hasattr(image, 'bands'):
         add_band_info_to_metadata(image.bands, metadata)
 
-    dtype = np.dtype(kwargs.get('dtype', data.dtype)).char
+    if 'dtype' in kwargs:
+        dtype = np.dtype(kwargs['dtype']).char
+    elif src_dtype is not None:
+        dtype = src_dtype.char
+    else:
+        # Data type of a computed image is only known once data are read.
+        dtype = read_rows(0, 1).dtype.char
     _validate_dtype(dtype)
-    if dtype != data.dtype.char:
-        data = data.astype(dtype)
     metadata['data type'] = dtype_to_envi[dtype]
 
     interleave = kwargs.get('interleave', 'bip').lower()
     if interleave not in ['bil', 'bip', 'bsq']:
         raise ValueError('Invalid interleave: %s'
                          % str(kwargs['interleave']))
-    if interleave != src_interleave:
-        data = data.transpose(interleave_transpose(src_interleave, interleave))
     metadata['interleave'] = interleave
     metadata['byte order'] = 1 if endian_out == 'big' else 0
-    if (endian_out == sys.byteorder and not data.dtype.isnative) or \
-      (endian_out != sys.byteorder and data.dtype.isnative):
-        data = data.byteswap()
 
-    return data, metadata
+    return read_rows, metadata
 
 
 # A few header parameters need to be set no matter what is provided in the
@@ -710,22 +823,79 @@ def add_band_info_to_metadata(bands, metadata, overwrite=False):
         metadata['wavelength units'] = bands.band_unit
         
 
-def _write_image(hdr_file, data, header, **kwargs):
+def _row_blocks(header):
+    '''Yields (start, stop) row bounds of the blocks in which data are written.
+    '''
+    import spectral
+    (R, C, B) = [int(header[k]) for k in ('lines', 'samples', 'bands')]
+    itemsize = np.dtype(envi_to_dtype[str(header['data type'])]).itemsize
+    rows_per_block = max(1, spectral.settings.stream_block_bytes
+                         // (C * B * itemsize))
+    for start in range(0, R, rows_per_block):
+        yield (start, min(start + rows_per_block, R))
+
+
+def _write_image(hdr_file, read_rows, header, **kwargs):
     '''
-    Write `data` as an ENVI file using the metadata in `header`.
+    Write image data as an ENVI file using the metadata in `header`.
+
+    Image data are obtained in blocks of rows by calling `read_rows` (see
+    `_prepared_data_and_metadata`). Each block is converted to the data type,
+    byte order, and interleave given in `header` and written to the file
+    before the next block is read, so the entire image is never held in
+    memory.
     '''
+    from spectral.io.spyfile import interleave_transpose
+
     check_compatibility(header)
     force = kwargs.get('force', False)
     img_ext = kwargs.get('ext', '.img')
-    
+
+    (R, C, B) = [int(header[k]) for k in ('lines', 'samples', 'bands')]
+    dtype = np.dtype(envi_to_dtype[str(header['data type'])])
+    dtype = dtype.newbyteorder('>' if int(header['byte order']) == 1
+                               else '<')
+    interleave = header['interleave'].lower()
+    if interleave == 'bip':
+        transpose = (0, 1, 2)
+    else:
+        transpose = interleave_transpose('bip', interleave)
+
     (hdr_file, img_file) = check_new_filename(hdr_file, img_ext, force)
     write_envi_header(hdr_file, header, is_library=False)
     print('Saving', img_file)
-    # bufsize = data.shape[0] * data.shape[1] * np.dtype(dtype).itemsize
-    bufsize = data.shape[0] * data.shape[1] * data.dtype.itemsize
-    fout = builtins.open(img_file, 'wb', bufsize)
-    fout.write(data.tostring())
-    fout.close()
+    fout = builtins.open(img_file, 'wb')
+    try:
+        for (start, stop) in _row_blocks(header):
+            block = np.asarray(read_rows(start, stop))
+            block = block.reshape((stop - start, C, B)).transpose(transpose)
+            block = np.ascontiguousarray(block, dtype=dtype)
+            if interleave == 'bsq':
+                # Each band of the block is a separate strip of the file.
+                for k in range(B):
+                    fout.seek((k * R + start) * C * dtype.itemsize)
+                    fout.write(block[k].tostring())
+            else:
+                fout.write(block.tostring())
+    finally:
+        fout.close()
+
+
+def _write_tiled_image(hdr_file, read_rows, header, **kwargs):
+    '''Writes an ENVI header and a tiled image file (see `_write_image`).'''
+    from . import tiled
+
+    check_compatibility(header)
+    force = kwargs.get('force', False)
+    img_ext = kwargs.get('ext', '.spt')
+    header['file type'] = TILED_FILE_TYPE
+    (hdr_file, img_file) = check_new_filename(hdr_file, img_ext, force)
+    options = dict((k, kwargs[k]) for k in ('tile_shape', 'level', 'shuffle')
+                   if k in kwargs)
+    print('Saving', img_file)
+    tiled._save_prepared(img_file, read_rows, header,
+                         codec=kwargs['compression'], **options)
+    write_envi_header(hdr_file, header, is_library=False)
 
 
 def create_image(hdr_file, metadata=None, **kwargs):
@@ -791,6 +961,13 @@ def create_image(hdr_file, metadata=None, **kwargs):
             This value supercedes the value of "header offset" in the metadata
             argument (if given).
 
+        `byteorder` (int or string):
+
+            Specifies the byte order (endian-ness) of the data in the file.
+            For little endian, this value should be either 0 or "little".  For
+            big endian, it should be either 1 or "big". If not specified,
+            native byte order will be used.
+
     Returns:
 
         `SpyFile` object:
@@ -854,7 +1031,11 @@ def create_image(hdr_file, metadata=None, **kwargs):
     if 'interleave' in kwargs:
         metadata['interleave'] = kwargs['interleave']
 
-    metadata['byte order'] = spectral.byte_order
+    if 'byteorder' in kwargs:
+        endian = _parse_byteorder(kwargs['byteorder'])
+        metadata['byte order'] = 1 if endian == 'big' else 0
+    else:
+        metadata['byte order'] = spectral.byte_order
 
     # Verify minimal set of parameters have been provided
     if 'lines' not in metadata:
@@ -886,19 +1067,19 @@ def create_image(hdr_file, metadata=None, **kwargs):
         raise ValueError('Invalid interleave specified: %s.' % str(inter))
     if inter.lower() == 'bil':
         from spectral.io.bilfile import BilFile
-        memmap = np.memmap(img_file, dtype=dt, mode=memmap_mode,
+        memmap = np.memmap(img_file, dtype=params.dtype, mode=memmap_mode,
                            offset=params.offset, shape=(R, B, C))
         img = BilFile(params, metadata)
         img._memmap = memmap
     elif inter.lower() == 'bip':
         from spectral.io.bipfile import BipFile
-        memmap = np.memmap(img_file, dtype=dt, mode=memmap_mode,
+        memmap = np.memmap(img_file, dtype=params.dtype, mode=memmap_mode,
                            offset=params.offset, shape=(R, C, B))
         img = BipFile(params, metadata)
         img._memmap = memmap
     else:
         from spectral.io.bsqfile import BsqFile
-        memmap = np.memmap(img_file, dtype=dt, mode=memmap_mode,
+        memmap = np.memmap(img_file, dtype=params.dtype, mode=memmap_mode,
                            offset=params.offset, shape=(B, R, C))
         img = BsqFile(params, metadata)
         img._memmap = memmap
@@ -908,6 +1089,124 @@ def create_image(hdr_file, metadata=None, **kwargs):
     return img
 
 
+def convert(src_hdr, dst_hdr, **kwargs):
+    '''
+    Writes a copy of an image with a new interleave, data type or byte order.
+
+    Arguments:
+
+        `src_hdr` (str or :class:`~spectral.SpyFile`):
+
+            Header file name of the source image or an open image.
+
+        `dst_hdr` (str):
+
+            Header file (with ".hdr" extension) name with path for the new
+            image.
+
+    Keyword Arguments:
+
+        `interleave` (str):
+
+            The band interleave of the new file ("bil", "bip", or "bsq"). If
+            not specified, the interleave of the source file is used.
+
+        `dtype` (numpy dtype or type string):
+
+            The numpy data type with which to store the image. If not
+            specified, the data type of the source file is used.
+
+        `byteorder` (int or string):
+
+            Specifies the byte order (endian-ness) of the new file. For
+            little endian, this value should be either 0 or "little".  For
+            big endian, it should be either 1 or "big". If not specified,
+            native byte order will be used.
+
+        `max_memory` (int):
+
+            Approximate number of bytes of image data held in memory at any
+            time during the conversion. If not specified,
+            `spectral.settings.stream_block_bytes` is used.
+
+        `force` (bool, default False):
+
+            If the new image file or header already exist and `force` is
+            True, the files will be overwritten; otherwise, if either of the
+            files exist, an exception will be raised.
+
+        `ext` (str):
+
+            The extension to use for the image file.  If not specified, the
+            default extension ".img" will be used.
+
+        `metadata` (dict):
+
+            Additional ENVI header parameters for the new image.
+
+    Returns:
+
+        :class:`~spectral.SpyFile` object for the new image.
+
+    Data are copied in blocks of consecutive rows from a memmap of the source
+    file to a memmap of the new file (created with :func:`create_image`), so
+    files much larger than available memory can be converted. Values are
+    copied without applying the source image's scale factor, which is
+    retained in the new header.
+
+    Example::
+
+        >>> # Re-layout a BSQ file for fast pixel (spectrum) access.
+        >>> envi.convert('cube_bsq.hdr', 'cube_bip.hdr', interleave='bip')
+    '''
+    import os
+    import spectral
+    from spectral.io.spyfile import SpyFile
+
+    if isinstance(src_hdr, SpyFile):
+        src = src_hdr
+    else:
+        src = open(src_hdr)
+    src_inter = {spectral.BSQ: 'bsq', spectral.BIL: 'bil',
+                 spectral.BIP: 'bip'}[src.interleave]
+    interleave = kwargs.get('interleave', src_inter).lower()
+    if interleave not in ['bil', 'bip', 'bsq']:
+        raise ValueError('Invalid interleave: %s' % str(interleave))
+    dtype = np.dtype(kwargs.get('dtype', src.dtype)).char
+    _validate_dtype(dtype)
+    max_memory = kwargs.get('max_memory', spectral.settings.stream_block_bytes)
+
+    (hdr_file, img_file) = check_new_filename(dst_hdr,
+                                              kwargs.get('ext', '.img'),
+                                              kwargs.get('force', False))
+    if os.path.realpath(img_file) == os.path.realpath(src.filename):
+        raise EnviException('Can not convert an image file to itself.')
+
+    metadata = src.metadata.copy()
+    metadata.update(kwargs.get('metadata', {}))
+    metadata['header offset'] = 0
+    add_image_info_to_metadata(src, metadata)
+    add_band_info_to_metadata(src.bands, metadata)
+    options = dict((k, kwargs[k]) for k in ('byteorder', 'force', 'ext')
+                   if k in kwargs)
+    dst = create_image(dst_hdr, metadata, interleave=interleave,
+                       dtype=dtype, **options)
+
+    # Copy blocks of rows through BIP views of both memmaps.
+    src_data = src.open_memmap(interleave='bip')
+    dst_data = dst.open_memmap(interleave='bip', writable=True)
+    row_bytes = src.ncols * src.nbands * (src.sample_size + dst.sample_size)
+    rows_per_block = max(1, int(max_memory // row_bytes))
+    for start in range(0, src.nrows, rows_per_block):
+        rows = slice(start, min(start + rows_per_block, src.nrows))
+        dst_data[rows] = np.array(src_data[rows], dtype=dtype)
+    dst_data.flush()
+    del dst_data
+    del dst
+
+    return open(hdr_file, img_file)
+
+
 class SpectralLibrary:
     '''
     The envi.SpectralLibrary class holds data contained in an ENVI-formatted
@@ -0,0 +1,377 @@
+#########################################################################
+#
+#   pcimage.py - This file is part of the Spectral Python (SPy) package.
+#
+#   Copyright (C) 2001-2010 Thomas Boggs
+#
+#   Spectral Python is free software; you can redistribute it and/
+#   or modify it under the terms of the GNU General Public License
+#   as published by the Free Software Foundation; either version 2
+#   of the License, or (at your option) any later version.
+#
+#   Spectral Python is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this software; if not, write to
+#
+#               Free Software Foundation, Inc.
+#               59 Temple Place, Suite 330
+#               Boston, MA 02111-1307
+#               USA
+#
+#########################################################################
+#
+# Send comments to:
+# Thomas Boggs, tboggs@users.sourceforge.net
+#
+
+'''
+Lossy storage of images as quantized principal component scores.
+
+Most of the variance of a hyperspectral image is usually captured by a small
+number of principal components, so an image can be stored much more compactly
+as the scores of its top components (quantized to 16 bits) along with the
+basis and mean needed to reconstruct the original bands:
+
+    >>> img = open_image('92AV3C.lan')
+    >>> pcimage.save_pc_image('92AV3C_pc.hdr', img, fraction=0.999)
+    >>> pcimg = open_image('92AV3C_pc.hdr')
+
+The file is an ENVI image of the scores (file type "SPy PC Compressed"),
+whose header also holds the basis, mean, and quantization scales. Opening it
+returns a :class:`PCCompressedImage`, which reconstructs the original bands
+for any pixels or bands that are read. Algorithms that can work in principal
+component space can read the (much smaller) scores image directly from the
+`scores` attribute.
+'''
+
+from __future__ import division, print_function, unicode_literals
+
+import numpy as np
+
+from .spyfile import TransformedImage
+
+# Header parameters with one value per band of the reconstructed image. These
+# are stored with a "pc " prefix so the header remains a valid description of
+# the scores image.
+_BAND_KEYS = ('wavelength', 'fwhm', 'bbl', 'band names')
+
+_QUANTIZATIONS = {'int16': 'i2', 'float16': 'f2'}
+
+# ENVI "data type" of the scores for each quantization. ENVI has no
+# half-precision type, so float16 scores are described as 16-bit unsigned
+# integers (which have the correct sample size) and the "pc quantization"
+# parameter gives the actual type.
+_ENVI_DATA_TYPES = {'int16': 2, 'float16': 12}
+
+# Quantized scores of each component are scaled to this magnitude.
+_QUANT_MAX = 32767
+
+
+class PCCompressedImage(TransformedImage):
+    '''An image reconstructed from quantized principal component scores.
+
+    This is a :class:`~spectral.TransformedImage` that applies the
+    reconstruction transform (basis, quantization scales, and mean) to the
+    stored scores, so all of its read methods return values of the original
+    image bands. In addition to the members of `TransformedImage`, the
+    following are defined:
+
+        `scores` (:class:`~spectral.TransformedImage`):
+
+            The dequantized principal component scores. Its bands are the
+            components, in order of decreasing eigenvalue.
+
+        `mean` (length-`B` ndarray):
+
+            Mean of the original image.
+
+        `basis` (`BxK` ndarray):
+
+            Principal component eigenvectors (in columns).
+
+        `eigenvalues` (length-`K` ndarray or None):
+
+            Eigenvalues of the stored components.
+
+    Because a transform applied to a `TransformedImage` is chained with the
+    transform of that image, :func:`~spectral.transform_image` applied to a
+    `PCCompressedImage` reads only the scores. Likewise,
+    :func:`~spectral.calc_stats` (and, therefore,
+    :func:`~spectral.principal_components`) computes statistics of the scores
+    and transforms them to the original bands (see
+    :meth:`~spectral.TransformedImage.source_stats`).
+    '''
+    def __init__(self, scores, mean, basis, scale, eigenvalues=None,
+                 metadata=None):
+        '''Arguments:
+
+            `scores` (:class:`~spectral.SpyFile`):
+
+                An `MxNxK` image of quantized scores.
+
+            `mean` (length-`B` sequence):
+
+                Mean of the original image.
+
+            `basis` (`BxK` array):
+
+                Principal component eigenvectors (in columns).
+
+            `scale` (length-`K` sequence):
+
+                Numbers by which scores were multiplied before quantization.
+
+            `eigenvalues` (length-`K` sequence):
+
+                Optional eigenvalues of the components.
+
+            `metadata` (dict):
+
+                Optional metadata of the reconstructed image.
+        '''
+        from spectral.algorithms.transforms import LinearTransform
+        from spectral.spectral import BandInfo
+
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.basis = np.asarray(basis, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        if eigenvalues is not None:
+            eigenvalues = np.asarray(eigenvalues, dtype=np.float64)
+        self.eigenvalues = eigenvalues
+        if self.basis.shape != (len(self.mean), scores.shape[2]) or \
+          len(self.scale) != scores.shape[2]:
+            raise ValueError('Basis of shape %s, mean of length %d, and %d '
+                             'scales are inconsistent with an image of %d '
+                             'scores.' % (self.basis.shape, len(self.mean),
+                                          len(self.scale), scores.shape[2]))
+        dequantize = LinearTransform(np.diag(1. / self.scale),
+                                     dtype=np.float32)
+        self.scores = TransformedImage(dequantize, scores)
+        reconstruct = LinearTransform(self.basis / self.scale, post=self.mean,
+                                      dtype=np.float32)
+        TransformedImage.__init__(self, reconstruct, scores)
+        self._stats_cache = self.scores._stats_cache
+        if metadata is None:
+            metadata = {}
+        self.metadata = metadata
+        self._bands = BandInfo()
+        try:
+            self._bands.centers = [float(b) for b in metadata['wavelength']]
+        except (KeyError, ValueError, TypeError):
+            pass
+        try:
+            self._bands.bandwidths = [float(b) for b in metadata['fwhm']]
+        except (KeyError, ValueError, TypeError):
+            pass
+        self._bands.band_unit = metadata.get('wavelength units', None)
+
+    @property
+    def bands(self):
+        return self._bands
+
+    def __str__(self):
+        s = '\tPCCompressedImage object with output dimensions:\n'
+        s += '\t# Rows:         %6d\n' % (self.nrows)
+        s += '\t# Samples:      %6d\n' % (self.ncols)
+        s += '\t# Bands:        %6d\n\n' % (self.shape[2])
+        s += '\tThe image is reconstructed from %d components stored in:\n\n' \
+          % self.image.shape[2]
+        s += str(self.image)
+        return s
+
+
+def _read_rows(image):
+    '''Returns a function that reads (scaled) rows of an image.'''
+    if isinstance(image, np.ndarray):
+        return lambda start, stop: image[start:stop]
+    cols = (0, image.shape[1])
+    return lambda start, stop: np.asarray(image.read_subregion((start, stop),
+                                                               cols))
+
+
+def _row_blocks(image):
+    '''Yields row bounds of blocks of about `stream_block_bytes` of data.'''
+    import spectral
+    (R, C, B) = image.shape
+    rows_per_block = max(1, spectral.settings.stream_block_bytes
+                         // (C * B * 8))
+    for start in range(0, R, rows_per_block):
+        yield (start, min(start + rows_per_block, R))
+
+
+def save_pc_image(hdr_file, image, pc=None, **kwargs):
+    '''Saves an image as quantized principal component scores.
+
+    Arguments:
+
+        `hdr_file` (str):
+
+            Header file (with ".hdr" extension) name with path.
+
+        `image` (:class:`~spectral.SpyFile` or `MxNxB` ndarray):
+
+            The image to save.
+
+    Keyword Arguments:
+
+        `pc` (:class:`~spectral.algorithms.algorithms.PrincipalComponents`):
+
+            The (reduced) principal components with which to represent the
+            image. If not given, they are computed from `image` and reduced
+            with the `num`, `eigs`, or `fraction` keyword (see
+            :meth:`~spectral.algorithms.algorithms.PrincipalComponents.reduce`).
+            If none of those is given, components are retained to account for
+            99.9% of total image variance.
+
+        `quantization` (str, default "int16"):
+
+            Either "int16", for scores scaled to the range of 16-bit integers
+            and rounded, or "float16", for scaled half-precision floats.
+            Since ENVI does not define a 16-bit float data type, the header
+            of a "float16" file gives data type 12 (16-bit unsigned integer)
+            and its "pc quantization" parameter identifies the samples as
+            half-precision floats. Other ENVI readers will therefore read the
+            raw bits of the scores (the reconstructed image can only be read
+            with SPy).
+
+        `force` (bool, default False):
+
+            Whether existing files should be overwritten.
+
+        `ext` (str, default ".pcs"):
+
+            Extension of the scores file.
+
+        `byteorder` (int or string):
+
+            Byte order of the scores file (see
+            :func:`~spectral.io.envi.save_image`).
+
+        `metadata` (dict):
+
+            Additional ENVI header parameters for the reconstructed image.
+
+    Returns:
+
+        :class:`PCCompressedImage` for the new file.
+
+    Data are read in blocks of rows in two passes: the first finds the range
+    of each component's scores (which sets its quantization scale) and the
+    second writes the quantized scores.
+    '''
+    import spectral
+    from spectral.algorithms.algorithms import principal_components
+    from spectral.utilities.python23 import IS_PYTHON3
+    from . import envi
+    if IS_PYTHON3:
+        import builtins
+    else:
+        import __builtin__ as builtins
+
+    quantization = kwargs.get('quantization', 'int16')
+    if quantization not in _QUANTIZATIONS:
+        raise ValueError('Invalid quantization "%s". Must be one of %s.'
+                         % (quantization, ', '.join(sorted(_QUANTIZATIONS))))
+    if pc is None:
+        reduce_args = dict((k, kwargs[k]) for k in ('num', 'eigs', 'fraction')
+                           if k in kwargs)
+        if len(reduce_args) == 0:
+            reduce_args['fraction'] = 0.999
+        pc = principal_components(image).reduce(**reduce_args)
+    (R, C, B) = image.shape
+    basis = np.asarray(pc.eigenvectors, dtype=np.float64)
+    mean = np.asarray(pc.mean, dtype=np.float64)
+    K = basis.shape[1]
+    if basis.shape[0] != B:
+        raise ValueError('Principal components of %d bands can not be applied '
+                         'to an image with %d bands.' % (basis.shape[0], B))
+
+    read_rows = _read_rows(image)
+
+    def scores(start, stop):
+        X = np.asarray(read_rows(start, stop), dtype=np.float64)
+        return (X.reshape((-1, B)) - mean).dot(basis)
+
+    status = spectral._status
+    status.display_percentage('Computing principal component scores...')
+    maxabs = np.zeros(K)
+    for (start, stop) in _row_blocks(image):
+        maxabs = np.maximum(maxabs, np.abs(scores(start, stop)).max(axis=0))
+        status.update_percentage(50. * stop / R)
+    scale = np.where(maxabs > 0, _QUANT_MAX / np.where(maxabs > 0, maxabs, 1),
+                     1.)
+
+    metadata = {}
+    if hasattr(image, 'metadata'):
+        metadata.update(image.metadata)
+    metadata.update(kwargs.get('metadata', {}))
+    if hasattr(image, 'bands'):
+        envi.add_band_info_to_metadata(image.bands, metadata)
+    header = dict((k, v) for (k, v) in metadata.items()
+                  if k not in _BAND_KEYS)
+    for key in _BAND_KEYS:
+        if key in metadata:
+            header['pc ' + key] = metadata[key]
+    header.pop('reflectance scale factor', None)
+    header.pop('data ignore value', None)
+    endian_out = envi._parse_byteorder(kwargs.get('byteorder',
+                                                  spectral.byte_order))
+    dtype = np.dtype(_QUANTIZATIONS[quantization])
+    dtype = dtype.newbyteorder('>' if endian_out == 'big' else '<')
+    header.update({'lines': R, 'samples': C, 'bands': K, 'header offset': 0,
+                   'data type': _ENVI_DATA_TYPES[quantization],
+                   'interleave': 'bip',
+                   'byte order': 1 if endian_out == 'big' else 0,
+                   'file type': envi.PC_FILE_TYPE,
+                   'pc quantization': quantization,
+                   'pc mean': [repr(float(v)) for v in mean],
+                   'pc basis': [repr(float(v)) for v in basis.T.ravel()],
+                   'pc scale': [repr(float(v)) for v in scale]})
+    if pc.eigenvalues is not None:
+        header['pc eigenvalues'] = [repr(float(v)) for v in pc.eigenvalues]
+
+    (hdr_file, img_file) = envi.check_new_filename(hdr_file,
+                                                   kwargs.get('ext', '.pcs'),
+                                                   kwargs.get('force', False))
+    envi.write_envi_header(hdr_file, header)
+    fout = builtins.open(img_file, 'wb')
+    try:
+        for (start, stop) in _row_blocks(image):
+            S = scores(start, stop) * scale
+            if dtype.kind == 'i':
+                S = np.clip(np.round(S), -_QUANT_MAX, _QUANT_MAX)
+            fout.write(S.astype(dtype).tostring())
+            status.update_percentage(50. + 50. * stop / R)
+    finally:
+        fout.close()
+    status.end_percentage()
+    return envi.open(hdr_file, img_file)
+
+
+def _open_from_header(h, image):
+    '''Returns a :class:`PCCompressedImage` for an ENVI header and scores file.
+    '''
+    from .bipfile import BipFile
+    from .envi import gen_params
+    p = gen_params(h)
+    p.filename = image
+    quantization = h.get('pc quantization', 'int16')
+    if quantization not in _QUANTIZATIONS:
+        raise ValueError('Unsupported PC quantization: %s' % quantization)
+    # The ENVI data type only gives the byte order & size of the scores.
+    p.dtype = np.dtype(p.dtype).str[0] + _QUANTIZATIONS[quantization]
+    scores = BipFile(p, h)
+    K = p.nbands
+    basis = np.array(h['pc basis'], dtype=np.float64).reshape((K, -1)).T
+    metadata = dict((k, v) for (k, v) in h.items() if not k.startswith('pc '))
+    for key in _BAND_KEYS:
+        metadata.pop(key, None)
+        if 'pc ' + key in h:
+            metadata[key] = h['pc ' + key]
+    metadata['bands'] = str(basis.shape[0])
+    return PCCompressedImage(scores, h['pc mean'], basis, h['pc scale'],
+                             h.get('pc eigenvalues'), metadata)
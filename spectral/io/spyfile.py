@@ -99,8 +99,12 @@ files will also provide the following methods:
 read_band        Reads a single band into an *MxN* array
 read_bands       Reads multiple bands into an *MxNxC* array
 read_pixel       Reads a single pixel into a length *B* array
+read_pixels      Reads multiple pixels into an *NxB* array
 read_subregion   Reads multiple bands from a rectangular sub-region of the image
 read_subimage    Reads specified rows, columns, and bands
+iter_blocks      Iterates over blocks of consecutive image rows
+read_regions     Reads multiple sub-regions, concurrently
+materialize      Writes a native-order, pre-scaled copy of the image and opens it
 ==============   ===============================================================
 
 :class:`~spectral.SpyFile` objects have a ``bands`` member, which is an
@@ -112,9 +116,16 @@ from __future__ import division, print_function, unicode_literals
 
 import numpy
 import numpy as np
+import os
+import threading
 from spectral import SpyException
 from spectral.spectral import Image
 
+# Positional reads do not use the shared file offset (not available on
+# Windows or Python 2).
+_pread = getattr(os, 'pread', None)
+
+
 class FileNotFoundError(SpyException):
     pass
 
@@ -144,8 +155,135 @@ def find_file_path(filename):
     return pathname
 
 
+def _write_output(data, out=None, dtype=None, scale_factor=1, copy=True):
+    '''Returns `data` (divided by `scale_factor`) in a new or provided array.
+
+    Arguments:
+
+        `data` (:class:`numpy.ndarray`):
+
+            Values read from an image. This may be a view into a memmap.
+
+        `out` (:class:`numpy.ndarray`, default None):
+
+            An optional array into which the result is written. It must have
+            the same shape as `data`.
+
+        `dtype` (numpy dtype, default None):
+
+            Data type of the returned array. If `out` is also given, this must
+            be the same as `out.dtype`.
+
+        `scale_factor` (float, default 1):
+
+            The number by which values in `data` are divided.
+
+        `copy` (bool, default True):
+
+            If False and neither `out` nor `dtype` is given, `data` is
+            returned without being copied when no scaling is needed.
+
+    If neither `out` nor `dtype` is given, the type of the returned array is
+    that of `data` (or the result of dividing `data` by `scale_factor`).
+    Otherwise, scaling and type conversion are performed as values are
+    written to the output array so no additional temporary array is created.
+    '''
+    if out is None:
+        if dtype is None:
+            if scale_factor != 1:
+                return np.asarray(data) / float(scale_factor)
+            elif copy:
+                return np.array(data)
+            else:
+                return np.asarray(data)
+        out = np.empty(data.shape, dtype=dtype)
+    else:
+        if out.shape != data.shape:
+            raise ValueError('`out` array has shape %s but shape %s is '
+                             'required.' % (out.shape, data.shape))
+        if dtype is not None and np.dtype(dtype) != out.dtype:
+            raise ValueError('`dtype` does not match the dtype of `out`.')
+    if scale_factor != 1:
+        np.divide(data, float(scale_factor), out=out, casting='unsafe')
+    else:
+        np.copyto(out, data, casting='unsafe')
+    return out
+
+
+def _prefetched(iterable, n):
+    '''Iterates over `iterable` while items are read ahead in a thread.
+
+    Arguments:
+
+        `iterable`:
+
+            The iterable whose items are produced in a background thread.
+
+        `n` (int):
+
+            Maximum number of items read ahead of the item most recently
+            returned.
+
+    Exceptions raised while producing items are raised in the calling thread
+    when the corresponding item would have been returned. If iteration is
+    stopped early, the background thread is stopped as well.
+    '''
+    import threading
+    from spectral.utilities.python23 import IS_PYTHON3
+    if IS_PYTHON3:
+        import queue
+    else:
+        import Queue as queue
+
+    items = queue.Queue(maxsize=n)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except Exception as e:
+            put((None, e))
+
+    def consume():
+        thread = threading.Thread(target=produce)
+        thread.daemon = True
+        thread.start()
+        try:
+            while True:
+                (item, error) = items.get()
+                if error is not None:
+                    raise error
+                if item is done:
+                    return
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    return consume()
+
+
 class SpyFile(Image):
-    '''A base class for accessing spectral image files'''
+    '''A base class for accessing spectral image files
+
+    Data are read from the file with positional reads that do not depend on
+    (or change) a shared file offset, so a single :class:`SpyFile` object
+    can be shared by multiple threads (e.g., the workers of a thread pool)
+    that read from the image concurrently.
+    '''
 
     def __init__(self, params, metadata=None):
         Image.__init__(self, params, metadata)
@@ -169,6 +307,7 @@ class SpyFile(Image):
             self.sample_size = np.dtype(params.dtype).itemsize
 
             self.fid = open(find_file_path(self.filename), "rb")
+            self._fid_lock = threading.Lock()
 
             # So that we can use this more like a Numeric array
             self.shape = (self.nrows, self.ncols, self.nbands)
@@ -176,6 +315,83 @@ class SpyFile(Image):
         except:
             raise
 
+    def _read_bytes(self, offset, nbytes):
+        '''Returns `nbytes` bytes read from the file, starting at `offset`.
+
+        The read does not use the current position of `self.fid`. Where
+        `os.pread` is unavailable, the position is set and read while holding
+        a lock so concurrent reads do not interfere.
+        '''
+        if _pread is not None:
+            fd = self.fid.fileno()
+            data = _pread(fd, nbytes, offset)
+            while len(data) < nbytes:
+                # Short reads are allowed, so continue where this one ended.
+                more = _pread(fd, nbytes - len(data), offset + len(data))
+                if not more:
+                    break
+                data += more
+        else:
+            with self._fid_lock:
+                self.fid.seek(offset, 0)
+                data = self.fid.read(nbytes)
+        if len(data) < nbytes:
+            raise EOFError('Read beyond end of file "%s".' % self.filename)
+        return data
+
+    def _pixel_indices(self, rows, cols, bands=None):
+        '''Returns validated row, column & band index arrays for read_pixels.
+
+        Negative indices are converted to the equivalent positive indices.
+        `bands` is returned as None if it is None.
+        '''
+        def check(indices, n, name):
+            indices = np.asarray(indices, dtype=np.int64).ravel()
+            if np.any(indices >= n) or np.any(indices < -n):
+                raise IndexError('%s index out of range.' % name)
+            return np.where(indices < 0, indices + n, indices)
+        rows = check(rows, self.nrows, 'Row')
+        cols = check(cols, self.ncols, 'Column')
+        if rows.shape != cols.shape:
+            raise ValueError('`rows` and `cols` must have the same length.')
+        if bands is not None:
+            bands = check(bands, self.nbands, 'Band')
+        return (rows, cols, bands)
+
+    def _read_samples(self, offsets):
+        '''Returns an array of the samples at the given file byte offsets.
+
+        Offsets are sorted and nearby samples are read from the file together,
+        so the number of reads is usually much smaller than the number of
+        samples. No single read is larger than
+        `spectral.settings.stream_block_bytes`. The returned array has the
+        same shape as `offsets`.
+        '''
+        import spectral
+        offsets = np.asarray(offsets, dtype=np.int64)
+        (unique, inverse) = np.unique(offsets.ravel(), return_inverse=True)
+        values = np.empty(unique.shape, dtype=self.dtype)
+        if len(unique) == 0:
+            return values.reshape(offsets.shape)
+        # Samples separated by no more than this are read in a single call.
+        max_gap = max(self.sample_size, 4096)
+        max_bytes = max(self.sample_size,
+                        int(spectral.settings.stream_block_bytes))
+        breaks = np.nonzero(np.diff(unique) > max_gap)[0] + 1
+        for (a, b) in zip(np.r_[0, breaks], np.r_[breaks, len(unique)]):
+            while a < b:
+                start = int(unique[a])
+                # Split long runs of samples into reads of at most max_bytes.
+                c = a + np.searchsorted(unique[a:b],
+                                        start + max_bytes - self.sample_size,
+                                        side='right')
+                nbytes = int(unique[c - 1]) - start + self.sample_size
+                run = np.frombuffer(self._read_bytes(start, nbytes),
+                                    dtype=self.dtype)
+                values[a:c] = run[(unique[a:c] - start) // self.sample_size]
+                a = c
+        return values[inverse].reshape(offsets.shape)
+
     def transform(self, xform):
         '''Returns a SpyFile image with the linear transform applied.'''
         # This allows a LinearTransform object to take the SpyFile as an arg.
@@ -222,8 +438,6 @@ class SpyFile(Image):
         '''
         import spectral
         from spectral.spectral import ImageArray
-        from spectral.utilities.python23 import typecode
-        from array import array
         import warnings
         from spectral.algorithms.spymath import has_nan, NaNValueWarning
 
@@ -231,11 +445,9 @@ class SpyFile(Image):
             if k not in ('dtype', 'scale'):
                 raise ValueError('Invalid keyword %s.' % str(k))
         dtype = kwargs.get('dtype', ImageArray.format)
-        data = array(typecode('b'))
-        self.fid.seek(self.offset)
-        data.fromfile(self.fid, self.nrows * self.ncols *
-                      self.nbands * self.sample_size)
-        npArray = np.fromstring(data.tostring(), dtype=self.dtype)
+        data = self._read_bytes(self.offset, self.nrows * self.ncols *
+                                self.nbands * self.sample_size)
+        npArray = np.frombuffer(data, dtype=self.dtype)
         if self.interleave == spectral.BIL:
             npArray.shape = (self.nrows, self.nbands, self.ncols)
             npArray = npArray.transpose([0, 2, 1])
@@ -252,6 +464,313 @@ class SpyFile(Image):
             warnings.warn('Image data contains NaN values.', NaNValueWarning)
         return imarray        
 
+    def materialize(self, path=None, dtype='f4'):
+        '''Writes a native-order, pre-scaled copy of the image and opens it.
+
+        Arguments:
+
+            `path` (str, default None):
+
+                Name of the ENVI header (with ".hdr" extension) to create for
+                the copy. If not specified, the files are created in a new
+                temporary directory (see :func:`tempfile.mkdtemp`), which is not
+                removed automatically.
+
+            `dtype` (numpy dtype or type string, default 'f4'):
+
+                The data type of the copy.
+
+        Returns:
+
+            :class:`~spectral.SpyFile` object for the copy.
+
+        The image is read once, in blocks of rows (see `iter_blocks`), with
+        any scale factor applied. Values are written in native byte order to
+        an ENVI file with the same interleave as this image. The returned
+        image has no scale factor, so reading it (particularly through its
+        memmap) requires no byte swapping, scaling, or type conversion. This
+        is useful for big-endian or scaled files (e.g., AVIRIS data) that are
+        analyzed repeatedly.
+        '''
+        import os
+        import tempfile
+        import spectral
+        from spectral.io import envi
+
+        if path is None:
+            name = os.path.basename(self.filename or 'image')
+            path = os.path.join(tempfile.mkdtemp(prefix='spy_'),
+                                os.path.splitext(name)[0] + '.hdr')
+        interleave = {spectral.BSQ: 'bsq', spectral.BIL: 'bil',
+                      spectral.BIP: 'bip'}[self.interleave]
+        metadata = self.metadata.copy()
+        metadata.pop('reflectance scale factor', None)
+        metadata['header offset'] = 0
+        envi.add_band_info_to_metadata(self.bands, metadata)
+        dst = envi.create_image(path, metadata, interleave=interleave,
+                                dtype=dtype, shape=self.shape)
+        (hdr_file, img_file) = (path, dst.filename)
+        dst_data = dst.open_memmap(interleave='bip', writable=True)
+        for (rows, data) in self.iter_blocks(prefetch=1):
+            dst_data[rows] = data
+        dst_data.flush()
+        del dst_data
+        del dst
+        return envi.open(hdr_file, img_file)
+
+    def iter_blocks(self, rows_per_block=None, bands=None, overlap=0,
+                    prefetch=0):
+        '''Iterates over the image in blocks of consecutive rows.
+
+        Keyword Arguments:
+
+            `rows_per_block` (int, default None):
+
+                Number of image rows in each block. If not specified, the
+                number of rows is chosen according to the file interleave so
+                that approximately `spectral.settings.stream_block_bytes` of
+                file data are read per block. For BIL and BIP files, complete
+                rows (all bands) are read from the file so the block size is
+                based on the full row size. For BSQ files, only strips of the
+                requested band planes are read so blocks contain more rows
+                when fewer bands are requested.
+
+            `bands` (list of ints, default None):
+
+                Optional list of bands to read. If not specified, all bands
+                are read.
+
+            `overlap` (int, default 0):
+
+                Number of additional "halo" rows to include above and below
+                each block (limited by the image boundaries). This is useful
+                for windowed algorithms that require neighboring rows. If
+                nonzero, the slice of the block's own rows is also yielded
+                (see below).
+
+            `prefetch` (int, default 0):
+
+                Number of blocks to read ahead in a background thread while
+                the current block is being processed. If zero, each block is
+                read when it is requested. When prefetching, blocks are read
+                into a small ring of reusable arrays, so the data of a block
+                are only valid until the next block is requested (copy the
+                array if it must be retained).
+
+        Returns:
+
+            An iterator yielding 2-tuples of the form (`row_slice`, `data`),
+            where `row_slice` is a :class:`slice` of the image rows contained
+            in `data` and `data` is an `MxNxL` array, as returned by
+            `read_subregion`. If `overlap` is nonzero, 3-tuples of the form
+            (`row_slice`, `core_slice`, `data`) are yielded instead, where
+            `row_slice` includes the halo rows and `core_slice` is the slice
+            of rows that belong to the block (without the halo rows).
+
+        Blocks are yielded in file order (from the first to last row).
+        `data` is equal to `img[row_slice]` and the core slices (or, when
+        `overlap` is zero, the row slices) of consecutive blocks are
+        contiguous, so results computed for the core rows of each block
+        (which begin at row `core_slice.start - row_slice.start` of `data`)
+        can be written to `out[core_slice]` without writing any row twice.
+        '''
+        if bands is not None:
+            bands = list(bands)
+        if rows_per_block is None:
+            rows_per_block = self._rows_per_block(bands)
+        elif rows_per_block < 1:
+            raise ValueError('`rows_per_block` must be a positive integer.')
+        if overlap < 0:
+            raise ValueError('`overlap` must be non-negative.')
+        if prefetch < 0:
+            raise ValueError('`prefetch` must be non-negative.')
+        rows_per_block = int(rows_per_block)
+        overlap = int(overlap)
+        if prefetch > 0:
+            # The consumer holds one block and the reading thread may hold
+            # one block that is waiting to be queued.
+            blocks = self._iter_blocks(rows_per_block, bands, overlap,
+                                       nbuffers=prefetch + 2)
+            return _prefetched(blocks, prefetch)
+        return self._iter_blocks(rows_per_block, bands, overlap)
+
+    def _iter_blocks(self, rows_per_block, bands, overlap, nbuffers=0):
+        '''Generator for `iter_blocks`, optionally reusing `nbuffers` arrays.
+        '''
+        buffers = []
+        for (n, start) in enumerate(range(0, self.nrows, rows_per_block)):
+            stop = min(start + rows_per_block, self.nrows)
+            (first, last) = (max(0, start - overlap),
+                             min(self.nrows, stop + overlap))
+            if n < nbuffers:
+                data = self.read_subregion((first, last), (0, self.ncols),
+                                           bands)
+                buf = np.empty((rows_per_block + 2 * overlap,) +
+                               data.shape[1:], dtype=data.dtype)
+                buffers.append(buf)
+                buf[:last - first] = data
+                data = buf[:last - first]
+            elif nbuffers > 0:
+                data = self.read_subregion((first, last), (0, self.ncols),
+                                           bands, out=buffers[n % nbuffers]
+                                           [:last - first])
+            else:
+                data = self.read_subregion((first, last), (0, self.ncols),
+                                           bands)
+            if overlap > 0:
+                yield (slice(first, last), slice(start, stop), data)
+            else:
+                yield (slice(first, last), data)
+
+    def _rows_per_block(self, bands=None):
+        '''Returns the default number of rows read per block from the file.'''
+        import spectral
+        if self.interleave == spectral.BSQ and bands is not None:
+            # Only strips of the requested band planes are read.
+            nbands = len(bands)
+        else:
+            # Complete image rows are read from the file.
+            nbands = self.nbands
+        row_bytes = self.ncols * nbands * self.sample_size
+        return max(1, int(spectral.settings.stream_block_bytes // row_bytes))
+
+    def read_regions(self, regions, n_threads=None):
+        '''Reads multiple rectangular sub-regions from the image.
+
+        Arguments:
+
+            `regions` (sequence):
+
+                The regions to read. Each item is a tuple of the form
+                (`row_bounds`, `col_bounds`) or (`row_bounds`, `col_bounds`,
+                `bands`), where the tuple elements have the same meaning as
+                the corresponding arguments of `read_subregion`.
+
+        Keyword Arguments:
+
+            `n_threads` (int, default None):
+
+                Number of threads used to read the regions. If not specified,
+                the number of CPUs is used.
+
+        Returns:
+
+            A list of arrays (one per region, in the order the regions were
+            given), where each array is the `MxNxL` array that
+            `read_subregion` would return for the region.
+
+        Regions are sorted by the file offset of their first sample and, in
+        a single pass over the sorted regions, each region that overlaps or
+        touches the previous group of regions is combined with it into a
+        single read of their bounding region, so overlapping data are only
+        read from the file once. Regions are only combined while the
+        bounding region is at most twice the size of the regions it
+        contains, so distant regions on the same rows are read separately.
+        The reads are performed concurrently.
+        '''
+        import spectral
+        from multiprocessing import cpu_count
+        from multiprocessing.pool import ThreadPool
+
+        if n_threads is not None and n_threads < 1:
+            raise ValueError('`n_threads` must be a positive integer.')
+
+        requests = []
+        for region in regions:
+            if len(region) == 2:
+                (rows, cols) = region
+                bands = None
+            else:
+                (rows, cols, bands) = region
+                if bands is not None:
+                    bands = list(bands)
+            requests.append((tuple(rows), tuple(cols), bands))
+
+        def volume(rows, cols, bands):
+            nbands = self.nbands if bands is None else len(bands)
+            return (rows[1] - rows[0]) * (cols[1] - cols[0]) * nbands
+
+        interleave = getattr(self, 'interleave', spectral.BIP)
+
+        def offset(rows, cols, bands):
+            # Index of the region's first sample in the file
+            (r, c, b) = (rows[0], cols[0], 0 if not bands else min(bands))
+            if interleave == spectral.BSQ:
+                return (b * self.nrows + r) * self.ncols + c
+            elif interleave == spectral.BIL:
+                return (r * self.nbands + b) * self.ncols + c
+            return (r * self.ncols + c) * self.nbands + b
+
+        # Sweep through the regions in file order, adding each region to the
+        # last group (of region indices) if they overlap or touch and the
+        # bounding box of the group remains at most twice the size of its
+        # regions (so that merging never reads much more data than was
+        # requested).
+        order = sorted(range(len(requests)),
+                       key=lambda i: offset(*requests[i]))
+        groups = []
+        for i in order:
+            (rows, cols, bands) = requests[i]
+            if groups:
+                group = groups[-1]
+                (grows, gcols, gbands, members, size) = group
+                if rows[0] <= grows[1] and rows[1] >= grows[0] and \
+                  cols[0] <= gcols[1] and cols[1] >= gcols[0]:
+                    new_rows = (min(grows[0], rows[0]),
+                                max(grows[1], rows[1]))
+                    new_cols = (min(gcols[0], cols[0]),
+                                max(gcols[1], cols[1]))
+                    if gbands is None or bands is None:
+                        new_bands = None
+                    else:
+                        new_bands = sorted(set(gbands + bands))
+                    new_size = size + volume(rows, cols, bands)
+                    if volume(new_rows, new_cols, new_bands) <= 2 * new_size:
+                        group[:] = [new_rows, new_cols, new_bands,
+                                    members + [i], new_size]
+                        continue
+            groups.append([rows, cols, bands, [i],
+                           volume(rows, cols, bands)])
+
+        def read_group(group):
+            (rows, cols, bands, members, size) = group
+            if len(members) == 1:
+                i = members[0]
+                return [(i, self.read_subregion(*requests[i]))]
+            data = self.read_subregion(rows, cols, bands)
+            results = []
+            for i in members:
+                (r, c, b) = requests[i]
+                region = data[r[0] - rows[0]: r[1] - rows[0],
+                              c[0] - cols[0]: c[1] - cols[0]]
+                if b is None:
+                    region = np.array(region)
+                elif bands is None:
+                    region = region[:, :, b]
+                else:
+                    region = region[:, :, [bands.index(k) for k in b]]
+                results.append((i, region))
+            return results
+
+        if n_threads is None:
+            n_threads = cpu_count()
+        n_threads = min(n_threads, len(groups))
+        if n_threads > 1:
+            pool = ThreadPool(n_threads)
+            try:
+                results = pool.map(read_group, groups)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [read_group(group) for group in groups]
+
+        arrays = [None] * len(requests)
+        for group_results in results:
+            for (i, region) in group_results:
+                arrays[i] = region
+        return arrays
+
     def __getitem__(self, args):
         '''Subscripting operator that provides a numpy-like interface.
         Usage::
@@ -438,13 +957,14 @@ class SubImage(SpyFile):
 
         SpyFile.__init__(self, p, image.metadata)
         self.parent = image
+        self.interleave = image.interleave
         self.row_offset = row_range[0]
         self.col_offset = col_range[0]
         self.nrows = row_range[1] - row_range[0]
         self.ncols = col_range[1] - col_range[0]
         self.shape = (self.nrows, self.ncols, self.nbands)
 
-    def read_band(self, band):
+    def read_band(self, band, out=None, dtype=None):
         '''Reads a single band from the image.
 
         Arguments:
@@ -453,19 +973,29 @@ class SubImage(SpyFile):
 
                 Index of band to read.
 
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxN` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
         Returns:
 
            :class:`numpy.ndarray`
 
                 An `MxN` array of values for the specified band.
         '''
-        return self.parent.read_subregion([self.row_offset,
-                                           self.row_offset + self.nrows - 1],
-                                          [self.col_offset,
-                                           self.col_offset + self.ncols - 1],
-                                          [band])
-
-    def read_bands(self, bands):
+        if out is not None:
+            self.read_subregion((0, self.nrows), (0, self.ncols), [band],
+                                out=out[:, :, np.newaxis], dtype=dtype)
+            return out
+        return self.read_subregion((0, self.nrows), (0, self.ncols), [band],
+                                   dtype=dtype)[:, :, 0]
+
+    def read_bands(self, bands, out=None, dtype=None):
         '''Reads multiple bands from the image.
 
         Arguments:
@@ -474,6 +1004,15 @@ class SubImage(SpyFile):
 
                 Indices of bands to read.
 
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
         Returns:
 
            :class:`numpy.ndarray`
@@ -482,13 +1021,10 @@ class SubImage(SpyFile):
                 are the number of rows & columns in the image and `L` equals
                 len(`bands`).
         '''
-        return self.parent.read_subregion([self.row_offset,
-                                           self.row_offset + self.nrows - 1],
-                                          [self.col_offset,
-                                           self.col_offset + self.ncols - 1],
-                                          bands)
+        return self.read_subregion((0, self.nrows), (0, self.ncols),
+                                   list(bands), out=out, dtype=dtype)
 
-    def read_pixel(self, row, col):
+    def read_pixel(self, row, col, out=None, dtype=None):
         '''Reads the pixel at position (row,col) from the file.
 
         Arguments:
@@ -497,6 +1033,15 @@ class SubImage(SpyFile):
 
                 Indices of the row & column for the pixel
 
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional length-`B` array into which the data are written.
+                If given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
         Returns:
 
            :class:`numpy.ndarray`
@@ -504,9 +1049,46 @@ class SubImage(SpyFile):
                 A length-`B` array, where `B` is the number of image bands.
         '''
         return self.parent.read_pixel(row + self.row_offset,
-                                      col + self.col_offset)
+                                      col + self.col_offset,
+                                      out=out, dtype=dtype)
+
+    def read_pixels(self, rows, cols, bands=None, out=None, dtype=None):
+        '''Reads the pixels at multiple (row, col) positions from the file.
+
+        Arguments:
+
+            `rows`, `cols` (sequences of ints):
+
+                Row & column indices of the `N` pixels to read. Both must have
+                the same length.
+
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `out` (:class:`numpy.ndarray`, default None):
 
-    def read_subimage(self, rows, cols, bands=[]):
+                An optional `NxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `NxL` array, where `L` = len(`bands`) (or # of image bands
+                if `bands` == None).
+        '''
+        (rows, cols, bands) = self._pixel_indices(rows, cols, bands)
+        return self.parent.read_pixels(rows + self.row_offset,
+                                       cols + self.col_offset, bands,
+                                       out=out, dtype=dtype)
+
+    def read_subimage(self, rows, cols, bands=None, out=None, dtype=None):
         '''
         Reads arbitrary rows, columns, and bands from the image.
 
@@ -525,6 +1107,15 @@ class SubImage(SpyFile):
                 Optional list of bands to read.  If not specified, all bands
                 are read.
 
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
         Returns:
 
            :class:`numpy.ndarray`
@@ -532,11 +1123,13 @@ class SubImage(SpyFile):
                 An `MxNxL` array, where `M` = len(`rows`), `N` = len(`cols`),
                 and `L` = len(bands) (or # of image bands if `bands` == None).
         '''
-        return self.parent.read_subimage(list(array(rows) + self.row_offset),
-                                         list(array(cols) + self.col_offset),
-                                         bands)
+        rows = list(np.array(rows) + self.row_offset)
+        cols = list(np.array(cols) + self.col_offset)
+        return self.parent.read_subimage(rows, cols, bands, out=out,
+                                         dtype=dtype)
 
-    def read_subregion(self, row_bounds, col_bounds, bands=None):
+    def read_subregion(self, row_bounds, col_bounds, bands=None, out=None,
+                       dtype=None):
         '''
         Reads a contiguous rectangular sub-region from the image.
 
@@ -555,17 +1148,25 @@ class SubImage(SpyFile):
                 Optional list of bands to read.  If not specified, all bands
                 are read.
 
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
         Returns:
 
            :class:`numpy.ndarray`
 
                 An `MxNxL` array.
         '''
-        return self.parent.read_subimage(
-            list(array(row_bounds) + self.row_offset),
-            list(array(
-                 col_bounds) + self.col_offset),
-            bands)
+        return self.parent.read_subregion(
+            (row_bounds[0] + self.row_offset, row_bounds[1] + self.row_offset),
+            (col_bounds[0] + self.col_offset, col_bounds[1] + self.col_offset),
+            bands, out=out, dtype=dtype)
 
 
 def transform_image(transform, img):
@@ -595,10 +1196,7 @@ def transform_image(transform, img):
         if isinstance(transform, LinearTransform):
             return transform(img)
         ret = np.empty(img.shape[:2] + (transform.shape[0],), img.dtype)
-        for i in range(img.shape[0]):
-            for j in range(img.shape[1]):
-                ret[i, j] = np.dot(transform, img[i, j])
-        return ret
+        return LinearTransform(transform)(img, out=ret)
     else:
         return TransformedImage(transform, img)
 
@@ -633,8 +1231,10 @@ class TransformedImage(Image):
         if isinstance(img, TransformedImage):
             self.transform = self.transform.chain(img.transform)
             self.image = img.image
+            self._stats_cache = img._stats_cache
         else:
             self.image = img
+            self._stats_cache = {}
         if self.transform.dim_out is not None:
             self.shape = self.image.shape[:2] + (self.transform.dim_out,)
             self.nbands = self.transform.dim_out
@@ -650,44 +1250,32 @@ class TransformedImage(Image):
         '''
         Get data from the image and apply the transform.
         '''
-        from numpy import zeros, dot, take
         if len(args) < 2:
             raise Exception('Must pass at least two subscript arguments')
 
         # Note that band indices are wrt transformed features
         if len(args) == 2 or args[2] is None:
-            bands = list(range(self.nbands))
+            bands = None
         elif type(args[2]) == slice:
-            (zstart, zstop, zstep) = (args[2].start, args[2].stop,
-                                      args[2].step)
-            if zstart is None:
-                zstart = 0
-            if zstop is None:
-                zstop = self.nbands
-            if zstep is None:
-                zstep = 1
-            bands = list(range(zstart, zstop, zstep))
+            bands = list(range(self.nbands))[args[2]]
         elif isinstance(args[2], int):
             bands = [args[2]]
         else:
             # Band indices should be in a list
             bands = args[2]
 
-        orig = self.image.__getitem__(args[:2])
-        if len(orig.shape) == 1:
+        (transform, src_bands) = self._band_transform(bands)
+        if src_bands is None:
+            orig = self.image.__getitem__(args[:2])
+        else:
+            orig = self.image.__getitem__(tuple(args[:2]) + (src_bands,))
+        orig = numpy.asarray(orig)
+        if orig.ndim == 1:
             orig = orig[numpy.newaxis, numpy.newaxis, :]
-        elif len(orig.shape) == 2:
+        elif orig.ndim == 2:
             orig = orig[numpy.newaxis, :]
-        transformed_xy = zeros(orig.shape[:2] + (self.shape[2],),
-                               self.transform.dtype)
-        for i in range(transformed_xy.shape[0]):
-            for j in range(transformed_xy.shape[1]):
-                transformed_xy[i, j] = self.transform(orig[i, j])
         # Remove unnecessary dimensions
-
-        transformed = take(transformed_xy, bands, 2)
-
-        return transformed.squeeze()
+        return self._apply(transform, orig).squeeze()
 
     def __str__(self):
         s = '\tTransformedImage object with output dimensions:\n'
@@ -698,13 +1286,166 @@ class TransformedImage(Image):
         s += str(self.image)
         return s
 
+    def source_stats(self, mask=None, index=None):
+        '''Returns a :class:`~spectral.GaussianStats` object for the source.
+
+        Arguments `mask` and `index` are the same as for
+        :func:`~spectral.calc_stats`. Statistics for the entire source image
+        are computed once and shared with all `TransformedImage` objects
+        created from this one (e.g., by chaining transforms).
+        '''
+        from spectral.algorithms.algorithms import calc_stats
+        if mask is not None:
+            return calc_stats(self.image, mask, index, allow_nan=True)
+        if 'stats' not in self._stats_cache:
+            self._stats_cache['stats'] = calc_stats(self.image,
+                                                    allow_nan=True)
+        return self._stats_cache['stats']
+
+    def _band_transform(self, bands):
+        '''Returns the transform & source bands needed for output `bands`.
+
+        For a matrix transform, the returned transform only computes the
+        requested outputs (using the corresponding rows of the matrix) and
+        all source bands are required (the returned source bands are None).
+        A scalar transform is applied to each band separately, so only the
+        requested source bands are read (and a per-band offset is reduced
+        to those bands).
+        '''
+        from spectral.algorithms.transforms import LinearTransform
+        xform = self.transform
+        if bands is None:
+            return (xform, None)
+        bands = [int(b) for b in numpy.asarray(bands).ravel()]
+        bias = xform._bias
+        if bias is not None and numpy.ndim(bias) > 0:
+            bias = bias[bands]
+        if xform.dim_out is None:
+            if bias is not None and numpy.ndim(bias) > 0:
+                xform = LinearTransform(xform._A, post=bias,
+                                        dtype=xform.dtype)
+            return (xform, bands)
+        return (LinearTransform(xform._A[bands], post=bias,
+                                dtype=xform.dtype), None)
+
+    def _apply(self, transform, data):
+        '''Applies `transform` to all pixels of an array of source data.'''
+        shape = data.shape
+        X = numpy.asarray(data).reshape((-1, shape[-1]))
+        return transform(X).reshape(shape[:-1] + (-1,))
+
+    def _source_blocks(self, bands=None, rows_per_block=None, overlap=0,
+                       prefetch=1):
+        '''Yields blocks of the source image.
+
+        Arguments and yielded tuples are as for :meth:`iter_blocks`.
+        '''
+        import spectral
+        if isinstance(self.image, (SpyFile, TransformedImage)):
+            for block in self.image.iter_blocks(rows_per_block, bands,
+                                                overlap, prefetch):
+                yield block
+            return
+        if rows_per_block is None:
+            nbands = self.image.nbands if bands is None else len(bands)
+            rows_per_block = max(1, int(spectral.settings.stream_block_bytes
+                                        // (self.ncols * nbands * 8)))
+        elif rows_per_block < 1:
+            raise ValueError('`rows_per_block` must be a positive integer.')
+        if overlap < 0:
+            raise ValueError('`overlap` must be non-negative.')
+        (rows_per_block, overlap) = (int(rows_per_block), int(overlap))
+        for start in range(0, self.nrows, rows_per_block):
+            stop = min(start + rows_per_block, self.nrows)
+            (first, last) = (max(0, start - overlap),
+                             min(self.nrows, stop + overlap))
+            data = self.image.read_subregion((first, last),
+                                             (0, self.ncols), bands)
+            if overlap > 0:
+                yield (slice(first, last), slice(start, stop), data)
+            else:
+                yield (slice(first, last), data)
+
+    def iter_blocks(self, rows_per_block=None, bands=None, overlap=0,
+                    prefetch=0):
+        '''Iterates over the transformed image in blocks of consecutive rows.
+
+        Keyword Arguments:
+
+            `rows_per_block` (int, default None):
+
+                Number of image rows in each block. If not specified, source
+                data are read in blocks of about
+                `spectral.settings.stream_block_bytes`.
+
+            `bands` (list of ints, default None):
+
+                Optional list of (transformed) bands to compute. If not
+                specified, all bands are computed.
+
+            `overlap` (int, default 0):
+
+                Number of additional "halo" rows to include above and below
+                each block (limited by the image boundaries). If nonzero, the
+                slice of the block's own rows is also yielded (see below).
+
+            `prefetch` (int, default 0):
+
+                Number of source blocks to read ahead in a background thread
+                (only used when the source is a file image).
+
+        Returns:
+
+            An iterator yielding 2-tuples of the form (`row_slice`, `data`),
+            where `data` is the transformed `MxNxL` array for the image rows
+            in `row_slice`. If `overlap` is nonzero, 3-tuples of the form
+            (`row_slice`, `core_slice`, `data`) are yielded, where
+            `row_slice` includes the halo rows and `core_slice` excludes
+            them.
+
+        Arguments have the same meaning (and order) as for
+        :meth:`spectral.SpyFile.iter_blocks`. The transform is applied to
+        each block with a single matrix product and each yielded array is
+        newly allocated (i.e., it remains valid after the next block is
+        requested).
+        '''
+        (transform, src_bands) = self._band_transform(bands)
+        for block in self._source_blocks(src_bands, rows_per_block,
+                                         overlap, prefetch):
+            yield block[:-1] + (self._apply(transform, block[-1]),)
+
+    def _read_blocks(self, bands=None):
+        '''Returns an `MxNxL` array of `bands`, computed block by block.'''
+        (transform, src_bands) = self._band_transform(bands)
+        nbands = self.nbands if bands is None else len(bands)
+        out = None
+        for (rows, data) in self._source_blocks(src_bands):
+            block = self._apply(transform, data)
+            if out is None:
+                out = numpy.empty((self.nrows, self.ncols, nbands),
+                                  dtype=block.dtype)
+            out[rows] = block
+        return out
+
     def read_pixel(self, row, col):
-        return self.transform(self.image.read_pixel(row, col))
+        return self.transform(numpy.asarray(self.image.read_pixel(row, col)))
+
+    def read_pixels(self, rows, cols, bands=None):
+        '''Reads and transforms the pixels at multiple (row, col) positions.
+
+        Returns an `NxL` array, where `N` is the number of pixels and `L` is
+        len(`bands`) (or the number of image bands if `bands` is None).
+        '''
+        from spectral.algorithms.algorithms import _read_pixels
+        (transform, src_bands) = self._band_transform(bands)
+        data = numpy.asarray(_read_pixels(self.image, rows, cols))
+        if src_bands is not None:
+            data = data[:, src_bands]
+        return self._apply(transform, data)
 
     def load(self):
         '''Loads all image data, transforms it, and returns an ndarray).'''
-        data = self.image.load()
-        return self.transform(data)
+        return self._read_blocks()
 
     def read_subregion(self, row_bounds, col_bounds, bands=None):
         '''
@@ -713,13 +1454,9 @@ class TransformedImage(Image):
         specifies column min and max.  If third argument containing list
         of band indices is not given, all bands are read.
         '''
-        from numpy import zeros, dot
-        data = self.image.read_subregion(row_bounds, col_bounds)
-        xdata = self.transform(data)
-        if bands:
-            return numpy.take(xdata, bands, 2)
-        else:
-            return xdata
+        (transform, src_bands) = self._band_transform(bands)
+        data = self.image.read_subregion(row_bounds, col_bounds, src_bands)
+        return self._apply(transform, data)
 
     def read_subimage(self, rows, cols, bands=None):
         '''
@@ -728,24 +1465,25 @@ class TransformedImage(Image):
         Second arg specifies column min and max. If third argument
         containing list of band indices is not given, all bands are read.
         '''
-        from numpy import zeros, dot
-        data = self.image.read_subimage(rows, cols)
-        xdata = self.transform(data)
-        if bands:
-            return numpy.take(xdata, bands, 2)
-        else:
-            return xdata
+        (transform, src_bands) = self._band_transform(bands)
+        data = self.image.read_subimage(rows, cols, src_bands)
+        return self._apply(transform, data)
 
     def read_datum(self, i, j, k):
-        return self.read_pixel(i, j)[k]
+        return self.read_pixels([i], [j], [k])[0, 0]
+
+    def read_band(self, band):
+        '''Returns an `MxN` array of a single transformed band.'''
+        return self._read_blocks([band])[:, :, 0]
 
     def read_bands(self, bands):
-        shape = (self.image.nrows, self.image.ncols, len(bands))
-        data = numpy.zeros(shape, float)
-        for i in range(shape[0]):
-            for j in range(shape[1]):
-                data[i, j] = self.read_pixel(i, j)[bands]
-        return data
+        '''Returns an `MxNxL` array of the transformed `bands`.
+
+        Only the rows of the transform matrix for `bands` are applied to
+        each block of source data, so reading a few bands requires a single
+        pass over the source image.
+        '''
+        return self._read_blocks(list(bands))
 
 class MemmapFile(object):
     '''Interface class for SpyFile subclasses using `numpy.memmap` objects.'''
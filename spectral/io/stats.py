@@ -0,0 +1,322 @@
+#########################################################################
+#
+#   stats.py - This file is part of the Spectral Python (SPy) package.
+#
+#   Copyright (C) 2001-2010 Thomas Boggs
+#
+#   Spectral Python is free software; you can redistribute it and/
+#   or modify it under the terms of the GNU General Public License
+#   as published by the Free Software Foundation; either version 2
+#   of the License, or (at your option) any later version.
+#
+#   Spectral Python is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this software; if not, write to
+#
+#               Free Software Foundation, Inc.
+#               59 Temple Place, Suite 330
+#               Boston, MA 02111-1307
+#               USA
+#
+#########################################################################
+#
+# Send comments to:
+# Thomas Boggs, tboggs@users.sourceforge.net
+#
+
+'''
+Band statistics stored in sidecar files next to image files.
+
+Per-band statistics (min, max, mean, standard deviation, and a histogram) and,
+optionally, the mean vector and covariance of an image can be saved to a
+sidecar file so they do not have to be recomputed from the image data:
+
+    >>> from spectral.io.stats import write_stats
+    >>> img = spectral.open_image('92AV3C.lan')
+    >>> stats = write_stats(img)
+
+For an image file "<name>.<ext>" (e.g., an ENVI "<name>.img" file with a
+"<name>.hdr" header), the sidecar file is "<name>.sta.npz". A sidecar is only
+used while the size and modification time of the image file (and the image
+shape, data type, and scale factor) are unchanged.
+
+Depending on `spectral.settings.stats_sidecar`, :func:`spectral.calc_stats`
+(and, therefore, :func:`spectral.principal_components`) and
+:func:`spectral.get_rgb_meta` use the statistics in a valid sidecar for images
+that are not masked.
+'''
+
+from __future__ import division, print_function, unicode_literals
+
+import os
+
+import numpy as np
+
+_SIDECAR_EXT = '.sta.npz'
+
+
+class ImageStats(object):
+    '''Statistics of the bands of an image.
+
+    For an image with `B` bands, the following members are defined:
+
+        `nsamples` (int):
+
+            Number of pixels in the image.
+
+        `min`, `max`, `mean`, `std` (length-`B` ndarrays):
+
+            Band minimum, maximum, mean, and standard deviation.
+
+        `bin_edges` (`Bx(K+1)` ndarray):
+
+            Edges of the `K` histogram bins of each band.
+
+        `hist` (`BxK` ndarray):
+
+            Histogram counts for each band (non-finite values are not
+            counted).
+
+        `cov` (`BxB` ndarray or None):
+
+            Covariance of the image bands (None if it was not computed).
+    '''
+    def __init__(self, nsamples, min, max, mean, std, bin_edges, hist,
+                 cov=None):
+        self.nsamples = nsamples
+        self.min = min
+        self.max = max
+        self.mean = mean
+        self.std = std
+        self.bin_edges = bin_edges
+        self.hist = hist
+        self.cov = cov
+
+    def cdf_points(self, band, cdf_vals):
+        '''Returns band values corresponding to the band's CDF values.
+
+        This is the histogram-based equivalent of
+        :func:`spectral.algorithms.spymath.get_histogram_cdf_points`. Values
+        are interpolated within histogram bins.
+        '''
+        counts = self.hist[band]
+        edges = self.bin_edges[band]
+        cum = np.cumsum(counts)
+        N = cum[-1]
+        points = []
+        for x in cdf_vals:
+            if x <= 0 or x >= 1:
+                points.append(self.min[band] if x <= 0 else self.max[band])
+                continue
+            k = x * (N - 1)
+            i = min(int(np.searchsorted(cum, k, side='right')),
+                    len(counts) - 1)
+            before = cum[i - 1] if i > 0 else 0
+            frac = (k - before + 0.5) / counts[i] if counts[i] > 0 else 0.
+            value = edges[i] + min(max(frac, 0.), 1.) * (edges[i + 1] -
+                                                          edges[i])
+            points.append(min(max(value, self.min[band]), self.max[band]))
+        return points
+
+    def gaussian_stats(self):
+        '''Returns a :class:`~spectral.GaussianStats` object for the image.'''
+        from spectral.algorithms.algorithms import GaussianStats
+        if self.cov is None:
+            raise ValueError('Covariance was not computed for the image.')
+        return GaussianStats(mean=self.mean, cov=self.cov,
+                             nsamples=self.nsamples)
+
+
+def stats_filename(image):
+    '''Returns the name of the stats sidecar file for `image` (or None).
+
+    Only images that read all data from an image file have a sidecar (e.g.,
+    not sub-images, virtual images, or in-memory arrays).
+    '''
+    from .spyfile import SpyFile, SubImage
+    if not isinstance(image, SpyFile) or isinstance(image, SubImage) or \
+      not image.filename:
+        return None
+    return os.path.splitext(image.filename)[0] + _SIDECAR_EXT
+
+
+def _stats_key(image):
+    '''Returns a string identifying the image data summarized in a sidecar.
+    '''
+    st = os.stat(image.filename)
+    mtime = getattr(st, 'st_mtime_ns', None)
+    if mtime is None:
+        mtime = int(st.st_mtime * 1e9)
+    return '%d:%d:%d:%s:%s:%r' % (st.st_size, mtime, image.offset,
+                                  'x'.join(str(n) for n in image.shape),
+                                  np.dtype(image.dtype).str,
+                                  float(image.scale_factor))
+
+
+def compute_stats(image, bins=1024, cov=True):
+    '''Computes band statistics of an image by streaming its data.
+
+    Arguments:
+
+        `image` (:class:`~spectral.SpyFile`):
+
+            The image for which to compute statistics.
+
+        `bins` (int, default 1024):
+
+            Number of histogram bins per band.
+
+        `cov` (bool, default True):
+
+            Whether to compute the covariance of the bands.
+
+    Returns:
+
+        :class:`ImageStats`
+
+    Data are read in blocks of rows (see :meth:`~spectral.SpyFile.iter_blocks`)
+    in two passes: the first computes everything but the histograms, whose
+    bin ranges are set from the band limits, and the second computes the
+    histograms.
+    '''
+    import spectral
+    B = image.shape[2]
+    N = image.shape[0] * image.shape[1]
+    (vmin, vmax) = (np.full(B, np.inf), np.full(B, -np.inf))
+    sums = np.zeros(B)
+    sumsq = np.zeros(B)
+    XX = np.zeros((B, B)) if cov else None
+
+    status = spectral._status
+    status.display_percentage('Calculating band statistics...')
+    for (rows, data) in image.iter_blocks(prefetch=1):
+        X = np.asarray(data, dtype=np.float64).reshape((-1, B))
+        vmin = np.fmin(vmin, X.min(axis=0))
+        vmax = np.fmax(vmax, X.max(axis=0))
+        sums += X.sum(axis=0)
+        if cov:
+            XX += X.T.dot(X)
+        else:
+            sumsq += np.einsum('ij,ij->j', X, X)
+        status.update_percentage(50. * rows.stop / image.shape[0])
+    mean = sums / N
+    if cov:
+        C = (XX - N * np.outer(mean, mean)) / max(N - 1, 1)
+        std = np.sqrt(np.maximum(np.diag(C), 0))
+    else:
+        C = None
+        std = np.sqrt(np.maximum(sumsq / N - mean**2, 0) * N /
+                      max(N - 1, 1))
+
+    lo = np.where(np.isfinite(vmin), vmin, 0.)
+    hi = np.where(np.isfinite(vmax), vmax, 0.)
+    width = np.where(hi > lo, (hi - lo) / bins, 1.)
+    edges = lo[:, np.newaxis] + width[:, np.newaxis] * np.arange(bins + 1)
+    hist = np.zeros(B * bins, dtype=np.int64)
+    offsets = np.arange(B) * bins
+    for (rows, data) in image.iter_blocks(prefetch=1):
+        X = np.asarray(data, dtype=np.float64).reshape((-1, B))
+        i = np.floor((X - lo) / width)
+        finite = np.isfinite(i)
+        i = np.clip(np.where(finite, i, 0), 0, bins - 1).astype(np.int64)
+        hist += np.bincount((i + offsets)[finite], minlength=B * bins)
+        status.update_percentage(50. + 50. * rows.stop / image.shape[0])
+    status.end_percentage()
+    return ImageStats(N, vmin, vmax, mean, std, edges,
+                      hist.reshape((B, bins)), C)
+
+
+def write_stats(image, bins=1024, cov=True):
+    '''Computes band statistics of an image and saves them in its sidecar.
+
+    Arguments and return value are the same as for :func:`compute_stats`.
+
+    Raises:
+
+        ValueError if `image` can not have a sidecar (see
+        :func:`stats_filename`).
+    '''
+    import tempfile
+    filename = stats_filename(image)
+    if filename is None:
+        raise ValueError('Statistics sidecars are only supported for images '
+                         'read from a single image file.')
+    key = _stats_key(image)
+    stats = compute_stats(image, bins=bins, cov=cov)
+    arrays = dict(key=np.array(key), nsamples=np.array(stats.nsamples),
+                  min=stats.min, max=stats.max, mean=stats.mean,
+                  std=stats.std, bin_edges=stats.bin_edges, hist=stats.hist)
+    if stats.cov is not None:
+        arrays['cov'] = stats.cov
+    # Write to a temporary file first so readers never see a partial file.
+    (fd, tmpname) = tempfile.mkstemp(dir=os.path.dirname(filename) or '.',
+                                     suffix=_SIDECAR_EXT)
+    try:
+        with os.fdopen(fd, 'wb') as fout:
+            np.savez(fout, **arrays)
+        getattr(os, 'replace', os.rename)(tmpname, filename)
+    except:
+        os.remove(tmpname)
+        raise
+    return stats
+
+
+def read_stats(image, cov=False):
+    '''Returns the statistics in the image's sidecar (or None).
+
+    Arguments:
+
+        `image` (:class:`~spectral.SpyFile`):
+
+            The image for which to read statistics.
+
+        `cov` (bool, default False):
+
+            Whether the covariance is required.
+
+    Returns:
+
+        :class:`ImageStats` or None if there is no sidecar for the image, the
+        sidecar is out of date, or `cov` is True and the sidecar does not
+        contain the covariance.
+    '''
+    filename = stats_filename(image)
+    if filename is None or not os.path.isfile(filename):
+        return None
+    try:
+        with np.load(filename) as data:
+            if str(data['key']) != _stats_key(image) or \
+              (cov and 'cov' not in data):
+                return None
+            return ImageStats(int(data['nsamples']), data['min'],
+                              data['max'], data['mean'], data['std'],
+                              data['bin_edges'], data['hist'],
+                              data['cov'] if 'cov' in data else None)
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+
+
+def get_stats(image, cov=False):
+    '''Returns sidecar statistics according to `settings.stats_sidecar`.
+
+    If the setting is "read", the statistics in a valid sidecar are returned
+    (or None). If it is "write", a missing or out-of-date sidecar is also
+    (re)written, unless the image can not have one. For any other value,
+    None is returned.
+    '''
+    from spectral import settings
+    mode = settings.stats_sidecar
+    if mode not in ('read', 'write') or stats_filename(image) is None:
+        return None
+    stats = read_stats(image, cov=cov)
+    if stats is None and mode == 'write':
+        try:
+            stats = write_stats(image, cov=cov)
+        except (IOError, OSError):
+            # E.g., the image directory is not writable.
+            stats = compute_stats(image, cov=cov)
+    return stats
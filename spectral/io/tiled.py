@@ -0,0 +1,708 @@
+#########################################################################
+#
+#   tiled.py - This file is part of the Spectral Python (SPy) package.
+#
+#   Copyright (C) 2001-2010 Thomas Boggs
+#
+#   Spectral Python is free software; you can redistribute it and/
+#   or modify it under the terms of the GNU General Public License
+#   as published by the Free Software Foundation; either version 2
+#   of the License, or (at your option) any later version.
+#
+#   Spectral Python is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this software; if not, write to
+#
+#               Free Software Foundation, Inc.
+#               59 Temple Place, Suite 330
+#               Boston, MA 02111-1307
+#               USA
+#
+#########################################################################
+#
+# Send comments to:
+# Thomas Boggs, tboggs@users.sourceforge.net
+#
+
+'''
+Functions for reading and writing tiled, compressed image files.
+
+A tiled image file stores an image as a grid of tiles, each of which spans a
+block of rows, columns, and bands and is compressed independently with one of
+the standard library codecs ("zlib", "bz2", or "lzma"). Reading a region of
+the image only decompresses the tiles that the region overlaps:
+
+    >>> from spectral.io import tiled
+    >>> tiled.save_image('92AV3C.spt', open_image('92AV3C.lan'))
+    >>> img = tiled.open('92AV3C.spt')
+    >>> band = img.read_band(100)
+
+ENVI images can be converted with :func:`convert_envi` and
+:func:`spectral.io.envi.save_image` writes tiled data files when given the
+`compression` keyword. The file layout is:
+
+    ==================   ======================================================
+    Item                 Description
+    ==================   ======================================================
+    Magic                8 bytes (``SPYTILE1``)
+    Tiles                Compressed tile data
+    Header               UTF-8 JSON (shape, dtype, tiles, codec, metadata, ...)
+    Index                Little-endian uint64 (offset, size) of each tile
+    Footer               uint64 header offset, uint64 header size, magic
+    ==================   ======================================================
+
+Each tile holds the values of its rows, columns, and bands in BIP order.
+Tiles are indexed in order of tile row, tile column, then tile band.
+'''
+
+from __future__ import division, print_function, unicode_literals
+
+from spectral.utilities.python23 import IS_PYTHON3
+
+if IS_PYTHON3:
+    import builtins
+else:
+    import __builtin__ as builtins
+
+import json
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .spyfile import SpyFile, InvalidFileError, _write_output
+
+_MAGIC = b'SPYTILE1'
+_FOOTER_SIZE = 24
+CODECS = ('zlib', 'bz2', 'lzma')
+DEFAULT_TILE_SHAPE = (64, 64, 32)
+
+
+def _codec(name):
+    '''Returns the standard library module for a compression codec.'''
+    if name not in CODECS:
+        raise ValueError('Invalid codec "%s". Must be one of %s.'
+                         % (name, ', '.join(CODECS)))
+    import importlib
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise ValueError('The "%s" codec is not available.' % name)
+
+
+class TiledFile(SpyFile):
+    '''A SpyFile for tiled, compressed image files.
+
+    All `read_*` methods decompress only the tiles overlapped by the request.
+    Recently used tiles are kept in memory (up to approximately
+    `spectral.settings.stream_block_bytes` of decompressed data), so
+    repeated small reads from the same area do not decompress tiles again.
+    '''
+    def __init__(self, params, metadata=None):
+        import spectral
+        SpyFile.__init__(self, params, metadata)
+        self.interleave = spectral.BIP
+        self.tile_shape = tuple(params.tile_shape)
+        self.codec = params.codec
+        self.shuffle = params.shuffle
+        self._index = params.index
+        self._ntiles = [-(-n // t) for (n, t) in zip(self.shape,
+                                                    self.tile_shape)]
+        self._decompress = _codec(self.codec).decompress
+        self._tiles = OrderedDict()
+        self._tiles_nbytes = 0
+        self._tiles_lock = threading.Lock()
+
+    def __str__(self):
+        s = SpyFile.__str__(self)
+        s += '\n\tTiles:        %s (%s)' % ('x'.join(str(n) for n in
+                                                     self.tile_shape),
+                                          self.codec)
+        return s
+
+    def _tile(self, i, j, k):
+        '''Returns the decompressed tile at tile row `i`, column `j`, band `k`.
+        '''
+        import spectral
+        key = (i, j, k)
+        with self._tiles_lock:
+            tile = self._tiles.pop(key, None)
+            if tile is not None:
+                self._tiles[key] = tile
+                return tile
+        n = (i * self._ntiles[1] + j) * self._ntiles[2] + k
+        (offset, nbytes) = self._index[n]
+        data = self._decompress(self._read_bytes(int(offset), int(nbytes)))
+        shape = tuple(min(t, s - m * t) for (t, s, m) in
+                      zip(self.tile_shape, self.shape, key))
+        dtype = np.dtype(self.dtype)
+        if self.shuffle and dtype.itemsize > 1:
+            tile = np.frombuffer(data, dtype=np.uint8)
+            tile = tile.reshape((dtype.itemsize, -1)).T.copy().view(dtype)
+        else:
+            tile = np.frombuffer(data, dtype=dtype)
+        tile = tile.reshape(shape)
+        capacity = spectral.settings.stream_block_bytes
+        with self._tiles_lock:
+            if key not in self._tiles:
+                self._tiles[key] = tile
+                self._tiles_nbytes += tile.nbytes
+            while self._tiles_nbytes > capacity and len(self._tiles) > 1:
+                self._tiles_nbytes -= self._tiles.popitem(last=False)[1].nbytes
+        return tile
+
+    def _group(self, indices, dim):
+        '''Yields (tile number, positions, tile-local indices) for `dim`.'''
+        t = self.tile_shape[dim]
+        tiles = indices // t
+        for n in np.unique(tiles):
+            positions = np.nonzero(tiles == n)[0]
+            yield (int(n), positions, indices[positions] - n * t)
+
+    def _indices(self, indices, dim):
+        indices = np.asarray(indices, dtype=np.int64).ravel()
+        n = self.shape[dim]
+        if np.any(indices >= n) or np.any(indices < -n):
+            raise IndexError('Index out of range.')
+        return np.where(indices < 0, indices + n, indices)
+
+    def _read(self, rows, cols, bands):
+        '''Returns the raw `MxNxL` array for the given index arrays.'''
+        rows = self._indices(rows, 0)
+        cols = self._indices(cols, 1)
+        if bands is None:
+            bands = np.arange(self.nbands)
+        bands = self._indices(bands, 2)
+        arr = np.empty((len(rows), len(cols), len(bands)), dtype=self.dtype)
+        for (i, ri, rl) in self._group(rows, 0):
+            for (j, ci, cl) in self._group(cols, 1):
+                for (k, bi, bl) in self._group(bands, 2):
+                    tile = self._tile(i, j, k)
+                    arr[np.ix_(ri, ci, bi)] = tile[np.ix_(rl, cl, bl)]
+        return arr
+
+    def read_band(self, band, out=None, dtype=None):
+        '''Reads a single band from the image.
+
+        Arguments:
+
+            `band` (int):
+
+                Index of band to read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxN` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `MxN` array of values for the specified band.
+        '''
+        arr = self._read(np.arange(self.nrows), np.arange(self.ncols),
+                         [band])[:, :, 0]
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
+
+    def read_bands(self, bands, out=None, dtype=None):
+        '''Reads multiple bands from the image.
+
+        Arguments:
+
+            `bands` (list of ints):
+
+                Indices of bands to read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `MxNxL` array of values for the specified bands. `M` and `N`
+                are the number of rows & columns in the image and `L` equals
+                len(`bands`).
+        '''
+        arr = self._read(np.arange(self.nrows), np.arange(self.ncols),
+                         list(bands))
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
+
+    def read_pixel(self, row, col, out=None, dtype=None):
+        '''Reads the pixel at position (row,col) from the file.
+
+        Arguments:
+
+            `row`, `col` (int):
+
+                Indices of the row & column for the pixel
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional length-`B` array into which the data are written.
+                If given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                A length-`B` array, where `B` is the number of image bands.
+        '''
+        arr = self._read([row], [col], None)[0, 0]
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
+
+    def read_pixels(self, rows, cols, bands=None, out=None, dtype=None):
+        '''Reads the pixels at multiple (row, col) positions from the file.
+
+        Arguments:
+
+            `rows`, `cols` (sequences of ints):
+
+                Row & column indices of the `N` pixels to read. Both must have
+                the same length.
+
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `NxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `NxL` array, where `L` = len(`bands`) (or # of image bands
+                if `bands` == None).
+
+        Pixels are grouped by tile, so each tile is decompressed at most once.
+        '''
+        (rows, cols, bands) = self._pixel_indices(rows, cols, bands)
+        if bands is None:
+            bands = np.arange(self.nbands)
+        arr = np.empty((len(rows), len(bands)), dtype=self.dtype)
+        (th, tw) = self.tile_shape[:2]
+        keys = (rows // th) * self._ntiles[1] + cols // tw
+        for key in np.unique(keys):
+            pi = np.nonzero(keys == key)[0]
+            (i, j) = divmod(int(key), self._ntiles[1])
+            (rl, cl) = (rows[pi] - i * th, cols[pi] - j * tw)
+            for (k, bi, bl) in self._group(bands, 2):
+                tile = self._tile(i, j, k)
+                arr[np.ix_(pi, bi)] = tile[rl, cl][:, bl]
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
+
+    def read_subregion(self, row_bounds, col_bounds, bands=None, out=None,
+                       dtype=None):
+        '''
+        Reads a contiguous rectangular sub-region from the image.
+
+        Arguments:
+
+            `row_bounds` (2-tuple of ints):
+
+                (a, b) -> Rows a through b-1 will be read.
+
+            `col_bounds` (2-tuple of ints):
+
+                (a, b) -> Columnss a through b-1 will be read.
+
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `MxNxL` array.
+        '''
+        arr = self._read(np.arange(*row_bounds), np.arange(*col_bounds),
+                         bands)
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
+
+    def read_subimage(self, rows, cols, bands=None, out=None, dtype=None):
+        '''
+        Reads arbitrary rows, columns, and bands from the image.
+
+        Arguments:
+
+            `rows` (list of ints):
+
+                Indices of rows to read.
+
+            `cols` (list of ints):
+
+                Indices of columns to read.
+
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array. If the image has a scale
+                factor, values are scaled as they are converted.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `MxNxL` array, where `M` = len(`rows`), `N` = len(`cols`),
+                and `L` = len(bands) (or # of image bands if `bands` == None).
+        '''
+        arr = self._read(rows, cols, bands)
+        return _write_output(arr, out, dtype, self.scale_factor, copy=False)
+
+    def read_datum(self, i, j, k):
+        '''Reads the band `k` value for pixel at row `i` and column `j`.
+
+        Arguments:
+
+            `i`, `j`, `k` (integer):
+
+                Row, column and band index, respectively.
+        '''
+        return self._read([i], [j], [k])[0, 0, 0] / self.scale_factor
+
+    def load(self, **kwargs):
+        '''Loads entire image into memory in a :class:`spectral.ImageArray`.
+
+        Keyword Arguments:
+
+            `dtype` (numpy.dtype):
+
+                An optional dtype to which the loaded array should be cast.
+
+            `scale` (bool, default True):
+
+                Specifies whether any applicable scale factor should be applied
+                to the data after loading.
+        '''
+        from spectral.spectral import ImageArray
+        for k in list(kwargs.keys()):
+            if k not in ('dtype', 'scale'):
+                raise ValueError('Invalid keyword %s.' % str(k))
+        dtype = kwargs.get('dtype', ImageArray.format)
+        scale = self.scale_factor if kwargs.get('scale', True) else 1
+        arr = self._read(np.arange(self.nrows), np.arange(self.ncols), None)
+        return ImageArray(_write_output(arr, None, dtype, scale), self)
+
+    def _rows_per_block(self, bands=None):
+        '''Returns the default number of rows read per block (whole tiles).'''
+        import spectral
+        th = self.tile_shape[0]
+        row_bytes = self.ncols * self.nbands * self.sample_size
+        n = int(spectral.settings.stream_block_bytes // (row_bytes * th))
+        return max(1, n) * th
+
+
+def read_header(filename):
+    '''Returns the JSON header dict and tile index array of a tiled file.
+
+    Raises:
+
+        InvalidFileError if the file is not a tiled image file.
+    '''
+    import os
+    from .spyfile import find_file_path
+
+    with builtins.open(find_file_path(filename), 'rb') as fin:
+        if fin.read(len(_MAGIC)) != _MAGIC:
+            raise InvalidFileError('File is not a tiled image file.')
+        fin.seek(-_FOOTER_SIZE, os.SEEK_END)
+        footer = fin.read(_FOOTER_SIZE)
+        if footer[16:] != _MAGIC:
+            raise InvalidFileError('Tiled image file is incomplete.')
+        (offset, nbytes) = struct.unpack('<QQ', footer[:16])
+        fin.seek(offset)
+        header = json.loads(fin.read(nbytes).decode('utf-8'))
+        ntiles = int(np.prod([-(-n // t) for (n, t) in
+                              zip(header['shape'], header['tile_shape'])]))
+        index = np.frombuffer(fin.read(16 * ntiles), dtype='<u8')
+    return (header, index.reshape((ntiles, 2)))
+
+
+def open(file, metadata=None):
+    '''
+    Returns a :class:`TiledFile` object for a tiled image file.
+
+    Arguments:
+
+        `file` (str):
+
+            Name of the tiled image file.
+
+        `metadata` (dict):
+
+            Optional metadata to use instead of the metadata stored in the
+            file (e.g., the parameters of an associated ENVI header).
+
+    Returns:
+
+        :class:`TiledFile`
+
+    Raises:
+
+        spectral.io.spyfile.InvalidFileError
+    '''
+    import spectral
+    from .spyfile import find_file_path
+
+    class Params:
+        pass
+    p = Params()
+    p.filename = find_file_path(file)
+    (header, p.index) = read_header(p.filename)
+    (p.nrows, p.ncols, p.nbands) = header['shape']
+    p.dtype = np.dtype(header['dtype']).str
+    byteorder = np.dtype(p.dtype).byteorder
+    if byteorder in '=|':
+        p.byte_order = spectral.byte_order
+    else:
+        p.byte_order = 1 if byteorder == '>' else 0
+    p.offset = 0
+    p.tile_shape = header['tile_shape']
+    p.codec = header['codec']
+    p.shuffle = header.get('shuffle', False)
+    if metadata is None:
+        metadata = header.get('metadata', {})
+    img = TiledFile(p, metadata)
+    img.scale_factor = float(metadata.get('reflectance scale factor', 1.0))
+    if 'wavelength' in metadata:
+        try:
+            img.bands.centers = [float(b) for b in metadata['wavelength']]
+        except:
+            pass
+    if 'fwhm' in metadata:
+        try:
+            img.bands.bandwidths = [float(f) for f in metadata['fwhm']]
+        except:
+            pass
+    img.bands.band_unit = metadata.get('wavelength units', None)
+    return img
+
+
+def _to_json(obj):
+    '''Converts numpy values in metadata for the JSON header.'''
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return str(obj)
+
+
+def _write_tiled(filename, read_rows, shape, dtype, metadata, codec='zlib',
+                 level=None, shuffle=True, tile_shape=DEFAULT_TILE_SHAPE):
+    '''Writes a tiled image file from blocks of rows returned by `read_rows`.
+
+    `read_rows(start, stop)` must return an array of shape
+    `(stop - start, C, B)` (see `envi._prepared_data_and_metadata`).
+    '''
+    compress = _codec(codec).compress
+    if len(tile_shape) != 3 or min(tile_shape) < 1:
+        raise ValueError('`tile_shape` must be a 3-tuple of positive ints.')
+    tile_shape = [int(min(t, n)) for (t, n) in zip(tile_shape, shape)]
+    (R, C, B) = shape
+    (th, tw, tb) = tile_shape
+    dtype = np.dtype(dtype)
+
+    def encode(tile):
+        tile = np.ascontiguousarray(tile, dtype=dtype)
+        if shuffle and dtype.itemsize > 1:
+            # Group bytes by significance, which usually compresses better.
+            tile = tile.reshape(-1).view(np.uint8).reshape((-1,
+                                                            dtype.itemsize))
+            tile = np.ascontiguousarray(tile.T)
+        data = tile.tostring()
+        if level is None:
+            return compress(data)
+        elif codec == 'lzma':
+            return compress(data, preset=level)
+        return compress(data, level)
+
+    index = []
+    fout = builtins.open(filename, 'wb')
+    try:
+        fout.write(_MAGIC)
+        offset = len(_MAGIC)
+        for r in range(0, R, th):
+            block = np.asarray(read_rows(r, min(r + th, R)))
+            block = block.reshape((-1, C, B))
+            for c in range(0, C, tw):
+                for b in range(0, B, tb):
+                    data = encode(block[:, c: c + tw, b: b + tb])
+                    fout.write(data)
+                    index.append((offset, len(data)))
+                    offset += len(data)
+        header = {'shape': [R, C, B], 'dtype': dtype.str,
+                  'tile_shape': tile_shape, 'codec': codec,
+                  'shuffle': bool(shuffle), 'metadata': metadata}
+        header = json.dumps(header, default=_to_json).encode('utf-8')
+        fout.write(header)
+        fout.write(np.array(index, dtype='<u8').tostring())
+        fout.write(struct.pack('<QQ', offset, len(header)) + _MAGIC)
+    finally:
+        fout.close()
+
+
+def save_image(filename, image, **kwargs):
+    '''
+    Saves an image to a tiled image file.
+
+    Arguments:
+
+        `filename` (str):
+
+            Name of the file to create.
+
+        `image` (SpyFile object or numpy.ndarray):
+
+            The image to save.
+
+    Keyword Arguments:
+
+        `codec` (str, default "zlib"):
+
+            Compression codec: "zlib", "bz2", or "lzma".
+
+        `level` (int):
+
+            Compression level (or "preset" for "lzma"). If not specified, the
+            codec's default is used.
+
+        `tile_shape` (3-tuple of ints, default (64, 64, 32)):
+
+            Numbers of rows, columns, and bands in each tile.
+
+        `shuffle` (bool, default True):
+
+            Whether bytes of multi-byte values are grouped by significance
+            before compression, which usually improves compression.
+
+        `dtype` (numpy dtype or type string):
+
+            The data type with which to store the image.
+
+        `byteorder` (int or string):
+
+            Byte order of the stored values (see
+            :func:`spectral.io.envi.save_image`). Native by default.
+
+        `metadata` (dict):
+
+            Additional ENVI-style header parameters to store in the file.
+
+        `force` (bool, default False):
+
+            Whether an existing file should be overwritten.
+
+    As for :func:`spectral.io.envi.save_image`, values are stored without
+    applying the source image's scale factor, which is retained in the file's
+    metadata.
+    '''
+    import os
+    from . import envi
+    if os.path.isfile(filename) and not kwargs.get('force', False):
+        raise envi.EnviException('File %s already exists. Use `force` '
+                                 'keyword to force overwrite.' % filename)
+    options = dict((k, v) for (k, v) in kwargs.items()
+                   if k not in ('interleave', 'ext'))
+    (read_rows, metadata) = envi._prepared_data_and_metadata(filename, image,
+                                                             **options)
+    metadata.pop('interleave', None)
+    _save_prepared(filename, read_rows, metadata, **kwargs)
+
+
+def _save_prepared(filename, read_rows, metadata, **kwargs):
+    '''Writes a tiled file for the outputs of `_prepared_data_and_metadata`.
+    '''
+    from .envi import envi_to_dtype
+    shape = [int(metadata[k]) for k in ('lines', 'samples', 'bands')]
+    dtype = np.dtype(envi_to_dtype[str(metadata['data type'])])
+    dtype = dtype.newbyteorder('>' if int(metadata['byte order']) == 1
+                               else '<')
+    metadata = dict((k, v) for (k, v) in metadata.items()
+                    if k not in ('file type', 'header offset'))
+    options = dict((k, kwargs[k]) for k in ('codec', 'level', 'shuffle',
+                                             'tile_shape') if k in kwargs)
+    _write_tiled(filename, read_rows, shape, dtype, metadata, **options)
+
+
+def convert_envi(src_hdr, filename, **kwargs):
+    '''Converts an ENVI image to a tiled image file.
+
+    Arguments:
+
+        `src_hdr` (str or :class:`~spectral.SpyFile`):
+
+            Header file name of the ENVI image or an open image.
+
+        `filename` (str):
+
+            Name of the tiled image file to create.
+
+    Keyword Arguments:
+
+        Any keyword accepted by :func:`save_image`.
+
+    Returns:
+
+        :class:`TiledFile` object for the new file.
+
+    The image is read in blocks of rows, so images larger than available
+    memory can be converted.
+    '''
+    from . import envi
+    if isinstance(src_hdr, SpyFile):
+        src = src_hdr
+    else:
+        src = envi.open(src_hdr)
+    save_image(filename, src, **kwargs)
+    return open(filename)
@@ -0,0 +1,734 @@
+#########################################################################
+#
+#   virtual.py - This file is part of the Spectral Python (SPy) package.
+#
+#   Copyright (C) 2001-2010 Thomas Boggs
+#
+#   Spectral Python is free software; you can redistribute it and/
+#   or modify it under the terms of the GNU General Public License
+#   as published by the Free Software Foundation; either version 2
+#   of the License, or (at your option) any later version.
+#
+#   Spectral Python is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this software; if not, write to
+#
+#               Free Software Foundation, Inc.
+#               59 Temple Place, Suite 330
+#               Boston, MA 02111-1307
+#               USA
+#
+#########################################################################
+#
+# Send comments to:
+# Thomas Boggs, tboggs@users.sourceforge.net
+#
+
+'''
+Virtual images composed of other images.
+
+A virtual image provides the :class:`~spectral.SpyFile` interface for data
+that are held by several other image objects. Reads are forwarded to the
+constituent images, so no data are copied until they are requested.
+'''
+
+from __future__ import division, print_function, unicode_literals
+
+import numpy as np
+
+from spectral.spectral import BandInfo
+from .spyfile import SpyFile
+
+
+def _read_dtype(image):
+    '''Returns the dtype of values returned by the read methods of `image`.'''
+    dtype = np.dtype(image.dtype)
+    if getattr(image, 'scale_factor', 1) != 1:
+        # Reads divide file values by the scale factor.
+        dtype = np.true_divide(np.zeros(1, dtype), 1.0).dtype
+    return dtype
+
+
+class VirtualImage(SpyFile):
+    '''Base class for images whose data are read from other images.
+
+    Subclasses must call `_init_virtual` from their constructor and
+    implement the `read_*` methods.
+    '''
+    def _init_virtual(self, images, shape, dtype, metadata):
+        import copy
+        import spectral
+
+        self.images = images
+        self.nrows, self.ncols, self.nbands = shape
+        self.shape = shape
+        self.dtype = np.dtype(dtype).str
+        self.metadata = metadata
+        self.filename = None
+        self.offset = 0
+        self.byte_order = spectral.byte_order
+        self.swap = 0
+        self.sample_size = np.dtype(dtype).itemsize
+        self.scale_factor = 1.0
+        interleaves = set(getattr(img, 'interleave', spectral.BIP)
+                          for img in images)
+        if len(interleaves) == 1:
+            self.interleave = interleaves.pop()
+        else:
+            self.interleave = spectral.BIP
+        bands = getattr(images[0], 'bands', None)
+        self.bands = copy.deepcopy(bands) if bands is not None else BandInfo()
+
+    def _output_array(self, shape, out, dtype):
+        '''Returns `out` (after validation) or a new array of `shape`.'''
+        if out is None:
+            return np.empty(shape, dtype=dtype or self.dtype)
+        if out.shape != shape:
+            raise ValueError('`out` array has shape %s but shape %s is '
+                             'required.' % (out.shape, shape))
+        if dtype is not None and np.dtype(dtype) != out.dtype:
+            raise ValueError('`dtype` does not match the dtype of `out`.')
+        return out
+
+    def read_band(self, band, out=None, dtype=None):
+        '''Reads a single band from the image.
+
+        Arguments:
+
+            `band` (int):
+
+                Index of band to read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxN` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `MxN` array of values for the specified band.
+        '''
+        if out is not None:
+            self.read_subregion((0, self.nrows), (0, self.ncols), [band],
+                                out=out[:, :, np.newaxis], dtype=dtype)
+            return out
+        return self.read_subregion((0, self.nrows), (0, self.ncols), [band],
+                                   dtype=dtype)[:, :, 0]
+
+    def read_bands(self, bands, out=None, dtype=None):
+        '''Reads multiple bands from the image.
+
+        Arguments:
+
+            `bands` (list of ints):
+
+                Indices of bands to read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `MxNxL` array of values for the specified bands.
+        '''
+        return self.read_subregion((0, self.nrows), (0, self.ncols),
+                                   list(bands), out=out, dtype=dtype)
+
+    def read_pixel(self, row, col, out=None, dtype=None):
+        '''Reads the pixel at position (row,col).
+
+        Returns a length-`B` array, where `B` is the number of image bands.
+        `out` and `dtype` have the same meaning as for `read_band`.
+        '''
+        data = self.read_subregion((row, row + 1), (col, col + 1),
+                                   dtype=dtype)[0, 0]
+        if out is None:
+            return data
+        out[:] = data
+        return out
+
+    def read_datum(self, i, j, k):
+        '''Reads the band `k` value for pixel at row `i` and column `j`.'''
+        return self.read_subregion((i, i + 1), (j, j + 1), [k])[0, 0, 0]
+
+    def load(self, **kwargs):
+        '''Loads entire image into memory in a :class:`spectral.ImageArray`.
+
+        Keyword Arguments:
+
+            `dtype` (numpy.dtype):
+
+                An optional dtype to which the loaded array should be cast.
+
+            `scale` (bool, default True):
+
+                Specifies whether any scale factors of the constituent images
+                should be applied to the data after loading.
+        '''
+        from spectral.spectral import ImageArray
+
+        for k in list(kwargs.keys()):
+            if k not in ('dtype', 'scale'):
+                raise ValueError('Invalid keyword %s.' % str(k))
+        dtype = kwargs.get('dtype', ImageArray.format)
+        if kwargs.get('scale', True) is False and \
+          any(getattr(img, 'scale_factor', 1) != 1 for img in self.images):
+            data = self._load_unscaled(dtype)
+        else:
+            data = self.read_subregion((0, self.nrows), (0, self.ncols),
+                                       dtype=dtype)
+        return ImageArray(data, self)
+
+    def _load_unscaled(self, dtype):
+        raise NotImplementedError('Must override _load_unscaled in child '
+                                  'class.')
+
+    def params(self):
+        '''Return an object containing the image parameters.'''
+        from spectral.spectral import Image
+        p = Image.params(self)
+        p.filename = self.filename
+        p.offset = self.offset
+        p.byte_order = self.byte_order
+        p.sample_size = self.sample_size
+        return p
+
+    def __del__(self):
+        # There is no file to close.
+        pass
+
+
+class VirtualMosaic(VirtualImage):
+    '''A mosaic of co-registered images joined along rows or columns.
+
+    The mosaic provides the :class:`~spectral.SpyFile` interface for a scene
+    that is stored as several image segments (e.g., the segments of a flight
+    line). Each read is forwarded to the segments that contain the requested
+    data, which use their memmaps when available, so algorithms that stream
+    data from images can be applied to the scene without copying it.
+    '''
+    def __init__(self, images, axis=0):
+        '''Creates a mosaic of the given images.
+
+        Arguments:
+
+            `images` (list):
+
+                The :class:`~spectral.SpyFile` (or
+                :class:`~spectral.ImageArray`) segments, in order. All images
+                must have the same number of bands and the same number of
+                columns (rows) when joined along rows (columns).
+
+            `axis` (int, default 0):
+
+                The axis along which the images are joined: 0 to join them
+                along rows (one below the other) or 1 to join them along
+                columns (side by side).
+
+        Raises:
+
+            ValueError if the images do not have compatible shapes.
+
+        The data type of the mosaic is the common type of the values read from
+        the segments. Any scale factor of a segment is applied when values are
+        read from it, so the mosaic itself has no scale factor. Band info and
+        metadata are taken from the first image.
+        '''
+        images = list(images)
+        if len(images) == 0:
+            raise ValueError('At least one image is required.')
+        if axis not in (0, 1):
+            raise ValueError('`axis` must be 0 (rows) or 1 (columns).')
+        other = 1 - axis
+        shape0 = images[0].shape
+        for img in images[1:]:
+            if img.shape[2] != shape0[2] or img.shape[other] != shape0[other]:
+                raise ValueError('Image of shape %s can not be joined to an '
+                                 'image of shape %s along axis %d.'
+                                 % (img.shape, shape0, axis))
+        self.axis = axis
+        self._starts = np.cumsum([0] + [img.shape[axis] for img in images])
+        shape = list(shape0)
+        shape[axis] = int(self._starts[-1])
+        dtype = np.result_type(*[_read_dtype(img) for img in images])
+        metadata = dict(getattr(images[0], 'metadata', None) or {})
+        for (key, n) in (('lines', shape[0]), ('samples', shape[1])):
+            if key in metadata:
+                metadata[key] = str(n)
+        self._init_virtual(images, tuple(shape), dtype, metadata)
+
+    def __str__(self):
+        s = '\tVirtualMosaic of %d images joined along %s:\n' % \
+            (len(self.images), ('rows', 'columns')[self.axis])
+        s += '\t# Rows:         %6d\n' % (self.nrows)
+        s += '\t# Samples:      %6d\n' % (self.ncols)
+        s += '\t# Bands:        %6d\n' % (self.nbands)
+        s += '\tData format:  %8s' % np.dtype(self.dtype).name
+        return s
+
+    def _split(self, bounds):
+        '''Yields the parts of a range along the mosaic axis in each image.
+
+        Items yielded are 3-tuples (`image`, `local_bounds`, `out_slice`),
+        where `local_bounds` is the range within `image` and `out_slice`
+        is the corresponding slice of the requested range.
+        '''
+        (start, stop) = bounds
+        if start < 0 or stop > self._starts[-1] or start > stop:
+            raise IndexError('Mosaic index out of range.')
+        for (k, img) in enumerate(self.images):
+            (first, last) = (self._starts[k], self._starts[k + 1])
+            (a, b) = (max(start, first), min(stop, last))
+            if a < b:
+                yield (img, (int(a - first), int(b - first)),
+                       slice(int(a - start), int(b - start)))
+
+    def _locate(self, indices):
+        '''Returns (segment numbers, local indices) for indices on the axis.
+        '''
+        indices = np.asarray(indices, dtype=np.int64)
+        if np.any(indices < 0) or np.any(indices >= self._starts[-1]):
+            raise IndexError('Mosaic index out of range.')
+        k = np.searchsorted(self._starts, indices, side='right') - 1
+        return (k, indices - self._starts[k])
+
+    def read_subregion(self, row_bounds, col_bounds, bands=None, out=None,
+                       dtype=None):
+        '''
+        Reads a contiguous rectangular sub-region from the image.
+
+        Arguments:
+
+            `row_bounds` (2-tuple of ints):
+
+                (a, b) -> Rows a through b-1 will be read.
+
+            `col_bounds` (2-tuple of ints):
+
+                (a, b) -> Columnss a through b-1 will be read.
+
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `MxNxL` array.
+        '''
+        bounds = [tuple(row_bounds), tuple(col_bounds)]
+        nbands = self.nbands if bands is None else len(bands)
+        out = self._output_array((bounds[0][1] - bounds[0][0],
+                                  bounds[1][1] - bounds[1][0], nbands),
+                                 out, dtype)
+        for (img, local, s) in self._split(bounds[self.axis]):
+            bounds[self.axis] = local
+            if self.axis == 0:
+                view = out[s]
+            else:
+                view = out[:, s]
+            img.read_subregion(bounds[0], bounds[1], bands, out=view)
+        return out
+
+    def read_subimage(self, rows, cols, bands=None, out=None, dtype=None):
+        '''
+        Reads arbitrary rows, columns, and bands from the image.
+
+        Arguments:
+
+            `rows` (list of ints):
+
+                Indices of rows to read.
+
+            `cols` (list of ints):
+
+                Indices of columns to read.
+
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `MxNxL` array, where `M` = len(`rows`), `N` = len(`cols`),
+                and `L` = len(bands) (or # of image bands if `bands` == None).
+        '''
+        indices = [list(rows), list(cols)]
+        nbands = self.nbands if bands is None else len(bands)
+        out = self._output_array((len(indices[0]), len(indices[1]), nbands),
+                                 out, dtype)
+        (k, local) = self._locate(indices[self.axis])
+        for n in np.unique(k):
+            i = np.nonzero(k == n)[0]
+            indices[self.axis] = list(local[i])
+            data = self.images[n].read_subimage(indices[0], indices[1], bands)
+            if self.axis == 0:
+                out[i] = data
+            else:
+                out[:, i] = data
+        return out
+
+    def read_pixels(self, rows, cols, bands=None, out=None, dtype=None):
+        '''Reads the pixels at multiple (row, col) positions.
+
+        Arguments:
+
+            `rows`, `cols` (sequences of ints):
+
+                Row & column indices of the `N` pixels to read. Both must have
+                the same length.
+
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `NxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `NxL` array, where `L` = len(`bands`) (or # of image bands
+                if `bands` == None).
+
+        Pixels are read from each segment with a single call to its
+        `read_pixels` method.
+        '''
+        (rows, cols, bands) = self._pixel_indices(rows, cols, bands)
+        nbands = self.nbands if bands is None else len(bands)
+        out = self._output_array((len(rows), nbands), out, dtype)
+        indices = [rows, cols]
+        (k, local) = self._locate(indices[self.axis])
+        for n in np.unique(k):
+            i = np.nonzero(k == n)[0]
+            (r, c) = (rows[i], cols[i])
+            if self.axis == 0:
+                r = local[i]
+            else:
+                c = local[i]
+            out[i] = self.images[n].read_pixels(r, c, bands)
+        return out
+
+    def _load_unscaled(self, dtype):
+        parts = [np.asarray(img.load(dtype=dtype, scale=False))
+                 if isinstance(img, SpyFile) else np.asarray(img, dtype)
+                 for img in self.images]
+        return np.concatenate(parts, axis=self.axis)
+
+
+def _merge_band_info(images):
+    '''Returns a :class:`BandInfo` for the concatenated bands of `images`.
+
+    List members are concatenated if they are defined for all images (with
+    one value per band). Other members are retained if equal for all images.
+    '''
+    info = BandInfo()
+    infos = [getattr(img, 'bands', None) or BandInfo() for img in images]
+    for name in ('centers', 'bandwidths', 'centers_stdevs',
+                 'bandwidth_stdevs'):
+        values = [getattr(b, name) for b in infos]
+        if all(v is not None and len(v) == img.shape[2]
+               for (v, img) in zip(values, images)):
+            setattr(info, name, sum((list(v) for v in values), []))
+    for name in ('band_quantity', 'band_unit'):
+        values = set(getattr(b, name) for b in infos)
+        if len(values) == 1:
+            setattr(info, name, values.pop())
+    return info
+
+
+class BandStack(VirtualImage):
+    '''A stack of the bands of several co-registered images.
+
+    The stack presents images with the same numbers of rows and columns
+    (e.g., VNIR and SWIR cubes of a scene, or derived layers) as a single
+    image whose bands are the bands of the first image, followed by those
+    of the second image, and so on. Reads only request the bands needed from
+    each image, so no data are copied until they are read.
+    '''
+    def __init__(self, images):
+        '''Creates a band stack of the given images.
+
+        Arguments:
+
+            `images` (list):
+
+                The :class:`~spectral.SpyFile`,
+                :class:`~spectral.ImageArray`, or
+                :class:`~spectral.TransformedImage` objects to stack. All
+                images must have the same numbers of rows and columns.
+
+        Raises:
+
+            ValueError if the images do not have the same spatial shape.
+
+        The data type of the stack is the common type of the values read from
+        the images. Band info of the images is merged (see `bands`) and
+        metadata are taken from the first image, with per-band metadata
+        lists concatenated when all images define them.
+        '''
+        images = list(images)
+        if len(images) == 0:
+            raise ValueError('At least one image is required.')
+        for img in images[1:]:
+            if img.shape[:2] != images[0].shape[:2]:
+                raise ValueError('Image of shape %s can not be stacked with '
+                                 'an image of shape %s.'
+                                 % (img.shape, images[0].shape))
+        self._band_starts = np.cumsum([0] + [img.shape[2] for img in images])
+        shape = tuple(images[0].shape[:2]) + (int(self._band_starts[-1]),)
+        dtype = np.result_type(*[_read_dtype(img) for img in images])
+        metadatas = [getattr(img, 'metadata', None) or {} for img in images]
+        metadata = dict(metadatas[0])
+        metadata['bands'] = str(shape[2])
+        for key in ('wavelength', 'fwhm', 'bbl', 'band names'):
+            if all(isinstance(m.get(key), list) and
+                   len(m[key]) == img.shape[2]
+                   for (m, img) in zip(metadatas, images)):
+                metadata[key] = sum((list(m[key]) for m in metadatas), [])
+            else:
+                metadata.pop(key, None)
+        self._init_virtual(images, shape, dtype, metadata)
+        self.bands = _merge_band_info(images)
+
+    def __str__(self):
+        s = '\tBandStack of %d images:\n' % len(self.images)
+        s += '\t# Rows:         %6d\n' % (self.nrows)
+        s += '\t# Samples:      %6d\n' % (self.ncols)
+        s += '\t# Bands:        %6d\n' % (self.nbands)
+        s += '\tData format:  %8s' % np.dtype(self.dtype).name
+        return s
+
+    def _split_bands(self, bands):
+        '''Yields (`image`, `local_bands`, `positions`) for each source.
+
+        `local_bands` are the bands to read from `image` (None for all of
+        them) and `positions` are the indices of those bands in `bands`.
+        '''
+        if bands is None:
+            bands = np.arange(self.nbands)
+        else:
+            bands = np.asarray(bands, dtype=np.int64).ravel()
+            if np.any(bands < 0) or np.any(bands >= self.nbands):
+                raise IndexError('Band index out of range.')
+        k = np.searchsorted(self._band_starts, bands, side='right') - 1
+        for n in np.unique(k):
+            positions = np.nonzero(k == n)[0]
+            img = self.images[n]
+            local = bands[positions] - self._band_starts[n]
+            if len(local) == img.shape[2] and \
+              np.array_equal(local, np.arange(len(local))):
+                local = None
+            else:
+                local = [int(b) for b in local]
+            yield (img, local, positions)
+
+    def _gather(self, out, bands, read):
+        '''Fills the last axis of `out` with `read(image, bands, out)` calls.
+
+        `read` is called with an array view to fill for images that accept
+        an `out` argument and the requested bands are contiguous in `out`.
+        Otherwise, it is called with None and must return the data.
+        '''
+        from spectral.spectral import ImageArray
+        for (img, local, positions) in self._split_bands(bands):
+            contiguous = positions[-1] - positions[0] + 1 == len(positions)
+            if contiguous and isinstance(img, (SpyFile, ImageArray)):
+                read(img, local, out[..., positions[0]: positions[-1] + 1])
+            else:
+                data = np.asarray(read(img, local, None))
+                out[..., positions] = data.reshape(out.shape[:-1] + (-1,))
+        return out
+
+    def read_subregion(self, row_bounds, col_bounds, bands=None, out=None,
+                       dtype=None):
+        '''
+        Reads a contiguous rectangular sub-region from the image.
+
+        Arguments:
+
+            `row_bounds` (2-tuple of ints):
+
+                (a, b) -> Rows a through b-1 will be read.
+
+            `col_bounds` (2-tuple of ints):
+
+                (a, b) -> Columnss a through b-1 will be read.
+
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `MxNxL` array.
+
+        Only the requested bands are read from each image.
+        '''
+        nbands = self.nbands if bands is None else len(bands)
+        out = self._output_array((row_bounds[1] - row_bounds[0],
+                                  col_bounds[1] - col_bounds[0], nbands),
+                                 out, dtype)
+
+        def read(img, b, view):
+            if view is None:
+                return img.read_subregion(row_bounds, col_bounds, b)
+            return img.read_subregion(row_bounds, col_bounds, b, out=view)
+        return self._gather(out, bands, read)
+
+    def read_subimage(self, rows, cols, bands=None, out=None, dtype=None):
+        '''
+        Reads arbitrary rows, columns, and bands from the image.
+
+        Arguments:
+
+            `rows` (list of ints):
+
+                Indices of rows to read.
+
+            `cols` (list of ints):
+
+                Indices of columns to read.
+
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `MxNxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `MxNxL` array, where `M` = len(`rows`), `N` = len(`cols`),
+                and `L` = len(bands) (or # of image bands if `bands` == None).
+        '''
+        (rows, cols) = (list(rows), list(cols))
+        nbands = self.nbands if bands is None else len(bands)
+        out = self._output_array((len(rows), len(cols), nbands), out, dtype)
+
+        def read(img, b, view):
+            if view is None:
+                return img.read_subimage(rows, cols, b)
+            return img.read_subimage(rows, cols, b, out=view)
+        return self._gather(out, bands, read)
+
+    def read_pixels(self, rows, cols, bands=None, out=None, dtype=None):
+        '''Reads the pixels at multiple (row, col) positions.
+
+        Arguments:
+
+            `rows`, `cols` (sequences of ints):
+
+                Row & column indices of the `N` pixels to read. Both must have
+                the same length.
+
+            `bands` (list of ints):
+
+                Optional list of bands to read.  If not specified, all bands
+                are read.
+
+            `out` (:class:`numpy.ndarray`, default None):
+
+                An optional `NxL` array into which the data are written. If
+                given, `out` is returned.
+
+            `dtype` (numpy dtype, default None):
+
+                Data type of the returned array.
+
+        Returns:
+
+           :class:`numpy.ndarray`
+
+                An `NxL` array, where `L` = len(`bands`) (or # of image bands
+                if `bands` == None).
+        '''
+        from spectral.algorithms.algorithms import _read_pixels
+        (rows, cols, bands) = self._pixel_indices(rows, cols, bands)
+        nbands = self.nbands if bands is None else len(bands)
+        out = self._output_array((len(rows), nbands), out, dtype)
+
+        def read(img, b, view):
+            if view is not None:
+                return img.read_pixels(rows, cols, b, out=view)
+            elif hasattr(img, 'read_pixels'):
+                return img.read_pixels(rows, cols, b)
+            data = _read_pixels(img, rows, cols)
+            return data if b is None else data[:, b]
+        return self._gather(out, bands, read)
+
+    def _load_unscaled(self, dtype):
+        parts = [np.asarray(img.load(dtype=dtype, scale=False))
+                 if isinstance(img, SpyFile) else np.asarray(img.load(), dtype)
+                 for img in self.images]
+        return np.concatenate(parts, axis=2)
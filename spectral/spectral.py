@@ -59,12 +59,40 @@ class SpySettings:
             to lower case. If this attribute is set to True, parameters will
             be read with original capitalization retained.
 
+        `envi_header_cache_size` (int, default 1000):
+
+            Maximum number of parsed ENVI headers retained in memory. A header
+            file is only parsed again if its modification time or size has
+            changed since it was cached. Set this to 0 to disable caching.
+
+        `catalog_file` (str, default None):
+
+            Name of the SQLite database of a :class:`spectral.io.catalog.Catalog`.
+            If set, catalog IDs and queries can be passed to
+            :func:`spectral.open_image` and :func:`spectral.io.envi.open`.
+
+        `stats_sidecar` (str, default "read"):
+
+            Specifies how band statistics sidecar files (see
+            :mod:`spectral.io.stats`) are used by :func:`spectral.calc_stats`
+            (and by :func:`spectral.get_rgb`, if called with `use_stats=True`)
+            for unmasked images read from files. If "read", statistics are
+            read from valid sidecars. If "write", missing or out-of-date
+            sidecars are also written when statistics are computed. For any
+            other value (e.g., None), sidecars are not used.
+
         `show_progress` (bool, default True):
     
             Indicates whether long-running algorithms should display progress
             to sys.stdout. It can be useful to set this value to False when
             SPy is embedded in another application (e.g., IPython Notebook).
 
+        `stream_block_bytes` (int, default 2**25):
+
+            Approximate number of bytes of file data read for each block when
+            image data are streamed in blocks of rows (e.g., by
+            :meth:`~spectral.SpyFile.iter_blocks`) and no block size is given.
+
         `imshow_figure_size` (2-tuple of integers, default `None`):
 
             Width and height (in inches) of windows opened with `imshow`. If
@@ -135,9 +163,21 @@ class SpySettings:
 
     envi_support_nonlowercase_params = False
 
+    # Number of parsed ENVI headers to keep (0 disables the cache).
+    envi_header_cache_size = 1000
+
+    # Image catalog used to resolve catalog IDs and queries (None for none).
+    catalog_file = None
+
+    # Use of band statistics sidecar files ("read", "write", or None).
+    stats_sidecar = 'read'
+
     # Should algorithms show completion progress of algorithms?
     show_progress = True
 
+    # Approximate size of blocks read when streaming image data from files.
+    stream_block_bytes = 2**25
+
     # imshow settings
     imshow_figure_size = None
     imshow_background_color = (0, 0, 0)
@@ -354,21 +394,39 @@ class ImageArray(numpy.ndarray, Image):
     def _parent_getitem(self, args):
         return numpy.ndarray.__getitem__(self, args)
 
-    def read_band(self, i):
+    def read_band(self, i, out=None, dtype=None):
         '''
         For compatibility with SpyFile objects. Returns arr[:,:,i].squeeze()
+
+        If `out` (an `MxN` array) or `dtype` is given, the band is copied to
+        a new or provided array with the requested type.
         '''
-        return numpy.asarray(self[:, :, i].squeeze())
+        data = numpy.asarray(self[:, :, i].squeeze())
+        return self._output(data, out, dtype)
 
-    def read_bands(self, bands):
+    def read_bands(self, bands, out=None, dtype=None):
         '''For SpyFile compatibility. Equivlalent to arr.take(bands, 2)'''
-        return numpy.asarray(self.take(bands, 2))
+        return self._output(numpy.asarray(self).take(bands, 2), out, dtype)
 
-    def read_pixel(self, row, col):
+    def read_pixel(self, row, col, out=None, dtype=None):
         '''For SpyFile compatibility. Equivlalent to arr[row, col]'''
-        return numpy.asarray(self[row, col])
+        return self._output(numpy.asarray(self[row, col]), out, dtype)
+
+    def read_pixels(self, rows, cols, bands=None, out=None, dtype=None):
+        '''
+        For SpyFile compatibility.
 
-    def read_subregion(self, row_bounds, col_bounds, bands=None):
+        Equivalent to arr[rows, cols][:, bands], selecting all bands if none
+        are specified.
+        '''
+        data = numpy.asarray(self)[numpy.asarray(rows, dtype=int),
+                                   numpy.asarray(cols, dtype=int)]
+        if bands is not None:
+            data = data[:, bands]
+        return self._output(data, out, dtype)
+
+    def read_subregion(self, row_bounds, col_bounds, bands=None, out=None,
+                       dtype=None):
         '''
         For SpyFile compatibility.
 
@@ -376,14 +434,15 @@ class ImageArray(numpy.ndarray, Image):
         selecting all bands if none are specified.
         '''
         if bands:
-            return numpy.asarray(self[slice(*row_bounds),
+            data = numpy.asarray(self[slice(*row_bounds),
                                       slice(*col_bounds),
                                       bands])
         else:
-            return numpy.asarray(self[slice(*row_bounds),
+            data = numpy.asarray(self[slice(*row_bounds),
                                       slice(*col_bounds)])
+        return self._output(data, out, dtype)
 
-    def read_subimage(self, rows, cols, bands=None):
+    def read_subimage(self, rows, cols, bands=None, out=None, dtype=None):
         '''
         For SpyFile compatibility.
 
@@ -391,9 +450,18 @@ class ImageArray(numpy.ndarray, Image):
         none are specified.
         '''
         if bands:
-            return numpy.asarray(self[rows][:, cols][:, :, bands])
+            data = numpy.asarray(self[rows][:, cols][:, :, bands])
         else:
-            return numpy.asarray(self[rows][:, cols])
+            data = numpy.asarray(self[rows][:, cols])
+        return self._output(data, out, dtype)
+
+    def _output(self, data, out, dtype):
+        '''Copies `data` to `out` (or a new `dtype` array) if either is given.
+        '''
+        if out is None and dtype is None:
+            return data
+        from .io.spyfile import _write_output
+        return _write_output(data, out, dtype)
 
     def read_datum(self, i, j, k):
         '''For SpyFile compatibility. Equivlalent to arr[i, j, k]'''
@@ -456,7 +524,8 @@ def open_image(file):
     Arguments:
 
         file (str):
-            Name of the file to open.
+            Name of the file to open. An ENVI catalog entry, ID, or query (see
+            :func:`spectral.io.envi.open`) can also be given.
 
     Returns:
 
@@ -474,8 +543,12 @@ def open_image(file):
     '''
 
     import os
-    from .io import aviris, envi, erdas, spyfile
+    from .io import aviris, envi, erdas, spyfile, tiled
     from .io.spyfile import find_file_path
+    from .io.catalog import CatalogEntry
+
+    if isinstance(file, (CatalogEntry, int, dict)):
+        return envi.open(file)
 
     pathname = find_file_path(file)
 
@@ -488,6 +561,12 @@ def open_image(file):
     except:
         raise
 
+    # Tiled image files are identified by their leading magic bytes.
+    try:
+        return tiled.open(pathname)
+    except spyfile.InvalidFileError:
+        pass
+
     # Maybe it's an Erdas Lan file
     try:
         return erdas.open(pathname)
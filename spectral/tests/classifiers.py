@@ -189,6 +189,67 @@ class ClassifierTest(SpyTest):
         assert(mdc.classify_spectrum(data[2, 2]) == \
                mdc.classify_image(data)[2, 2])
 
+    def test_unmix_msam_spyfile_ndarray_equal(self):
+        '''Unmixing & MSAM of a SpyFile and its data should be equal.'''
+        members = np.asarray(self.data[[10, 50, 90], [20, 60, 100]],
+                             dtype=np.float64)
+        mix = spy.unmix(self.image, members)
+        assert_allclose(mix[[10, 50, 90], [20, 60, 100]], np.eye(3),
+                        atol=1e-8)
+        assert_allclose(spy.unmix(self.data, members, dtype=np.float32), mix,
+                        rtol=1e-5, atol=1e-6)
+        scores = spy.msam(self.image, members)
+        assert_allclose(scores[[10, 50, 90], [20, 60, 100], [0, 1, 2]], 1.)
+        assert_allclose(spy.msam(self.data, members), scores, atol=1e-6)
+
+    def test_spectral_angles_best_k_and_class_map(self):
+        '''Best-k angles and SAM class maps agree with dense angles.'''
+        members = np.asarray(self.data[[10, 50, 90], [20, 60, 100]],
+                             dtype=np.float64)
+        angles = spy.spectral_angles(self.data, members)
+        assert_allclose(spy.spectral_angles(self.image, members), angles,
+                        atol=1e-6)
+        (indices, best) = spy.spectral_angles(self.image, members, k=2)
+        np.testing.assert_equal(indices[:, :, 0], np.argmin(angles, axis=-1))
+        assert_allclose(best, np.sort(angles, axis=-1)[:, :, :2], atol=1e-6)
+        classes = spy.spectral_angles(self.image, members, threshold=0.1)
+        np.testing.assert_equal(classes > 0, angles.min(axis=-1) <= 0.1)
+        np.testing.assert_equal(classes[classes > 0],
+                                indices[:, :, 0][classes > 0] + 1)
+
+    def test_constrained_unmix(self):
+        '''Constrained unmixing satisfies its constraints.'''
+        members = np.asarray(self.data[[10, 50, 90, 120], [20, 60, 100, 5]],
+                             dtype=np.float64)
+        data = self.data[:30, :30]
+        mix = spy.unmix(data, members, constraint='scls')
+        assert_allclose(mix.sum(axis=-1), 1.)
+        mix = spy.unmix(data, members, constraint='nnls')
+        assert(mix.min() >= 0)
+        # No perturbation of the abundances that stays feasible should
+        # reduce the squared residual.
+        X = np.asarray(data, dtype=np.float64)
+        def resid(m):
+            return ((m.dot(members) - X)**2).sum(axis=-1)
+        r0 = resid(mix)
+        for d in (1e-3, -1e-3):
+            for i in range(len(members)):
+                m = mix.copy()
+                m[:, :, i] = np.maximum(m[:, :, i] + d, 0)
+                assert(np.all(resid(m) >= r0 * (1 - 1e-12)))
+        fname = os.path.join(testdir, 'unmix_fcls.hdr')
+        out = spy.envi.create_image(fname, shape=self.image.shape[:2] + (4,),
+                                    dtype=np.float32, force=True)
+        mm = out.open_memmap(writable=True)
+        mix = spy.unmix(self.image, members, constraint='fcls', out=mm)
+        assert(mix is mm)
+        del mm
+        mix = np.asarray(spy.open_image(fname).load())
+        assert(mix.min() >= 0)
+        assert_allclose(mix.sum(axis=-1), 1., rtol=1e-6)
+        assert_allclose(spy.unmix(data, members, constraint='fcls'),
+                        mix[:30, :30], atol=1e-6)
+
 
 def run():
     print('\n' + '-' * 72)
@@ -77,6 +77,26 @@ class DimensionalityTest(SpyTest):
         p2 = spy.ppi(data, 2, start=p2)
         assert(np.all(p == p2))
 
+    def test_ppi_seeded_batched_parallel(self):
+        '''PPI with a seed does not depend on batch size or thread count.'''
+        data = self.data
+        p = spy.ppi(data, 20, random_state=3)
+        # Use small pixel chunks so that the chunks are spread over threads.
+        block_bytes = spy.settings.stream_block_bytes
+        spy.settings.stream_block_bytes = 2**16
+        try:
+            p2 = spy.ppi(data, 20, random_state=3, batch_size=7, n_jobs=2)
+        finally:
+            spy.settings.stream_block_bytes = block_bytes
+        assert(np.all(p == p2))
+        rs = np.random.RandomState(3)
+        p2 = spy.ppi(data, 12, random_state=rs, batch_size=5)
+        p2 = spy.ppi(data, 8, start=p2, random_state=rs)
+        assert(np.all(p == p2))
+        p = spy.ppi(data, 10, 10, random_state=4)
+        p2 = spy.ppi(data, 10, 10, random_state=4, batch_size=3, n_jobs=2)
+        assert(np.all(p == p2))
+
     def test_ppi_centered(self):
         '''Tests that ppi with mean-subtracted data works as expected.'''
         data = self.data
@@ -99,6 +119,103 @@ class DimensionalityTest(SpyTest):
         stats = spy.calc_stats(data)
         xdata = spy.principal_components(stats).transform(data)
 
+    def test_orthogonalize(self):
+        '''orthogonalize yields the Gram-Schmidt orthonormal basis.'''
+        vecs = np.asarray(self.data, dtype=np.float64)[10, 20:25]
+        basis = spy.orthogonalize(vecs)
+        assert_allclose(basis.dot(basis.T), np.eye(5), atol=1e-12)
+        # Each basis vector has a positive component along its vector.
+        assert(np.all(np.einsum('ij,ij->i', basis, vecs) > 0))
+        assert_allclose(spy.orthogonalize(np.vstack([basis[:2], vecs[2:]]),
+                                          start=2), basis, atol=1e-10)
+
+    def test_endmembers_find_pure_pixels(self):
+        '''ATGP, VCA & N-FINDR find pure pixels of a simulated image.'''
+        rs = np.random.RandomState(0)
+        (M, N, B, k) = (40, 50, 30, 4)
+        members = 1000 * rs.rand(k, B)
+        fractions = rs.dirichlet(0.5 * np.ones(k), size=M * N)
+        pure = rs.choice(M * N, k, replace=False)
+        fractions[pure] = np.eye(k)
+        data = fractions.dot(members).reshape((M, N, B))
+        data += 0.01 * rs.randn(M, N, B)
+        for (spectra, coords) in (spy.atgp(data, k),
+                                  spy.vca(data, k, random_state=0),
+                                  spy.nfindr(data, k)):
+            assert_allclose(spectra, data[coords[:, 0], coords[:, 1]])
+            indices = np.ravel_multi_index(coords.T, (M, N))
+            assert(sorted(indices) == sorted(pure))
+
+    def test_nfindr_default_init_many_seeds(self):
+        '''N-FINDR's default initialization always spans a simplex.'''
+        (M, N, B, k) = (30, 30, 20, 5)
+        for seed in range(40):
+            rs = np.random.RandomState(seed)
+            members = 1000 * rs.rand(k, B)
+            fractions = rs.dirichlet(0.5 * np.ones(k), size=M * N)
+            pure = rs.choice(M * N, k, replace=False)
+            fractions[pure] = np.eye(k)
+            data = fractions.dot(members).reshape((M, N, B))
+            data += 0.01 * rs.randn(M, N, B)
+            coords = spy.nfindr(data, k)[1]
+            indices = np.ravel_multi_index(coords.T, (M, N))
+            assert(sorted(indices) == sorted(pure))
+
+    def test_endmembers_spyfile_ndarray_equal(self):
+        '''Endmembers from a SpyFile and its loaded data are equal.'''
+        image = spy.open_image('92AV3C.lan')
+        block_bytes = spy.settings.stream_block_bytes
+        spy.settings.stream_block_bytes = 2**20
+        try:
+            for f in (spy.atgp, spy.nfindr):
+                (s1, c1) = f(image, 5)
+                (s2, c2) = f(self.data, 5)
+                assert(np.all(c1 == c2))
+                assert_allclose(s1, s2)
+        finally:
+            spy.settings.stream_block_bytes = block_bytes
+
+    def test_pca_spyfile_streamed_to_envi(self):
+        '''PCA of a SpyFile matches its data & streams reduced data to ENVI.'''
+        import os
+        from spectral.tests import testdir
+        if not os.path.isdir(testdir):
+            os.mkdir(testdir)
+        image = spy.open_image('92AV3C.lan')
+        sidecar = spy.settings.stats_sidecar
+        spy.settings.stats_sidecar = None
+        try:
+            pc = spy.principal_components(image)
+        finally:
+            spy.settings.stats_sidecar = sidecar
+        pc2 = spy.principal_components(self.data)
+        assert(np.all(np.diff(pc.eigenvalues) <= 0))
+        assert_allclose(pc.eigenvalues, pc2.eigenvalues, rtol=1e-8,
+                        atol=1e-8 * pc2.eigenvalues[0])
+        pc = pc.reduce(num=5)
+        fname = os.path.join(testdir, 'pca_reduced.hdr')
+        spy.envi.save_image(fname, pc.transform(image), force=True)
+        reduced = np.asarray(spy.open_image(fname).load())
+        expected = pc.transform(np.asarray(self.data, dtype=np.float64))
+        assert_allclose(reduced, expected, rtol=1e-6, atol=1e-6)
+
+    def test_mean_cov_of_single_pixel_fails(self):
+        '''Covariance of a file image with fewer than 2 pixels should fail.'''
+        from spectral.algorithms.algorithms import mean_cov
+        from spectral.io.spyfile import SubImage
+        image = spy.open_image('92AV3C.lan')
+        for (rows, cols) in (((3, 4), (5, 6)), ((3, 3), (5, 6))):
+            try:
+                mean_cov(SubImage(image, rows, cols))
+            except ValueError:
+                pass
+            else:
+                raise Exception('ValueError not raised for %d pixels.'
+                                % ((rows[1] - rows[0]) * (cols[1] - cols[0])))
+        (mean, cov, n) = mean_cov(SubImage(image, (3, 4), (5, 7)))
+        assert(n == 2 and np.all(np.isfinite(cov)))
+
+
 def run():
     print('\n' + '-' * 72)
     print('Running dimensionality tests.')
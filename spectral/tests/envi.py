@@ -114,6 +114,27 @@ class ENVIWriteTest(SpyTest):
         img = spectral.open_image(fname)
         assert_almost_equal(src[r, b, c], img[r, b, c])
 
+    def test_save_image_blocks(self):
+        '''Test saving an image that is written in multiple row blocks.'''
+        import os
+        import spectral
+        src = spectral.open_image('92AV3C.lan')
+        data = src.load()
+        transformed = spectral.transform_image(np.eye(data.shape[-1])[:5],
+                                               src)
+        block_bytes = spectral.settings.stream_block_bytes
+        spectral.settings.stream_block_bytes = 100000
+        try:
+            for interleave in ('bil', 'bip', 'bsq'):
+                fname = os.path.join(testdir, 'test_save_image_blocks_%s.hdr'
+                                     % interleave)
+                spectral.envi.save_image(fname, transformed, dtype='i2',
+                                         interleave=interleave)
+                img = spectral.open_image(fname)
+                assert(np.all(img.load() == data[:, :, :5]))
+        finally:
+            spectral.settings.stream_block_bytes = block_bytes
+
     def test_create_image_metadata(self):
         '''Test calling `envi.create_image` using a metadata dict.'''
         import os
@@ -165,6 +186,140 @@ class ENVIWriteTest(SpyTest):
         assert_almost_equal(img[r, b, c], datum)
         assert(img.offset == offset)
 
+    def test_create_image_byteorder(self):
+        '''Test creating an image with non-native byte order.'''
+        import os
+        import spectral
+        byteorder = 1 - spectral.byte_order
+        fname = os.path.join(testdir, 'test_create_image_byteorder.hdr')
+        img = spectral.envi.create_image(fname, shape=(5, 6, 7),
+                                         dtype=np.int16, byteorder=byteorder)
+        mm = img.open_memmap(writable=True)
+        mm[:] = np.arange(5 * 6 * 7).reshape(5, 6, 7)
+        mm.flush()
+        img = spectral.open_image(fname)
+        assert(img.byte_order == byteorder)
+        assert(np.all(img.load() == np.arange(5 * 6 * 7).reshape(5, 6, 7)))
+
+    def test_convert(self):
+        '''Test converting interleave, data type, and byte order.'''
+        import os
+        import spectral
+        src = spectral.open_image('92AV3C.lan')
+        data = src.load()
+        for (i, interleave) in enumerate(('bsq', 'bil', 'bip')):
+            fname = os.path.join(testdir, 'test_convert_%s.hdr' % interleave)
+            img = spectral.envi.convert(src, fname, interleave=interleave,
+                                        dtype=np.float32, byteorder=i % 2,
+                                        max_memory=100000)
+            assert(img.metadata['interleave'] == interleave)
+            assert(img.byte_order == i % 2)
+            assert(np.dtype(img.dtype).char == 'f')
+            assert(np.all(img.load() == data))
+
+    def test_materialize(self):
+        '''Materialized copies are native-order, scaled, and memmapped.'''
+        import spectral as spy
+        img = spy.open_image('92AV3C.lan')
+        fname = os.path.join(testdir, 'test_materialize_src.hdr')
+        spy.envi.save_image(fname, img[:20, :30, :10], dtype=np.int16,
+                            byteorder='big', interleave='bsq', force=True,
+                            metadata={'reflectance scale factor': 100})
+        src = spy.envi.open(fname)
+        dst = src.materialize(os.path.join(testdir, 'test_materialize.hdr'))
+        assert(dst.scale_factor == 1 and dst.byte_order == spy.byte_order)
+        assert(dst.using_memmap and np.dtype(dst.dtype) == np.float32)
+        assert_almost_equal(np.asarray(dst.load()), np.asarray(src.load()),
+                            decimal=5)
+        assert_almost_equal(dst[5, 5, 5], img[5, 5, 5] / 100., decimal=5)
+
+    def test_stats_sidecar(self):
+        '''Stats sidecars are used until the image file changes.'''
+        import spectral as spy
+        from spectral.io.stats import stats_filename, write_stats, read_stats
+        img = spy.open_image('92AV3C.lan')
+        fname = os.path.join(testdir, 'test_stats_sidecar.hdr')
+        spy.envi.save_image(fname, img[:20, :30, :10], force=True)
+        img = spy.envi.open(fname)
+        if os.path.isfile(stats_filename(img)):
+            os.remove(stats_filename(img))
+        assert(read_stats(img) is None)
+        stats = write_stats(img)
+        data = np.asarray(img.load(), dtype=np.float64).reshape((-1, 10))
+        assert_almost_equal(stats.min, data.min(axis=0))
+        assert_almost_equal(stats.std, data.std(axis=0, ddof=1))
+        assert(np.all(stats.hist.sum(axis=1) == 600))
+        assert_almost_equal(stats.cdf_points(3, [0, 1]),
+                            [data[:, 3].min(), data[:, 3].max()])
+        # calc_stats should now use the (modified) sidecar statistics.
+        np.savez(stats_filename(img), **dict(np.load(stats_filename(img)),
+                                             mean=np.zeros(10)))
+        assert(np.all(spy.calc_stats(img).mean == 0))
+        assert(np.any(spy.calc_stats(img, mask=np.ones((20, 30))).mean != 0))
+        # get_rgb uses the sidecar histograms only if asked to.
+        from spectral.algorithms.spymath import get_histogram_cdf_points
+        (stretch, bands) = ((0.1, 0.9), [0, 4, 9])
+        rgb_range = lambda **kw: spy.graphics.get_rgb_meta(
+            img, bands, stretch=stretch, stretch_all=True, **kw)[1]['rgb range']
+        assert_almost_equal(rgb_range(), [get_histogram_cdf_points(
+            data[:, b], stretch) for b in bands])
+        assert_almost_equal(rgb_range(use_stats=True),
+                            [stats.cdf_points(b, stretch) for b in bands])
+        spy.envi.save_image(fname, img[:20, :30, :10], force=True)
+        assert(read_stats(spy.envi.open(fname)) is None)
+
+    def test_save_image_tiled(self):
+        '''Tiled, compressed images should read the same as the source.'''
+        import spectral as spy
+        from spectral.io.tiled import TiledFile
+        data = np.arange(40 * 30 * 12, dtype=np.int16).reshape((40, 30, 12))
+        fname = os.path.join(testdir, 'test_save_image_tiled.hdr')
+        spy.envi.save_image(fname, data, compression='zlib', force=True,
+                            tile_shape=(16, 8, 5),
+                            metadata={'reflectance scale factor': 10.})
+        img = spy.open_image(fname)
+        assert(isinstance(img, TiledFile))
+        scaled = data / 10.
+        assert_almost_equal(np.asarray(img.load()), scaled, decimal=4)
+        assert_almost_equal(img.read_subregion((5, 37), (3, 20), [0, 11, 6]),
+                            scaled[5:37, 3:20][:, :, [0, 11, 6]])
+        assert_almost_equal(img.read_pixels([0, 39, 17], [29, 0, 8], [4, 9]),
+                            scaled[[0, 39, 17], [29, 0, 8]][:, [4, 9]])
+        assert_almost_equal(img.read_band(7, dtype=np.float64),
+                            scaled[:, :, 7])
+        img = spy.tiled.convert_envi(fname, fname[:-4] + '.spt',
+                                     codec='lzma', force=True)
+        assert_almost_equal(img.read_bands([2, 1]), scaled[:, :, [2, 1]])
+
+    def test_save_pc_image(self):
+        '''PC-compressed images should reconstruct their components.'''
+        import spectral as spy
+        from spectral.io.pcimage import PCCompressedImage
+        data = np.asarray(spy.open_image('92AV3C.lan')[:30, :20, :40],
+                          dtype=np.float64)
+        pc = spy.principal_components(data).reduce(num=5)
+        expected = pc.transform(data).dot(pc.eigenvectors.T) + pc.mean
+        fname = os.path.join(testdir, 'test_save_pc_image.hdr')
+        for quantization in ('int16', 'float16'):
+            spy.pcimage.save_pc_image(fname, data, pc=pc, force=True,
+                                      quantization=quantization)
+            h = spy.envi.read_envi_header(fname)
+            assert(h['pc quantization'] == quantization)
+            dtype = np.dtype(spy.envi.envi_to_dtype[h['data type']])
+            assert(dtype == {'int16': np.int16,
+                             'float16': np.uint16}[quantization])
+            assert(os.path.getsize(fname[:-4] + '.pcs') ==
+                   data.shape[0] * data.shape[1] * 5 * dtype.itemsize)
+            img = spy.open_image(fname)
+            assert(isinstance(img, PCCompressedImage))
+            assert(np.dtype(img.image.dtype) == np.dtype(quantization))
+            assert(img.shape == data.shape and img.scores.shape[2] == 5)
+            tol = np.abs(expected).max() * 1e-3
+            assert(np.abs(img.load() - expected).max() < tol)
+            assert(np.abs(img.read_pixel(7, 3) - expected[7, 3]).max() < tol)
+            stats = spy.calc_stats(img)
+            assert(np.abs(stats.mean - pc.mean).max() < tol)
+
     def test_save_invalid_dtype_fails(self):
         '''Should not be able to write unsupported data type to file.''' 
         import spectral as spy
@@ -299,6 +454,101 @@ class ENVIWriteTest(SpyTest):
             settings.envi_support_nonlowercase_params = orig
         assert('some Param' in h)
 
+    def test_read_header_multiline_lists(self):
+        '''Brace-delimited values may span lines and contain comments.'''
+        import spectral as spy
+        header = 'multiline_header.hdr'
+        open(header, 'w').write('ENVI\ndescription = {\n  Line one\n}\n'
+                                'wavelength = {1.0, 2.0,\n; comment\n'
+                                '  3.0}\nbands = 3\n')
+        h = spy.envi.read_envi_header(header)
+        assert(h['description'] == 'Line one')
+        assert(h['wavelength'] == ['1.0', '2.0', '3.0'])
+        assert(h['bands'] == '3')
+
+    def test_header_cache(self):
+        '''Cached headers are copied and refreshed when the file changes.'''
+        import spectral as spy
+        header = 'cached_header.hdr'
+        open(header, 'w').write(MIXED_CASE_HEADER)
+        h = spy.envi.read_envi_header(header)
+        h['bands'] = '1'
+        assert(spy.envi.read_envi_header(header)['bands'] == '220')
+        open(header, 'w').write(MIXED_CASE_HEADER + 'extra = 1\n')
+        assert(spy.envi.read_envi_header(header)['extra'] == '1')
+
+    def test_catalog(self):
+        '''Images indexed in a catalog open by ID or query.'''
+        import os
+        import spectral as spy
+        from spectral.io.catalog import Catalog, CatalogError
+        img = spy.open_image('92AV3C.lan')
+        catdir = os.path.join(testdir, 'catalog')
+        if not os.path.isdir(catdir):
+            os.makedirs(catdir)
+        for (i, interleave) in enumerate(('bil', 'bip')):
+            fname = os.path.join(catdir, 'test_catalog_%d.hdr' % i)
+            spy.envi.save_image(fname, img[:10, :20, :5], force=True,
+                                interleave=interleave)
+        cat = Catalog(':memory:')
+        counts = cat.scan(catdir)
+        assert(counts['added'] == 2)
+        assert(cat.scan(catdir)['unchanged'] == 2)
+        entry = cat.query(interleave='bip')[0]
+        assert(entry.shape == (10, 20, 5) and entry.dtype == np.dtype(img.dtype).str)
+        assert_almost_equal(np.asarray(cat.open(entry.id).load()),
+                            img[:10, :20, :5])
+        try:
+            cat.open({'nbands': 5})
+        except CatalogError:
+            pass
+        else:
+            raise Exception('Ambiguous catalog query failed to raise.')
+        os.remove(fname)
+        assert(cat.scan(catdir)['removed'] == 1 and len(cat) == 1)
+        catfile = os.path.join(testdir, 'test_catalog.sqlite')
+        with Catalog(catfile) as c:
+            c.scan(catdir)
+        spy.settings.catalog_file = catfile
+        try:
+            assert(spy.open_image({'interleave': 'bil'}).shape == (10, 20, 5))
+            # Changing the setting closes the previously opened catalog.
+            import sqlite3
+            from spectral.io.catalog import get_catalog
+            old = get_catalog()
+            spy.settings.catalog_file = ':memory:'
+            assert(get_catalog() is not old and len(get_catalog()) == 0)
+            try:
+                len(old)
+            except sqlite3.ProgrammingError:
+                pass
+            else:
+                raise Exception('Previous catalog was not closed.')
+        finally:
+            spy.settings.catalog_file = None
+
+    def test_catalog_nonrecursive_scan_keeps_subdirectories(self):
+        '''A non-recursive scan keeps entries indexed in subdirectories.'''
+        import os
+        import spectral as spy
+        from spectral.io.catalog import Catalog
+        img = spy.open_image('92AV3C.lan')
+        catdir = os.path.join(testdir, 'catalog_nonrecursive')
+        subdir = os.path.join(catdir, 'sub')
+        if not os.path.isdir(subdir):
+            os.makedirs(subdir)
+        for d in (catdir, subdir):
+            spy.envi.save_image(os.path.join(d, 'image.hdr'),
+                                img[:4, :5, :3], force=True)
+        cat = Catalog(':memory:')
+        assert(cat.scan(catdir)['added'] == 2)
+        counts = cat.scan(catdir, recursive=False)
+        assert(counts['removed'] == 0 and counts['unchanged'] == 1)
+        assert(len(cat) == 2)
+        # Only headers with the scanned extension are candidates for removal.
+        assert(cat.scan(catdir, ext='.hdrx')['removed'] == 0)
+        assert(len(cat) == 2)
+
     def test_missing_ENVI_in_header_fails(self):
         '''FileNotAnEnviHeader should be raised if "ENVI" not on first line.'''
         import os
@@ -125,6 +125,19 @@ class IteratorTest(SpyTest):
         itsum = np.sum(np.array([x for x in iterator(image, self.gt, cls)]), 0)
         assert_allclose(sum, itsum)
 
+    def test_iterator_spyfile_batches(self):
+        '''Iteration over SpyFile pixels in batches'''
+        from spectral.algorithms.algorithms import iterator
+        cls = 5
+        data = np.asarray(self.image.load())
+        it = iterator(self.image, self.gt, cls)
+        batches = list(it.iter_batches(batch_size=100))
+        assert len(batches) == int(np.ceil(it.get_num_elements() / 100.))
+        coords = np.vstack([c for (c, x) in batches])
+        pixels = np.vstack([x for (c, x) in batches])
+        assert_allclose(pixels, data[coords[:, 0], coords[:, 1]])
+        assert np.all(self.gt[coords[:, 0], coords[:, 1]] == cls)
+
 
 def run():
     print('\n' + '-' * 72)
@@ -162,6 +162,245 @@ class SpyFileTest(SpyTest):
                                             [1, j, 4, 7], use_memmap=False)
         assert_almost_equal(subimage[2, 1, k], self.value)
 
+    def test_read_band_out(self):
+        (i, j, k) = self.datum
+        out = np.empty(self.image.shape[:2], dtype=np.float32)
+        band = self.image.read_band(k, out=out)
+        assert band is out
+        assert_almost_equal(out[i, j], self.value)
+        band = self.image.read_band(k, use_memmap=False, dtype=np.float32)
+        assert band.dtype == np.float32
+        assert_almost_equal(band[i, j], self.value)
+
+    def test_read_pixel_out(self):
+        (i, j, k) = self.datum
+        out = np.empty(self.image.shape[2], dtype=np.float32)
+        assert self.image.read_pixel(i, j, out=out) is out
+        assert_almost_equal(out[k], self.value)
+
+    def test_read_pixels(self):
+        (i, j, k) = self.datum
+        rows = [i, 0, i, self.image.nrows - 1]
+        cols = [j, j, 0, self.image.ncols - 1]
+        data = self.image.read_pixels(rows, cols)
+        assert data.shape == (len(rows), self.image.nbands)
+        assert_almost_equal(data[0, k], self.value)
+        for (n, (r, c)) in enumerate(zip(rows, cols)):
+            assert np.array_equal(data[n], self.image.read_pixel(r, c))
+        data = self.image.read_pixels(rows, cols, [k, 0])
+        assert data.shape == (len(rows), 2)
+        assert_almost_equal(data[0, 0], self.value)
+
+    def test_read_pixels_limits_read_size(self):
+        import spectral
+        from spectral.io.spyfile import MemmapFile
+        if not isinstance(self.image, MemmapFile):
+            return
+        (M, N, B) = self.image.shape
+        (rows, cols) = [a.ravel() for a in np.indices((4, N))]
+        reads = []
+        read_bytes = self.image._read_bytes
+        def counting_read(offset, nbytes):
+            reads.append(nbytes)
+            return read_bytes(offset, nbytes)
+        block_bytes = spectral.settings.stream_block_bytes
+        spectral.settings.stream_block_bytes = 10000
+        self.image._read_bytes = counting_read
+        try:
+            data = self.image.read_pixels(rows, cols, use_memmap=False)
+        finally:
+            del self.image._read_bytes
+            spectral.settings.stream_block_bytes = block_bytes
+        assert max(reads) <= 10000
+        assert np.array_equal(data.reshape((4, N, B)),
+                              self.image.read_subregion((0, 4), (0, N)))
+
+    def test_virtual_mosaic(self):
+        from spectral.io.spyfile import SubImage
+        from spectral.io.virtual import VirtualMosaic
+        (i, j, k) = self.datum
+        (R, C, B) = self.image.shape
+        for axis in (0, 1):
+            cut = (i, j)[axis] - 2
+            if axis == 0:
+                parts = [SubImage(self.image, (0, cut), (0, C)),
+                         SubImage(self.image, (cut, R), (0, C))]
+            else:
+                parts = [SubImage(self.image, (0, R), (0, cut)),
+                         SubImage(self.image, (0, R), (cut, C))]
+            mosaic = VirtualMosaic(parts, axis=axis)
+            assert mosaic.shape == self.image.shape
+            assert_almost_equal(mosaic[i, j, k], self.value)
+            region = mosaic.read_subregion((i - 5, i + 5), (j - 5, j + 5))
+            assert np.array_equal(region, self.image.read_subregion(
+                (i - 5, i + 5), (j - 5, j + 5)))
+            data = mosaic.read_subimage([i, 0, i + 1], [j + 1, j], [0, k])
+            assert_almost_equal(data[0, 1, 1], self.value)
+            data = mosaic.read_pixels([0, i, R - 1], [C - 1, j, 0])
+            assert np.array_equal(data, self.image.read_pixels(
+                [0, i, R - 1], [C - 1, j, 0]))
+
+    def test_band_stack(self):
+        from spectral.io.virtual import BandStack
+        (i, j, k) = self.datum
+        B = self.image.nbands
+        stack = BandStack([self.image, self.image.load()])
+        assert stack.shape == self.image.shape[:2] + (2 * B,)
+        assert_almost_equal(stack[i, j, k + B], self.value)
+        data = stack.read_bands([k + B, 0, k])
+        assert_almost_equal(data[i, j, [0, 2]], [self.value] * 2)
+        data = stack.read_pixels([i, 0], [j, 0], [B + k, k])
+        assert_almost_equal(data[0], [self.value] * 2)
+        region = stack.read_subregion((i - 2, i + 2), (j - 2, j + 2))
+        assert np.array_equal(region[:, :, :B], region[:, :, B:])
+
+    def test_read_subregion_out(self):
+        (i, j, k) = self.datum
+        out = np.empty((14, 7, 2), dtype=np.float64)
+        self.image.read_subregion((i - 5, i + 9), (j - 3, j + 4), [0, k],
+                                  out=out)
+        assert_almost_equal(out[5, 3, 1], self.value)
+        self.image.read_subregion((i - 5, i + 9), (j - 3, j + 4), [0, k],
+                                  use_memmap=False, out=out)
+        assert_almost_equal(out[5, 3, 1], self.value)
+
+    def test_read_subimage_out(self):
+        (i, j, k) = self.datum
+        out = np.empty((4, 4, 3), dtype=np.float32)
+        self.image.read_subimage([0, 3, i, 5], [1, j, 4, 7], [3, 7, k],
+                                 out=out)
+        assert_almost_equal(out[2, 1, 2], self.value)
+
+    def test_iter_blocks(self):
+        (i, j, k) = self.datum
+        blocks = list(self.image.iter_blocks(rows_per_block=7, bands=[0, k]))
+        assert blocks[0][0] == slice(0, 7)
+        assert blocks[-1][0].stop == self.image.nrows
+        data = np.concatenate([b for (s, b) in blocks])
+        assert data.shape == self.image.shape[:2] + (2,)
+        assert_almost_equal(data[i, j, 1], self.value)
+
+    def test_iter_blocks_overlap(self):
+        (i, j, k) = self.datum
+        for (rows, core, block) in self.image.iter_blocks(rows_per_block=10,
+                                                          overlap=2):
+            assert block.shape[0] == rows.stop - rows.start
+            if rows.start <= i < rows.stop:
+                assert_almost_equal(block[i - rows.start, j, k], self.value)
+        (rows, core, block) = next(self.image.iter_blocks(rows_per_block=10,
+                                                          overlap=2))
+        assert rows == slice(0, 12) and core == slice(0, 10)
+
+    def test_iter_blocks_overlap_core_rows(self):
+        # Writing the core rows of each block by `core_slice` should write
+        # every row exactly once, even if the halo exceeds the block size.
+        (i, j, k) = self.datum
+        counts = np.zeros(self.image.nrows, dtype=int)
+        out = np.zeros(self.image.shape[:2])
+        for (rows, core, block) in self.image.iter_blocks(rows_per_block=3,
+                                                          bands=[k],
+                                                          overlap=5):
+            assert rows.start <= core.start < core.stop <= rows.stop
+            counts[core] += 1
+            out[core] = block[core.start - rows.start:
+                              core.stop - rows.start, :, 0]
+        assert np.all(counts == 1)
+        assert_almost_equal(out[i, j], self.value)
+
+    def test_iter_blocks_prefetch(self):
+        expected = list(self.image.iter_blocks(rows_per_block=9, overlap=1))
+        blocks = [(rows, core, block.copy()) for (rows, core, block) in
+                  self.image.iter_blocks(rows_per_block=9, overlap=1,
+                                         prefetch=2)]
+        assert len(blocks) == len(expected)
+        for ((r1, c1, b1), (r2, c2, b2)) in zip(blocks, expected):
+            assert r1 == r2 and c1 == c2
+            assert np.array_equal(b1, b2)
+
+    def test_concurrent_reads(self):
+        from multiprocessing.pool import ThreadPool
+        from spectral.io.spyfile import MemmapFile
+        (i, j, k) = self.datum
+        # Exercise the file (rather than memmap) reads.
+        if isinstance(self.image, MemmapFile):
+            kwargs = {'use_memmap': False}
+        else:
+            kwargs = {}
+        pixels = [(r, c) for r in range(i - 2, i + 3)
+                  for c in range(j - 2, j + 3)]
+        expected = [self.image.read_pixel(r, c, **kwargs)
+                    for (r, c) in pixels]
+        pool = ThreadPool(4)
+        try:
+            results = pool.map(lambda rc: self.image.read_pixel(*rc, **kwargs),
+                               pixels * 4)
+            regions = pool.map(lambda r: self.image.read_subregion(
+                (r, r + 3), (j - 2, j + 3), [k, 0], **kwargs),
+                               list(range(i - 4, i + 4)) * 2)
+        finally:
+            pool.close()
+            pool.join()
+        for (a, b) in zip(results, expected * 4):
+            assert np.array_equal(a, b)
+        for (n, r) in enumerate(list(range(i - 4, i + 4)) * 2):
+            assert np.array_equal(regions[n], self.image.read_subregion(
+                (r, r + 3), (j - 2, j + 3), [k, 0]))
+
+    def test_read_regions(self):
+        (i, j, k) = self.datum
+        regions = [((i - 5, i + 5), (j - 3, j + 2)),
+                   ((i - 2, i + 1), (j, j + 4), [k, 0]),
+                   ((0, 3), (0, 3), [k])]
+        for n_threads in (1, 3):
+            arrays = self.image.read_regions(regions, n_threads=n_threads)
+            assert len(arrays) == len(regions)
+            for (region, data) in zip(regions, arrays):
+                assert np.array_equal(data,
+                                      self.image.read_subregion(*region))
+        assert_almost_equal(arrays[1][2, 0, 0], self.value)
+
+    def test_read_regions_merges_nearby_regions(self):
+        (i, j, k) = self.datum
+        # Overlapping chips in two bands, given out of file order
+        regions = [((i + 1, i + 5), (j, j + 4), [k]),
+                   ((i, i + 4), (j, j + 4), [0]),
+                   ((i, i + 4), (j, j + 4), [k]),
+                   ((i + 1, i + 5), (j, j + 4), [0])]
+        reads = []
+        read_subregion = self.image.read_subregion
+        def counting_read(rows, cols, bands=None):
+            reads.append((rows, cols, bands))
+            return read_subregion(rows, cols, bands)
+        self.image.read_subregion = counting_read
+        try:
+            arrays = self.image.read_regions(regions, n_threads=1)
+        finally:
+            del self.image.read_subregion
+        assert len(reads) == 1
+        for (region, data) in zip(regions, arrays):
+            assert np.array_equal(data, self.image.read_subregion(*region))
+
+    def test_read_regions_reads_little_extra_data(self):
+        (M, N, B) = self.image.shape
+        # Chips on the same rows at opposite edges, and a staircase of
+        # row-overlapping chips.
+        regions = [((0, 4), (0, 4)), ((0, 4), (N - 4, N))]
+        regions += [((2 * n, 2 * n + 4), (3 * n, 3 * n + 4))
+                    for n in range(min(M, N) // 4)]
+        reads = []
+        read_subregion = self.image.read_subregion
+        def counting_read(rows, cols, bands=None):
+            reads.append((rows[1] - rows[0]) * (cols[1] - cols[0]))
+            return read_subregion(rows, cols, bands)
+        self.image.read_subregion = counting_read
+        try:
+            arrays = self.image.read_regions(regions, n_threads=1)
+        finally:
+            del self.image.read_subregion
+        for (region, data) in zip(regions, arrays):
+            assert np.array_equal(data, self.image.read_subregion(*region))
+        assert sum(reads) <= 2 * 16 * len(regions)
+
     def test_load(self):
         (i, j, k) = self.datum
         data = self.image.load()
@@ -158,6 +158,96 @@ class LinearTransformTest(SpyTest):
                             self.scalar * (self.pre + self.value)
                             + self.post)
 
+    def test_pre_matrix_multiply_post_out_chunked(self):
+        from spectral.algorithms.transforms import LinearTransform
+        (i, j, k) = self.datum
+        transform = LinearTransform(self.matrix, pre=self.pre,
+                                    post=self.post, dtype=np.float32)
+        data = np.asarray(self.image[i - 1: i + 2, j - 1: j + 2])
+        out = np.empty(data.shape, dtype=np.float64)
+        result = transform(data, out=out, chunk_size=2)
+        assert(result is out)
+        assert_almost_equal(out[1, 1, k] / (self.scalar * (self.pre +
+                                                            self.value)
+                                            + self.post), 1., decimal=6)
+
+    def test_transformed_image_reads(self):
+        from spectral.algorithms.transforms import LinearTransform
+        from spectral.io.spyfile import TransformedImage
+        (i, j, k) = self.datum
+        transform = LinearTransform(self.matrix[k - 2: k + 3], pre=self.pre,
+                                    post=self.post)
+        img = TransformedImage(transform, self.image)
+        expected = self.scalar * (self.pre + self.value) + self.post
+        assert_almost_equal(img[i, j, 2], expected)
+        assert_almost_equal(img.read_band(2)[i, j], expected)
+        assert_almost_equal(img.read_bands([4, 2])[i, j, 1], expected)
+        assert_almost_equal(img.load()[i, j, 2], expected)
+        assert_almost_equal(img.read_subregion((i, i + 2), (j - 1, j + 1),
+                                               [2])[0, 1, 0], expected)
+        assert_almost_equal(img.read_pixels([0, i], [0, j], [2])[1, 0],
+                            expected)
+
+    def test_transformed_image_scalar_vector_bias_bands(self):
+        from spectral.algorithms.transforms import LinearTransform
+        from spectral.io.spyfile import TransformedImage
+        (i, j, k) = self.datum
+        B = self.image.shape[2]
+        (pre, post) = (np.arange(B, dtype='f8'), 2. * np.arange(B))
+        transform = LinearTransform(self.scalar, pre=pre, post=post)
+        img = TransformedImage(transform, self.image)
+        expected = self.scalar * (pre[k] + self.value) + post[k]
+        bands = [k - 1, k, k + 1]
+        assert_almost_equal(img[:, :, bands][i, j, 1], expected)
+        assert_almost_equal(img.read_band(k)[i, j], expected)
+        assert_almost_equal(img.read_bands(bands)[i, j, 1], expected)
+        assert_almost_equal(img.read_subregion((i, i + 2), (j - 1, j + 1),
+                                               bands)[0, 1, 1], expected)
+        assert_almost_equal(img.read_pixels([0, i], [0, j], bands)[1, 1],
+                            expected)
+        assert_almost_equal(img.read_datum(i, j, k), expected)
+
+    def test_transformed_image_iter_blocks_args(self):
+        from spectral.algorithms.transforms import LinearTransform
+        from spectral.io.spyfile import SpyFile, TransformedImage
+        if not isinstance(self.image, SpyFile):
+            return
+        (i, j, k) = self.datum
+        transform = LinearTransform(self.matrix[k - 2: k + 3])
+        img = TransformedImage(transform, self.image)
+        # Same positional arguments as SpyFile.iter_blocks
+        args = (16, [1, 2], 2, 1)
+        src_blocks = [(rows, core, np.array(data)) for (rows, core, data)
+                      in self.image.iter_blocks(*args)]
+        blocks = list(img.iter_blocks(*args))
+        assert(len(blocks) == len(src_blocks))
+        for ((r1, c1, d1), (r2, c2, d2)) in zip(blocks, src_blocks):
+            assert(r1 == r2 and c1 == c2)
+            assert(d1.shape[:2] == d2.shape[:2] and d1.shape[2] == 2)
+        (rows, core, data) = [b for b in blocks
+                              if b[0].start <= i < b[0].stop][0]
+        assert_almost_equal(data[i - rows.start, j, 1],
+                            self.scalar * self.value)
+
+    def test_transformed_image_stats(self):
+        import spectral
+        from spectral.algorithms.transforms import LinearTransform
+        from spectral.io.spyfile import TransformedImage
+        (i, j, k) = self.datum
+        transform = LinearTransform(self.matrix[k - 1: k + 1], pre=self.pre,
+                                    post=self.post)
+        img = TransformedImage(transform, self.image)
+        stats = spectral.calc_stats(img)
+        data = np.asarray(self.image[:, :, k - 1: k + 1], dtype=np.float64)
+        expected = spectral.calc_stats(self.scalar * (data + self.pre) +
+                                       self.post)
+        assert_almost_equal(stats.mean / expected.mean, [1, 1], decimal=5)
+        assert_almost_equal(stats.cov / expected.cov, np.ones((2, 2)),
+                            decimal=5)
+        # Statistics of the source are shared by chained images.
+        chained = TransformedImage(np.ones((1, 2)), img)
+        assert(chained.source_stats() is img.source_stats())
+
 
 def run():
     import spectral as spy